@@ -3,9 +3,14 @@ import os
 import re
 import tarfile
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
+from .aro_ontology import AROOntology, ROLLUP_COLUMNS
+from .lazy_import import lazy_import
+from .plot_rendering import new_figure, finish_figure
+from .enrichment_stats import category_enrichment
+
+# seaborn is only imported when a plot is drawn
+sns = lazy_import("seaborn")
 
 
 class CARDAnalysis:
@@ -17,15 +22,25 @@ class CARDAnalysis:
         ARG_list (List[dict]): List of successfully matched ARG entries.
         not_ARG_list (List[str]): List of genes with no match in the CARD ontology.
         ARGdf (pd.DataFrame): DataFrame containing the ARG_list.
+        unmatched_overrides (List[str]): Gene IDs of the curation file not found in ARGdf.
     """
 
-    def __init__(self, genes_list: List[str], has_CARDdata: bool = False):
+    def __init__(self, genes_list: List[str], has_CARDdata: bool = False,
+                 ontology: Optional[AROOntology] = None,
+                 overrides_file: Optional[Union[str, pd.DataFrame]] = None):
         """
         Initializes the CARDAnalysis class, optionally downloading CARD data if not available.
 
         Args:
             genes_list (List[str]): Gene names to be checked against CARD ontology.
             has_CARDdata (bool): Set to True if `aro.obo` is already available locally.
+            ontology (Optional[AROOntology]): Pre-loaded ontology index. When given, genes are
+                                              annotated from it instead of re-reading `aro.obo`,
+                                              and drug class, resistance mechanism and gene
+                                              family columns are added to `ARGdf`.
+            overrides_file (Optional[Union[str, pd.DataFrame]]): Curation file (see
+                                            `save_overrides`), or a table already read with
+                                            `load_overrides`, applied to `ARGdf` after annotation.
 
         Raises:
             ValueError: If `genes_list` is not a list of strings.
@@ -33,19 +48,37 @@ class CARDAnalysis:
         if not isinstance(genes_list, list) or not all(isinstance(g, str) for g in genes_list):
             raise ValueError("'genes_list' must be a list of strings representing gene names.")
 
-        if not has_CARDdata:
+        if not has_CARDdata and ontology is None:
             self.download_CARD_file()
 
         self.genes_list = genes_list
-        self.ARG_list, self.not_ARG_list = self.finding_ARG(self.genes_list, "aro.obo")
+        self.ontology = ontology
+        if ontology is not None:
+            self.ARG_list, self.not_ARG_list = ontology.annotate(self.genes_list)
+        else:
+            self.ARG_list, self.not_ARG_list = self.finding_ARG(self.genes_list, "aro.obo")
         self.ARGdf = pd.DataFrame(self.ARG_list)
 
-    def download_CARD_file(self) -> None:
+        if ontology is not None:
+            self.add_ontology_rollups(ontology)
+
+        self.unmatched_overrides = []
+        if overrides_file is not None:
+            self.unmatched_overrides = self.apply_overrides(overrides_file)
+
+    @staticmethod
+    def download_CARD_file(out_file: str = "aro.obo") -> None:
         """
         Downloads the CARD ontology file (`aro.obo`) from the official site and extracts it.
+
+        Args:
+            out_file (str): Path the ontology is written to (its directory is created).
         """
         CARD_URL = "https://card.mcmaster.ca/latest/ontology"
-        zip_filename = "card-data.tar.bz2"
+        out_dir = os.path.dirname(out_file)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        zip_filename = os.path.join(out_dir, "card-data.tar.bz2")
         obo_filename = "aro.obo"
 
         response = requests.get(CARD_URL, stream=True)
@@ -60,9 +93,10 @@ class CARDAnalysis:
 
         with tarfile.open(zip_filename, "r:bz2") as tar:
             for member in tar.getmembers():
-                if obo_filename in member.name:
-                    tar.extract(member, path=".")
-                    print(f"Download and extraction complete: {member.name}")
+                if obo_filename in member.name and member.isfile():
+                    with tar.extractfile(member) as src, open(out_file, "wb") as dst:
+                        dst.write(src.read())
+                    print(f"Download and extraction complete: {member.name} -> {out_file}")
                     break
 
         os.remove(zip_filename)
@@ -151,20 +185,217 @@ class CARDAnalysis:
     def add_antibiotic_by_id(self, gene_id: str, antibiotic: str) -> None:
         """
         Updates the antibiotic information for a gene in the ARGdf DataFrame.
+
+        To curate many genes at once, use `apply_overrides`.
         """
         if hasattr(self, "ARGdf") and not self.ARGdf.empty:
-            index = self.ARGdf[self.ARGdf['Gene ID'] == gene_id].index
-            if not index.empty:
-                self.ARGdf.at[index[0], 'Antibiotics'] = antibiotic
-            else:
+            if self.apply_overrides({gene_id: antibiotic}):
                 print(f"Gene ID '{gene_id}' not found.")
         else:
             raise AttributeError("ARGdf is not initialized.")
 
-    def plot_antibiotic_frequencies(self, df: pd.DataFrame, label_fontsize: int = 10,
-                                bar_color: str = 'green', bar_width: float = 0.8) -> None:
+    @staticmethod
+    def _overrides_frame(overrides: Union[Dict[str, str], pd.DataFrame, str]) -> pd.DataFrame:
+        """
+        Normalizes overrides to a DataFrame indexed by 'Gene ID' (the last entry of a repeated ID wins).
+        """
+        if isinstance(overrides, str):
+            overrides = CARDAnalysis.load_overrides(overrides)
+        elif isinstance(overrides, dict):
+            overrides = pd.DataFrame({"Gene ID": list(overrides.keys()),
+                                      "Antibiotics": list(overrides.values())})
+        elif not isinstance(overrides, pd.DataFrame):
+            raise ValueError("Overrides must be a dictionary, a DataFrame or the path to a curation file.")
+
+        if "Gene ID" not in overrides.columns:
+            raise ValueError("Overrides must contain a 'Gene ID' column.")
+        return overrides.drop_duplicates("Gene ID", keep="last").set_index("Gene ID")
+
+    def apply_overrides(self, overrides: Union[Dict[str, str], pd.DataFrame, str]) -> List[str]:
+        """
+        Applies manual curations to ARGdf in bulk.
+
+        ARGdf is matched against the overrides by 'Gene ID' once and each curated column is
+        assigned in a single vectorized step. Missing values in the overrides leave the
+        current value unchanged; columns not yet in ARGdf are added.
+
+        When ARGdf has ontology roll-ups (see `add_ontology_rollups`), the 'Drug Class' of
+        genes with curated 'Antibiotics' is recomputed from the curated antibiotics, unless
+        the overrides also set their 'Drug Class'. Mechanisms and gene families do not
+        depend on the antibiotics and are kept.
+
+        Args:
+            overrides (Union[Dict[str, str], pd.DataFrame, str]): A mapping of Gene ID to
+                antibiotics, a DataFrame with a 'Gene ID' column and the columns to overwrite,
+                or the path to a curation file.
+
+        Returns:
+            List[str]: Gene IDs of the overrides that are not in ARGdf.
+        """
+        if not hasattr(self, "ARGdf"):
+            raise AttributeError("ARGdf is not initialized.")
+        overrides = self._overrides_frame(overrides)
+        if self.ARGdf.empty:
+            return overrides.index.tolist()
+
+        gene_ids = self.ARGdf["Gene ID"]
+        matched = gene_ids.isin(overrides.index)
+        for column in overrides.columns:
+            values = gene_ids.map(overrides[column])
+            mask = matched & values.notna()
+            if column not in self.ARGdf.columns:
+                self.ARGdf[column] = pd.NA
+            self.ARGdf.loc[mask, column] = values[mask]
+
+        drug_class = ROLLUP_COLUMNS["drug_class"]
+        if (getattr(self, "ontology", None) is not None and "Antibiotics" in overrides.columns
+                and drug_class in self.ARGdf.columns):
+            curated = matched & gene_ids.map(overrides["Antibiotics"]).notna()
+            if drug_class in overrides.columns:
+                curated &= gene_ids.map(overrides[drug_class]).isna()
+            if curated.any():
+                self.ARGdf.loc[curated, drug_class] = [
+                    ", ".join(sorted(self.ontology.antibiotic_drug_classes(antibiotics.split(",")))) or pd.NA
+                    for antibiotics in self.ARGdf.loc[curated, "Antibiotics"]
+                ]
+
+        return overrides.index[~overrides.index.isin(gene_ids)].tolist()
+
+    @staticmethod
+    def load_overrides(overrides_file: str) -> pd.DataFrame:
+        """
+        Reads a curation file: a TSV with a 'Gene ID' column and one column per curated field.
+        """
+        if not os.path.exists(overrides_file):
+            raise FileNotFoundError(f"File not found: {overrides_file}")
+        overrides = pd.read_csv(overrides_file, sep="\t", dtype=str, comment="#")
+        if "Gene ID" not in overrides.columns:
+            raise ValueError(f"Curation file must contain a 'Gene ID' column: {overrides_file}")
+        return overrides
+
+    @staticmethod
+    def save_overrides(overrides: Union[Dict[str, str], pd.DataFrame], overrides_file: str) -> None:
+        """
+        Saves curations to a reusable TSV file, merged with the entries already in the file.
+
+        New entries replace existing entries with the same 'Gene ID'.
+
+        Args:
+            overrides (Union[Dict[str, str], pd.DataFrame]): Curations, as for `apply_overrides`.
+            overrides_file (str): Path of the curation file.
+        """
+        new = CARDAnalysis._overrides_frame(overrides)
+        if os.path.exists(overrides_file):
+            current = CARDAnalysis._overrides_frame(overrides_file)
+            new = pd.concat([current[~current.index.isin(new.index)], new])
+        new.reset_index().to_csv(overrides_file, sep="\t", index=False)
+
+    def add_ontology_rollups(self, ontology: Optional[AROOntology] = None) -> None:
+        """
+        Adds 'Drug Class', 'Resistance Mechanism' and 'AMR Gene Family' columns to ARGdf.
+
+        The roll-ups are precomputed over the ARO hierarchy by `AROOntology`, so each gene
+        costs one lookup per column.
+
+        Args:
+            ontology (Optional[AROOntology]): Ontology to use. Defaults to the one given at construction.
+        """
+        ontology = ontology or getattr(self, "ontology", None)
+        if ontology is None:
+            raise ValueError("An AROOntology is required to add drug class, mechanism and gene family columns.")
+        if not hasattr(self, "ARGdf"):
+            raise AttributeError("ARGdf is not initialized.")
+        self.ontology = ontology
+        if self.ARGdf.empty:
+            return
+
+        for kind, column in ROLLUP_COLUMNS.items():
+            self.ARGdf[column] = [
+                ", ".join(sorted(ontology.rollup(gene_id, kind))) or pd.NA
+                for gene_id in self.ARGdf["Gene ID"]
+            ]
+
+    def genes_by_rollup(self, kind: str, value: str) -> pd.DataFrame:
+        """
+        Returns the ARGs whose drug class, resistance mechanism or gene family matches `value`.
+
+        Args:
+            kind (str): "drug_class", "mechanism" or "gene_family".
+            value (str): Name of the drug class, mechanism or gene family (case-insensitive).
+        """
+        if getattr(self, "ontology", None) is None:
+            raise ValueError("An AROOntology is required to query drug classes, mechanisms or gene families.")
+        if kind not in ROLLUP_COLUMNS:
+            raise ValueError(f"Invalid kind '{kind}'. Use one of {list(ROLLUP_COLUMNS)}.")
+        if self.ARGdf.empty:
+            return self.ARGdf.copy()
+
+        value = value.lower()
+        mask = [
+            any(name.lower() == value for name in self.ontology.rollup(gene_id, kind))
+            for gene_id in self.ARGdf["Gene ID"]
+        ]
+        return self.ARGdf[mask].reset_index(drop=True)
+
+    @staticmethod
+    def drug_class_enrichment(samples: Dict[str, pd.DataFrame], ontology: AROOntology,
+                              kind: str = "drug_class", min_count: int = 1) -> pd.DataFrame:
+        """
+        Tests the over-representation of drug classes (or mechanisms / gene families) in the
+        ARGs of many samples, against the AMR genes of the whole ontology.
+
+        The background holds the AMR genes with a roll-up of `kind`: the terms that belong
+        to an AMR gene family without being a family themselves (every term with a roll-up
+        if the ontology has no gene families). Sample ARGs outside it, such as a matched
+        gene family, are added to it so the samples are always drawn from the background.
+
+        Args:
+            samples (Dict[str, pd.DataFrame]): Sample names mapped to their ARGdf.
+            ontology (AROOntology): Loaded ontology.
+            kind (str): "drug_class", "mechanism" or "gene_family".
+            min_count (int): Categories with fewer ARGs in a sample are not tested.
+
+        Returns:
+            pd.DataFrame: Long-format results (see `enrichment_stats.category_enrichment`).
+        """
+        if kind not in ROLLUP_COLUMNS:
+            raise ValueError(f"Invalid kind '{kind}'. Use one of {list(ROLLUP_COLUMNS)}.")
+        if not samples:
+            raise ValueError("samples must be a non-empty dictionary.")
+
+        annotated = [t for t in ontology.term_ids if ontology.rollup(t, kind)]
+        genes = [t for t in annotated if ontology.gene_families(t) and not ontology.is_gene_family(t)]
+        if not genes:
+            genes = annotated
+
+        annotations = pd.DataFrame(
+            [(name, gene_id, c) for name, df in samples.items() if "Gene ID" in df.columns
+             for gene_id in df["Gene ID"].dropna().unique() for c in ontology.rollup(gene_id, kind)],
+            columns=["Sample", "Gene ID", "Category"])
+        genes = list(dict.fromkeys(genes + annotations["Gene ID"].tolist()))
+        background = pd.DataFrame(
+            [(t, c) for t in genes for c in ontology.rollup(t, kind)], columns=["Gene ID", "Category"])
+        return category_enrichment(annotations, background, category_col="Category",
+                                   item_col="Gene ID", min_count=min_count)
+
+    @staticmethod
+    def plot_antibiotic_frequencies(df: pd.DataFrame, label_fontsize: int = 10,
+                                    bar_color: str = 'green', bar_width: float = 0.8,
+                                    headless: bool = False, save_path: Optional[str] = None):
         """
         Plots the frequency of antibiotics found in genes as a bar chart.
+
+        Args:
+            df (pd.DataFrame): ARG DataFrame with an 'Antibiotics' column.
+            label_fontsize (int): Font size of the antibiotic labels.
+            bar_color (str): Bar color.
+            bar_width (float): Bar width.
+            headless (bool): If True, draw on a standalone Agg figure and return it instead of
+                             calling `plt.show()` (safe for batch jobs and worker threads).
+            save_path (Optional[str]): If provided, the figure is saved to this path.
+
+        Returns:
+            Optional[Figure]: The figure in headless mode, otherwise None.
         """
         if "Antibiotics" not in df.columns:
             raise ValueError("DataFrame must contain an 'Antibiotics' column.")
@@ -179,19 +410,16 @@ class CARDAnalysis:
         relative_frequencies = (antibiotic_counts / len(df)) * 100
 
         # Create the bar plot with custom bar width
-        plt.figure(figsize=(10, 8))
+        fig, ax = new_figure(figsize=(10, 8), headless=headless)
         sns.barplot(x=relative_frequencies.values, y=relative_frequencies.index,
-                    color=bar_color, width=bar_width)
+                    color=bar_color, width=bar_width, ax=ax)
 
         # Add style and labels
-        plt.title('Frequency of Antibiotics Found in Genes', fontsize=16, fontweight='bold')
-        plt.xlabel('Frequency of Resistant Genes (%)', fontsize=14)
-        plt.ylabel('Antibiotic', fontsize=14)
-        plt.xticks(fontsize=12)
-        plt.yticks(fontsize=label_fontsize)
-
-        # Adjust layout
-        plt.tight_layout()
-
-        # Show the plot
-        plt.show()
+        ax.set_title('Frequency of Antibiotics Found in Genes', fontsize=16, fontweight='bold')
+        ax.set_xlabel('Frequency of Resistant Genes (%)', fontsize=14)
+        ax.set_ylabel('Antibiotic', fontsize=14)
+        ax.tick_params(axis='x', labelsize=12)
+        ax.tick_params(axis='y', labelsize=label_fontsize)
+
+        # Adjust layout, then show or return the figure
+        return finish_figure(fig, save_path=save_path, headless=headless)
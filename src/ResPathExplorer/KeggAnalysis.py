@@ -2,15 +2,51 @@ import os
 import re
 import requests
 from .rename_file import rename_file
+from .lazy_import import lazy_import
+from .plot_rendering import new_figure, finish_figure
+from .gmt_index import BinaryGeneSets, GMTIndex, binary_gene_sets_path, open_gene_sets, save_binary_gene_sets
+from .permutation_enrichment import permutation_enrichment
+from .prerank_gsea import prerank_gsea
+from .artifact_cache import file_checksum
+from .enrichment_cache import EnrichmentCache
+from .pathway_colors import pathway_color_urls
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import xml.etree.ElementTree as ET
-from typing import List, Dict, Tuple, Optional
-from bioservices import KEGG
-from Bio.KEGG import REST
-import gseapy as gp
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Iterable, List, Dict, Mapping, Tuple, Optional, Union
+
+# Heavy dependencies are imported on first use (see lazy_import)
+sns = lazy_import("seaborn")
+KEGG = lazy_import("bioservices", "KEGG")
+REST = lazy_import("Bio.KEGG.REST")
+gp = lazy_import("gseapy")
+
+# Pathway names fetched from KEGG for IDs missing from the loaded gene sets
+_REST_PATHWAY_NAMES: Dict[str, str] = {}
+
+
+@dataclass(frozen=True)
+class EnrichmentResult:
+    """
+    Outcome of `KeggAnalysis.enrich`.
+
+    The result cannot be reassigned and `paths_genes` is read-only; the DataFrames belong to
+    the result and should be copied before being modified.
+
+    Attributes:
+        results (pd.DataFrame): Pathways passing the cutoff, with their 'Pathway name'.
+        top_pathways (pd.DataFrame): The `number_path` pathways with the lowest adjusted p-value.
+        paths_genes (Mapping[str, Tuple[str, ...]]): Each top pathway and its enriched genes.
+        from_cache (bool): Whether the gseapy table came from `KeggAnalysis.enrichment_cache`.
+        table (Optional[pd.DataFrame]): The unfiltered gseapy table (`res2d`).
+    """
+    results: pd.DataFrame
+    top_pathways: pd.DataFrame
+    paths_genes: Mapping[str, Tuple[str, ...]]
+    from_cache: bool = False
+    table: Optional[pd.DataFrame] = None
 
 
 class KeggAnalysis:
@@ -21,14 +57,22 @@ class KeggAnalysis:
     Attributes:
         organism (str): Full name of the organism.
         org (str): KEGG organism code.
-        gene_set (Dict[Tuple[str, str], List[str]]): Dictionary of pathways and their associated genes.
+        gene_set (Mapping[Tuple[str, str], List[str]]): Pathways and their associated genes. An
+                                                        existing GMT is loaded lazily, from its binary
+                                                        companion when up to date (see `open_gene_sets`).
         file_name_gmt (str): Path to GMT file.
+        gmt_filter (Optional[List[str]]): Pathway ID/name patterns (e.g. "map00*") restricting
+                                          the loaded gene sets.
         enrichment_results (pd.DataFrame): Full enrichment results.
         limited_enrichment_results (pd.DataFrame): Top N filtered enrichment results.
         paths_genes_dict (Dict[str, List[str]]): Dictionary of pathways and enriched genes.
+        enrichment_cache (EnrichmentCache): Unfiltered enrichment tables of previous calls
+                                            (in memory, optionally persisted on disk).
     """
 
-    def __init__(self, organism_name: str, file_name_gmt: str, use_existing_gmt: bool = True):
+    def __init__(self, organism_name: str, file_name_gmt: str, use_existing_gmt: bool = True,
+                 gmt_filter: Optional[Union[str, Iterable[str]]] = None,
+                 enrichment_cache: Optional[EnrichmentCache] = None):
         if not organism_name:
             raise ValueError("Organism name cannot be empty.")
         if not file_name_gmt:
@@ -43,10 +87,12 @@ class KeggAnalysis:
             self.organism = self._get_organism_name(organism_name)
 
         self.file_name_gmt = file_name_gmt
+        self.gmt_filter = [gmt_filter] if isinstance(gmt_filter, str) else gmt_filter
         self.gene_set = {}
+        self.enrichment_cache = enrichment_cache if enrichment_cache is not None else EnrichmentCache()
 
         if use_existing_gmt:
-            if not os.path.exists(file_name_gmt):
+            if not os.path.exists(file_name_gmt) and not os.path.exists(binary_gene_sets_path(file_name_gmt)):
                 raise FileNotFoundError(f"GMT file '{file_name_gmt}' not found.")
             self._load_gmt_file(file_name_gmt)
         else:
@@ -85,14 +131,23 @@ class KeggAnalysis:
             raise ValueError(f"Organism code '{organism_code}' not found in KEGG database.")
 
     def _load_gmt_file(self, file_name: str) -> None:
-        """Load pathways and genes from a GMT file into `self.gene_set`."""
-        with open(file_name, 'r') as file:
-            for line in file:
-                parts = line.strip().split("\t")
-                pathway = parts[0]
-                pathway_name = parts[1]
-                genes = parts[2:]
-                self.gene_set[(pathway, pathway_name)] = genes
+        """
+        Open a GMT file as `self.gene_set`.
+
+        The binary companion (`<gmt>.npz`) is memory-mapped when it is up to date;
+        otherwise only a persisted line-offset index of the text GMT is read and gene
+        lists are read when a pathway is first accessed. `gmt_filter` restricts the
+        pathways. A previously opened gene set is closed.
+        """
+        gene_set = open_gene_sets(file_name, include=getattr(self, "gmt_filter", None))
+        self.close()
+        self.gene_set = gene_set
+
+    def close(self) -> None:
+        """Close the files held open by `gene_set` (the memory-mapped GMT or binary companion)."""
+        close = getattr(getattr(self, "gene_set", None), "close", None)
+        if close is not None:
+            close()
 
     def get_kgml(self, pathway_id, service):
         """
@@ -103,14 +158,16 @@ class KeggAnalysis:
             raise ValueError(f"Failed to get KGML for {pathway_id}")
         return kgml_str
 
-    def extract_path_name_from_kgml(self, kgml_string):
+    @staticmethod
+    def extract_path_name_from_kgml(kgml_string):
         """
         Extract the pathway name from a kgml structure string
         """
         root = ET.fromstring(kgml_string)
         return root.attrib.get("title")
 
-    def extract_genes_from_kgml_string(self, kgml_string):
+    @staticmethod
+    def extract_genes_from_kgml_string(kgml_string):
         """
         Extracts genes from a KGML string, as returned by the KEGG API.
         """
@@ -158,10 +215,14 @@ class KeggAnalysis:
         self.save_GeneSet_GMT(output_file, self.gene_set)
         print(f"GMT {output_file} saved with {len(paths_loaded)} pathways")
 
-    def save_GeneSet_GMT(self, gmt_file_name: str, gene_set_dict: Dict[Tuple[str, str], List[str]]) -> None:
+    @staticmethod
+    def save_GeneSet_GMT(gmt_file_name: str, gene_set_dict: Dict[Tuple[str, str], List[str]]) -> None:
         """
         Save a gene set dictionary to a .gmt file if it doesn't already exist.
 
+        A binary companion (`<gmt>.npz`) with the same gene sets is written next to it,
+        so later loads can memory-map the arrays instead of parsing the text.
+
         Args:
             gmt_file_name (str): Output GMT file name.
             gene_set_dict (dict): Keys as (pathway_name, description), values as gene lists.
@@ -182,6 +243,83 @@ class KeggAnalysis:
         except Exception as e:
             raise Exception(f"Error saving file '{gmt_file_name}': {e}")
 
+        try:
+            save_binary_gene_sets(gene_set_dict, binary_gene_sets_path(gmt_file_name), gmt_file=gmt_file_name)
+        except OSError as e:
+            print(f"Binary gene set file not saved, the GMT will be parsed on load: {e}")
+
+    def enrich(
+            self,
+            gene_list: List[str],
+            cutoff: float,
+            number_path: int,
+            genes_background: Optional[List[str]] = None,
+            n_permutations: int = 0,
+            seed: int = 0,
+            outdir: Optional[str] = None) -> "EnrichmentResult":
+        """
+        Perform pathway enrichment analysis without changing the instance.
+
+        The loaded gene sets are only read and the memoized tables of `enrichment_cache`
+        are shared under a lock, so one instance can serve concurrent calls from several
+        threads. gseapy writes no files unless `outdir` is given; concurrent callers must
+        then use different directories.
+
+        With a `gmt_filter`, or when only the binary companion of the GMT exists, the
+        loaded gene sets are passed to gseapy instead of the GMT path. With
+        `n_permutations`, the results also get the 'Empirical P-value' and 'Empirical FDR'
+        of `empirical_enrichment`. The unfiltered gseapy table is memoized by gene list,
+        background and gene sets; the cutoff, top-N and pathway names are applied on top
+        of it, and a cache hit does not run gseapy. Pathway names come from the loaded
+        gene sets (see `pathway_names`), so no KEGG request is made for them.
+
+        Returns:
+            EnrichmentResult: The filtered results, the top pathways and their genes.
+        """
+        def run_gseapy() -> pd.DataFrame:
+            gene_sets = self.file_name_gmt
+            loaded = getattr(self, "gene_set", None)
+            if isinstance(loaded, (GMTIndex, BinaryGeneSets)) and (
+                    getattr(self, "gmt_filter", None) or not os.path.exists(self.file_name_gmt)):
+                gene_sets = loaded.to_dict()
+
+            enr = gp.enrich(
+                gene_list=gene_list,
+                background=genes_background,
+                gene_sets=gene_sets,
+                outdir=outdir,
+                cutoff=cutoff
+            )
+            return enr.res2d
+
+        cache = getattr(self, "enrichment_cache", None)
+        fingerprint = self.gene_sets_fingerprint() if cache is not None else None
+        if fingerprint is None:
+            results, from_cache = run_gseapy(), False
+        else:
+            key = cache.make_key(gene_list, genes_background, fingerprint)
+            results, from_cache = cache.get_or_compute(key, run_gseapy)
+        table = results
+
+        if n_permutations:
+            empirical = self.empirical_enrichment(gene_list, n_permutations=n_permutations,
+                                                  genes_background=genes_background, seed=seed)
+            results = results.merge(empirical[["Term", "Empirical P-value", "Empirical FDR"]],
+                                    on="Term", how="left")
+        filtered_results = results[results['Adjusted P-value'] <= cutoff].copy()
+
+        filtered_res = filtered_results.copy()
+        filtered_res['Pathway name'] = filtered_res['Term'].map(self.pathway_names(filtered_res['Term']))
+
+        top_pathways, paths_genes = self.select_top_pathways(filtered_res, number_path)
+        return EnrichmentResult(
+            results=filtered_res,
+            top_pathways=top_pathways,
+            paths_genes=MappingProxyType({k: tuple(v) for k, v in paths_genes.items()}),
+            from_cache=from_cache,
+            table=table,
+        )
+
     def enrichment_analysis(
             self,
             gene_list: List[str],
@@ -189,38 +327,139 @@ class KeggAnalysis:
             name_outdir: str,
             number_path: int,
             name_results_file: str,
-            genes_background: Optional[List[str]] = None) -> None:
-        """Perform pathway enrichment analysis and store results."""
-        enr = gp.enrich(
-            gene_list=gene_list,
-            background=genes_background,
-            gene_sets=self.file_name_gmt,
-            outdir=name_outdir,
-            cutoff=cutoff
-        )
-        results = enr.res2d
-        filtered_results = results[results['Adjusted P-value'] <= cutoff].copy()
+            genes_background: Optional[List[str]] = None,
+            n_permutations: int = 0,
+            seed: int = 0) -> None:
+        """
+        Perform pathway enrichment analysis and store results.
 
-        dict_names = {}
-        for t in filtered_results["Term"]:
-            dict_names[t] = self.get_pathway_name(t).split(" -")[0]
-        filtered_res = filtered_results.copy()
-        filtered_res['Pathway name'] = filtered_res['Term'].map(dict_names)
+        Runs `enrich`, stores its tables in `enrichment_results`,
+        `limited_enrichment_results` and `paths_genes_dict`, and renames the gseapy
+        reports in `name_outdir` to `name_results_file`. On a cache hit gseapy is not run;
+        the cached table and its bar plot are written under the same names instead. Use
+        `enrich` to share an instance across threads.
+        """
+        result = self.enrich(gene_list, cutoff, number_path, genes_background=genes_background,
+                             n_permutations=n_permutations, seed=seed, outdir=name_outdir)
+
+        self.enrichment_results = result.results
+        self.limited_enrichment_results = result.top_pathways
+        self.paths_genes_dict = {k: list(v) for k, v in result.paths_genes.items()}
+        if result.from_cache:
+            self._write_cached_report(result.table, cutoff, name_outdir, name_results_file)
+            return
+
+        # Depending on the gseapy version, reports are named after the GMT file or "Enrichr"
+        # ("gs_ind_0" when gene sets are passed as a dictionary)
+        report_prefix = os.path.basename(self.file_name_gmt)
+        for candidate in (report_prefix, "Enrichr", "gs_ind_0"):
+            if os.path.exists(os.path.join(name_outdir, f"{candidate}.human.enrichr.reports.txt")):
+                report_prefix = candidate
+                break
+        rename_file(name_outdir, f"{report_prefix}.human.enrichr.reports.txt", f"{name_results_file}.txt")
+        # gseapy skips the PDF when no term passes the cutoff
+        if os.path.exists(os.path.join(name_outdir, f"{report_prefix}.human.enrichr.reports.pdf")):
+            rename_file(name_outdir, f"{report_prefix}.human.enrichr.reports.pdf", f"{name_results_file}.pdf")
+
+    @staticmethod
+    def _write_cached_report(table: pd.DataFrame, cutoff: float, name_outdir: str, name_results_file: str) -> None:
+        """Write a memoized gseapy table as the report files gseapy writes (TSV and bar plot PDF)."""
+        os.makedirs(name_outdir, exist_ok=True)
+        report = os.path.join(name_outdir, f"{name_results_file}.txt")
+        table.to_csv(report, index=False, encoding="utf-8", float_format="%.6e", sep="\t")
+        # Like gseapy, no PDF is written when no term passes the cutoff
+        if (table["Adjusted P-value"] <= cutoff).any():
+            gp.barplot(df=table, cutoff=cutoff, color="salmon", title=name_results_file,
+                       ofname=os.path.join(name_outdir, f"{name_results_file}.pdf"))
+
+    def gene_sets_fingerprint(self) -> Optional[str]:
+        """
+        Identify the gene sets used by `enrichment_analysis`: the checksum of the GMT (or
+        of its binary companion) and the `gmt_filter`. Returns None without a GMT file.
+        """
+        for path in (self.file_name_gmt, binary_gene_sets_path(self.file_name_gmt)):
+            if os.path.exists(path):
+                return f"{file_checksum(path)}|{','.join(getattr(self, 'gmt_filter', None) or [])}"
+        return None
+
+    def empirical_enrichment(self, gene_list: List[str], n_permutations: int = 10000,
+                             genes_background: Optional[List[str]] = None, seed: int = 0,
+                             n_workers: Optional[int] = None) -> pd.DataFrame:
+        """
+        Empirical p-values of the pathways of `self.gene_set` from random gene lists of
+        the same size as `gene_list` (see `permutation_enrichment`).
 
-        self.enrichment_results = filtered_res
+        Unlike the hypergeometric p-values of gseapy, these do not assume the genes are
+        independent draws. Permutations are vectorized and spread over `n_workers`
+        processes; the results only depend on `seed`.
 
-        data_frame = self.enrichment_results.sort_values(by='Adjusted P-value', ascending=True, inplace=False)
-        data_final = data_frame.head(number_path)
+        Returns:
+            pd.DataFrame: 'Term', 'Overlap', 'Gene set size', 'Expected overlap',
+                          'Empirical P-value' and 'Empirical FDR' per pathway.
+        """
+        if not getattr(self, "gene_set", None):
+            raise ValueError("No gene sets loaded. Load or create a GMT file first.")
+        return permutation_enrichment(gene_list, self.gene_set, background=genes_background,
+                                      n_permutations=n_permutations, seed=seed, n_workers=n_workers)
+
+    def prerank_analysis(self, ranking: Union[pd.Series, Dict[str, float]], n_permutations: int = 1000,
+                         min_size: int = 15, max_size: int = 500, weight: float = 1.0, seed: int = 0,
+                         n_workers: Optional[int] = None) -> pd.DataFrame:
+        """
+        Preranked GSEA of a gene -> score ranking (e.g. log2 fold changes) on `self.gene_set`.
+
+        Runs in memory with `prerank_gsea` instead of gseapy, so no GMT export or report
+        files are needed. The results are also stored in `self.prerank_results`.
 
-        self.limited_enrichment_results = data_final
+        Returns:
+            pd.DataFrame: 'Term', 'Pathway name', 'ES', 'NES', 'NOM p-val', 'FDR q-val',
+                          'Size', 'Tag %', 'Gene %' and 'Lead_genes' per tested pathway.
+        """
+        if not getattr(self, "gene_set", None):
+            raise ValueError("No gene sets loaded. Load or create a GMT file first.")
+        results = prerank_gsea(ranking, self.gene_set, weight=weight, min_size=min_size, max_size=max_size,
+                               n_permutations=n_permutations, seed=seed, n_workers=n_workers)
+        results.insert(1, "Pathway name", results["Term"].map(self.pathway_names(results["Term"])))
+        self.prerank_results = results
+        return results
+
+    @staticmethod
+    def select_top_pathways(
+            enrichment_results: pd.DataFrame,
+            number_path: int) -> Tuple[pd.DataFrame, Dict[str, List[str]]]:
+        """
+        Keep the `number_path` pathways with the lowest adjusted p-value.
+
+        Returns:
+            Tuple[pd.DataFrame, Dict[str, List[str]]]: The top pathways and a dictionary of
+            each top pathway to its enriched genes.
+        """
+        data_frame = enrichment_results.sort_values(by='Adjusted P-value', ascending=True, inplace=False)
+        data_final = data_frame.head(number_path)
 
         term_genes_dict = data_final.set_index('Term')['Genes'].to_dict()
         for k, vs in term_genes_dict.items():
             term_genes_dict[k] = [v for v in vs.split(";")]
-        self.paths_genes_dict = term_genes_dict
+        return data_final, term_genes_dict
 
-        rename_file(name_outdir, f"{self.file_name_gmt}.human.enrichr.reports.txt", f"{name_results_file}.txt")
-        rename_file(name_outdir, f"{self.file_name_gmt}.human.enrichr.reports.pdf", f"{name_results_file}.pdf")
+    def pathway_names(self, terms: Iterable[str]) -> Dict[str, str]:
+        """
+        Names of pathway IDs, read from the keys of the loaded gene sets.
+
+        IDs missing from `gene_set` are fetched once with `get_pathway_name` (without the
+        organism suffix) and memoized for the process.
+        """
+        gene_set = getattr(self, "gene_set", None)
+        known = {key[0]: key[1] for key in gene_set.keys() if isinstance(key, tuple)} if gene_set else {}
+        names = {}
+        for term in terms:
+            if term in known:
+                names[term] = known[term]
+                continue
+            if term not in _REST_PATHWAY_NAMES:
+                _REST_PATHWAY_NAMES[term] = self.get_pathway_name(term).split(" -")[0]
+            names[term] = _REST_PATHWAY_NAMES[term]
+        return names
 
     def get_pathway_name(self, id_pathway: str) -> str:
         """Fetch the pathway name given a KEGG pathway ID."""
@@ -235,35 +474,88 @@ class KeggAnalysis:
         name = re.search(r'NAME\s+(.+)', res).group(1)
         return name
 
+    def pathway_map_urls(self, scores: Optional[Union[pd.Series, Dict[str, float]]] = None,
+                         **kwargs) -> Dict[str, str]:
+        """
+        Colored KEGG map URLs of the top pathways of `enrichment_analysis`.
+
+        Genes are colored by `scores` (e.g. log2 fold change) through a colormap, or all
+        with one color without scores; keyword arguments are passed to `pathway_gene_colors`.
+        """
+        if getattr(self, "limited_enrichment_results", None) is None:
+            raise RuntimeError("Run enrichment_analysis() first.")
+        return pathway_color_urls(self.limited_enrichment_results, scores, **kwargs)
+
     def visualize_enrichment_results(
             self,
             name_outdir: str,
             outplot_file_name: str,
             plot_title: str,
-            plot_type: str = "barplot"
-    ) -> None:
-        """Visualize enrichment results using a barplot or dotplot."""
+            plot_type: str = "barplot",
+            headless: bool = False
+    ):
+        """
+        Visualize enrichment results using a barplot or dotplot.
+
+        The plot is saved as `<name_outdir>/<outplot_file_name>_<plot_type>.png`. With
+        `headless=True` no window is opened and the figure is returned instead.
+        """
         if self.limited_enrichment_results is None:
             raise RuntimeError("Run enrichment_analysis() first.")
 
-        data = self.limited_enrichment_results.copy()
-        fig, ax = plt.subplots(figsize=(12, 8))
+        plot_path = os.path.join(name_outdir, f"{outplot_file_name}_{plot_type}.png")
+        return self.plot_enrichment_results(
+            self.limited_enrichment_results,
+            plot_title=plot_title,
+            plot_type=plot_type,
+            headless=headless,
+            save_path=plot_path
+        )
+
+    @staticmethod
+    def plot_enrichment_results(
+            data: pd.DataFrame,
+            plot_title: str,
+            plot_type: str = "barplot",
+            headless: bool = False,
+            save_path: Optional[str] = None
+    ):
+        """
+        Draw a barplot or dotplot of enrichment results.
+
+        Args:
+            data (pd.DataFrame): Enrichment results with 'Pathway name', 'Adjusted P-value' and 'Overlap'.
+            plot_title (str): Title prefix of the plot.
+            plot_type (str): "barplot" or "dotplot".
+            headless (bool): If True, draw on a standalone Agg figure and return it instead of
+                             calling `plt.show()` (safe for batch jobs and worker threads).
+            save_path (Optional[str]): If provided, the figure is saved to this path.
+
+        Returns:
+            Optional[Figure]: The figure in headless mode, otherwise None.
+        """
+        if plot_type not in ("barplot", "dotplot"):
+            raise ValueError("Invalid plot_type. Use 'barplot' or 'dotplot'.")
+
+        from matplotlib import cm, colors
+
+        data = data.copy()
+        data["-log10(AdjP)"] = -np.log10(data["Adjusted P-value"])
+        fig, ax = new_figure(figsize=(12, 8), headless=headless)
 
         if plot_type == "barplot":
-            data["-log10(AdjP)"] = -np.log10(data["Adjusted P-value"])
-            norm = plt.Normalize(data["-log10(AdjP)"].min(), data["-log10(AdjP)"].max())
-            cmap = plt.cm.viridis
+            norm = colors.Normalize(data["-log10(AdjP)"].min(), data["-log10(AdjP)"].max())
+            cmap = cm.viridis
 
-            bars = ax.barh(data["Pathway name"], data["-log10(AdjP)"], color=cmap(norm(data["-log10(AdjP)"])))
+            ax.barh(data["Pathway name"], data["-log10(AdjP)"], color=cmap(norm(data["-log10(AdjP)"])))
             ax.set_xlabel('-log10(Adjusted P-value)')
             ax.set_title(f'{plot_title} - Barplot')
             ax.invert_yaxis()
 
-            sm = plt.cm.ScalarMappable(norm=norm, cmap=cmap)
-            plt.colorbar(sm, ax=ax, label='-log10(Adjusted P-value)')
+            sm = cm.ScalarMappable(norm=norm, cmap=cmap)
+            fig.colorbar(sm, ax=ax, label='-log10(Adjusted P-value)')
 
-        elif plot_type == "dotplot":
-            data["-log10(AdjP)"] = -np.log10(data["Adjusted P-value"])
+        else:
             sns.scatterplot(
                 x="-log10(AdjP)",
                 y="Pathway name",
@@ -279,13 +571,7 @@ class KeggAnalysis:
             ax.set_xlabel('-log10(Adjusted P-value)')
             ax.invert_yaxis()
 
-        else:
-            raise ValueError("Invalid plot_type. Use 'barplot' or 'dotplot'.")
-
-        plt.tight_layout()
-        plot_path = os.path.join(name_outdir, f"{outplot_file_name}_{plot_type}.png")
-        plt.savefig(plot_path, bbox_inches='tight')
-        plt.show()
+        return finish_figure(fig, save_path=save_path, headless=headless)
 
     def search_gene_path(
             self,
@@ -1,6 +1,47 @@
-from bioservices import KEGG
-from typing import Dict, Optional
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional
+import requests
 from .validate_color_code import validate_color_code
+from .lazy_import import lazy_import
+
+# bioservices is slow to import; load it on the first URL request
+KEGG = lazy_import("bioservices", "KEGG")
+
+KEGG_SHOW_PATHWAY_URL = "http://www.kegg.jp/kegg-bin/show_pathway?"
+KEGG_BASE_URL = "http://www.kegg.jp"
+
+
+@lru_cache(maxsize=None)
+def _validate_gene_color(color: str) -> None:
+    """Validate a "background,border" color string once per distinct string."""
+    if "," not in color:
+        raise ValueError(f"Color format must be 'background,border'. Found: {color}")
+    bg, border = color.split(",", 1)
+    validate_color_code(bg.strip())
+    validate_color_code(border.strip())
+
+
+def _escape_url(url: str) -> str:
+    """Percent-encode '#' of hex colors, which would otherwise start the URL fragment."""
+    return url.replace("#", "%23")
+
+
+def _check_gene_color_dict(gene_color_dict: Optional[Dict[str, str]]) -> None:
+    """Validate the gene -> color mapping of a pathway map."""
+    if gene_color_dict is None:
+        return
+    if not isinstance(gene_color_dict, dict):
+        raise ValueError("gene_color_dict must be a dictionary if provided.")
+
+    for gene_id, color in gene_color_dict.items():
+        if not isinstance(gene_id, str) or not isinstance(color, str):
+            raise ValueError(f"Each gene ID and color must be a string. Found: {gene_id} -> {color}")
+        _validate_gene_color(color)
 
 
 def get_url_pathway(
@@ -24,19 +65,129 @@ def get_url_pathway(
     if not target_path or not isinstance(target_path, str):
         raise ValueError("target_path must be a non-empty string.")
 
-    if gene_color_dict is not None:
-        if not isinstance(gene_color_dict, dict):
-            raise ValueError("gene_color_dict must be a dictionary if provided.")
-
-        for gene_id, color in gene_color_dict.items():
-            if not isinstance(gene_id, str) or not isinstance(color, str):
-                raise ValueError(f"Each gene ID and color must be a string. Found: {gene_id} -> {color}")
-            if "," not in color:
-                raise ValueError(f"Color format must be 'background,border'. Found: {color}")
-            bg, border = color.split(",", 1)
-            validate_color_code(bg.strip())
-            validate_color_code(border.strip())
+    _check_gene_color_dict(gene_color_dict)
 
     s = KEGG()
     url = s.show_pathway(target_path, scale=None, keggid=gene_color_dict, show=True)
-    return url
+    return _escape_url(url)
+
+
+def build_pathway_url(target_path: str, gene_color_dict: Optional[Dict[str, str]] = None,
+                      default_color: str = "pink") -> str:
+    """
+    Build the colored KEGG pathway map URL locally, without a bioservices client.
+
+    The URL is the one `bioservices.KEGG.show_pathway` returns for the same arguments,
+    with the '#' of hex colors percent-encoded so KEGG receives them. Colors are not
+    validated here (see `get_url_pathways`).
+    """
+    if target_path.startswith("path:"):
+        target_path = target_path.split(":", 1)[1]
+    parts = [KEGG_SHOW_PATHWAY_URL, target_path]
+    if default_color:
+        parts.append(f"/default%3d{default_color}/")
+    for gene_id, color in (gene_color_dict or {}).items():
+        parts.append(f"/{gene_id}%09{color}/" if "," in color else f"/{gene_id}%09,{color}/")
+    return _escape_url("".join(parts))
+
+
+def get_url_pathways(pathway_colors: Dict[str, Optional[Dict[str, str]]], client=None) -> Dict[str, str]:
+    """
+    Generate the colored KEGG map URLs of many pathways at once.
+
+    Every distinct color string is validated once for all pathways and calls. URLs are
+    built locally by default; with `client`, its `show_pathway` is used without opening
+    a browser.
+
+    Args:
+        pathway_colors (Dict[str, Optional[Dict[str, str]]]): Pathway identifier -> gene
+                                                              color dict (as in `get_url_pathway`).
+        client (Optional[bioservices.KEGG]): Client to reuse instead of the local builder.
+
+    Returns:
+        Dict[str, str]: Pathway identifier -> map URL, in input order.
+
+    Raises:
+        ValueError: If a pathway identifier or a gene color dict is invalid.
+    """
+    if not isinstance(pathway_colors, dict):
+        raise ValueError("pathway_colors must be a dictionary of pathway -> gene color dict.")
+
+    urls = {}
+    for target_path, gene_color_dict in pathway_colors.items():
+        if not target_path or not isinstance(target_path, str):
+            raise ValueError("Every pathway identifier must be a non-empty string.")
+        _check_gene_color_dict(gene_color_dict)
+        if client is None:
+            urls[target_path] = build_pathway_url(target_path, gene_color_dict)
+        else:
+            urls[target_path] = _escape_url(client.show_pathway(target_path, scale=None, keggid=gene_color_dict,
+                                                                show=False))
+    return urls
+
+
+def _fetch_pathway_image(session: requests.Session, url: str, out_file: str) -> str:
+    """Download the rendered image of a map page unless it is already cached."""
+    if os.path.exists(out_file):
+        return out_file
+    response = session.get(url, timeout=60)
+    response.raise_for_status()
+    match = (re.search(r'<img[^>]+src="([^"]+\.png)"[^>]*name="pathwayimage"', response.text)
+             or re.search(r'<img[^>]+src="([^"]*/tmp/[^"]+\.png)"', response.text))
+    if match is None:
+        raise ValueError(f"No pathway image found in {url}")
+    src = match.group(1)
+    image = session.get(src if src.startswith("http") else KEGG_BASE_URL + src, timeout=60)
+    image.raise_for_status()
+
+    tmp_file = out_file + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(image.content)
+    os.replace(tmp_file, out_file)
+    return out_file
+
+
+def fetch_pathway_images(urls: Dict[str, str], image_dir: str = "kegg_maps",
+                         max_workers: int = 4) -> Dict[str, Optional[str]]:
+    """
+    Download the rendered map images of `get_url_pathways` concurrently.
+
+    Images are cached in `image_dir` under the pathway and a hash of its URL, so a map
+    with the same colors is only downloaded once. Failed downloads are reported and
+    mapped to None. Worker threads each use their own `requests.Session`, which is not
+    thread-safe.
+
+    Returns:
+        Dict[str, Optional[str]]: Pathway identifier -> PNG file.
+    """
+    os.makedirs(image_dir, exist_ok=True)
+    files = {path: os.path.join(image_dir, f"{path.replace(':', '_')}_"
+                                           f"{hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]}.png")
+             for path, url in urls.items()}
+
+    thread_sessions = threading.local()
+    sessions: List[requests.Session] = []
+    sessions_lock = threading.Lock()
+
+    def fetch(path: str) -> str:
+        session = getattr(thread_sessions, "session", None)
+        if session is None:
+            session = thread_sessions.session = requests.Session()
+            with sessions_lock:
+                sessions.append(session)
+        return _fetch_pathway_image(session, urls[path], files[path])
+
+    images = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {path: executor.submit(fetch, path) for path in urls}
+            for path, future in futures.items():
+                try:
+                    images[path] = future.result()
+                except Exception as e:
+                    print(f"Map image of pathway {path} not downloaded: {e}")
+                    images[path] = None
+    finally:
+        for session in sessions:
+            session.close()
+    return images
@@ -3,10 +3,19 @@ import gzip
 import shutil
 import requests
 import re
+import sys
+import numpy as np
 import pandas as pd
-from typing import List, Optional
-import seaborn as sns
-import matplotlib.pyplot as plt
+from typing import Dict, List, Optional, Tuple, Union
+from .lazy_import import lazy_import
+from .plot_rendering import new_figure, finish_figure
+from .protein_kmer_index import ProteinKmerIndex, iter_fasta
+from .fasta_index import FastaIndex, decompress_fasta
+from .organism_index import OrganismIndex
+from .enrichment_stats import category_enrichment
+
+# seaborn is only imported when a plot is drawn
+sns = lazy_import("seaborn")
 
 
 class VFDBAnalysis:
@@ -33,7 +42,15 @@ class VFDBAnalysis:
         self.fasta_path = os.path.join(db_dir, "VFDB_setA_pro.fas.gz")
         self.xls_gz_path = os.path.join(db_dir, "VFs.xls.gz")
         self.xls_path = os.path.join(db_dir, "VFs.xls")
+        self.fasta_plain_path = os.path.join(db_dir, "VFDB_setA_pro.fas")
+        self.kmer_index_path = os.path.join(db_dir, "VFDB_setA_pro.kmers.npz")
         self.df_genes: Optional[pd.DataFrame] = None
+        self.kmer_index: Optional[ProteinKmerIndex] = None
+        self.fasta_index: Optional[FastaIndex] = None
+        self.organism_index: Optional[OrganismIndex] = None
+        self._organism_index_frame: Optional[pd.DataFrame] = None
+        self._row_lookups: Dict[str, Dict[str, np.ndarray]] = {}
+        self._row_lookups_frame: Optional[pd.DataFrame] = None
 
         os.makedirs(self.db_dir, exist_ok=True)
 
@@ -144,33 +161,321 @@ class VFDBAnalysis:
         if self.df_genes.empty:
             raise ValueError("The merged DataFrame is empty.")
 
+        before = self.memory_usage()["Total"]
+        self.df_genes = self.compact_genes(self.df_genes)
+        after = self.memory_usage()["Total"]
+        print(f"Gene data: {before / 1024 ** 2:.1f} MB -> {after / 1024 ** 2:.1f} MB after compaction.")
+
         return self.df_genes
 
-    def search_virulence_genes(self, important_genes: List[str], bacteria: str) -> pd.DataFrame:
+    @staticmethod
+    def compact_genes(df: pd.DataFrame, max_unique_ratio: float = 0.5) -> pd.DataFrame:
+        """
+        Reduces the memory footprint of a gene DataFrame.
+
+        Low-cardinality text columns (Bacteria, Functional category, VFID, VF_Name, Function,
+        and usually Description) become categoricals; the remaining text columns have their
+        strings interned so repeated values share one object. Already compact columns are
+        left unchanged, so the function can be applied again to cached frames.
+
+        Args:
+            df (pd.DataFrame): Gene DataFrame, e.g. `df_genes`.
+            max_unique_ratio (float): Columns with at most this ratio of distinct values to
+                                      rows are stored as categoricals.
+        """
+        df = df.copy()
+        for column in df.columns:
+            values = df[column]
+            if isinstance(values.dtype, pd.CategoricalDtype) or not pd.api.types.is_string_dtype(values.dtype):
+                continue
+            if values.nunique(dropna=True) <= max_unique_ratio * len(values):
+                df[column] = values.astype("category")
+            else:
+                df[column] = pd.Series([sys.intern(v) if isinstance(v, str) else v for v in values],
+                                       index=values.index, dtype=object)
+        return df
+
+    def memory_usage(self, df: Optional[pd.DataFrame] = None) -> pd.Series:
+        """
+        Returns the memory used by each column of `df_genes` (or `df`) in bytes, plus a 'Total'.
+
+        Unlike `DataFrame.memory_usage(deep=True)`, a string object shared by several rows
+        (e.g. interned) is counted once.
+        """
+        df = self.df_genes if df is None else df
+        if df is None:
+            raise ValueError("Gene data not loaded. Call load_and_process() first.")
+
+        usage = {}
+        for column in df.columns:
+            values = df[column]
+            if values.dtype == object:
+                unique_objects = {id(v): v for v in values}
+                usage[column] = values.memory_usage(index=False, deep=False) + sum(
+                    sys.getsizeof(v) for v in unique_objects.values())
+            else:
+                usage[column] = values.memory_usage(index=False, deep=True)
+        usage = pd.Series(usage, dtype="int64")
+        usage["Total"] = usage.sum() + df.index.memory_usage(deep=True)
+        return usage
+
+    def get_organism_index(self) -> OrganismIndex:
+        """
+        Returns the organism index of `df_genes`, building it once per loaded DataFrame.
+        """
+        if self.df_genes is None:
+            raise ValueError("Gene data not loaded. Call load_and_process() first.")
+        if self.organism_index is None or self._organism_index_frame is not self.df_genes:
+            self.organism_index = OrganismIndex(self.df_genes["Bacteria"])
+            self._organism_index_frame = self.df_genes
+        return self.organism_index
+
+    def search_virulence_genes(self, important_genes: List[str], bacteria: Union[str, List[str]],
+                               level: str = "taxon") -> pd.DataFrame:
         """
         Filters virulence genes based on gene name and bacterial species.
+
+        Args:
+            important_genes (List[str]): Gene names (case-insensitive).
+            bacteria (Union[str, List[str]]): One or more organisms, e.g. "Listeria" (genus),
+                                              "Listeria monocytogenes" (species) or a full
+                                              strain name. See `OrganismIndex` for matching.
+            level (str): Organism matching level: "taxon", "exact", "prefix", "species" or "genus".
+
+        Returns:
+            pd.DataFrame: Matching genes, in the order of `important_genes`.
         """
         if self.df_genes is None:
             raise ValueError("Gene data not loaded. Call load_and_process() first.")
         if not important_genes or not isinstance(important_genes, list):
             raise ValueError("important_genes must be a non-empty list.")
-        if not isinstance(bacteria, str) or not bacteria.strip():
-            raise ValueError("bacteria must be a non-empty string.")
-
-        df_result = pd.DataFrame()
-        for gene in important_genes:
-            filtered = self.df_genes[
-                (self.df_genes['Bacteria'].str.contains(bacteria, case=False, na=False)) &
-                (self.df_genes['Gene_Name'].str.lower() == gene.lower())
-            ]
-            df_result = pd.concat([df_result, filtered], ignore_index=True)
-        return df_result
-
-    def plot_virulence_factors_percentage(self, df: pd.DataFrame,
+        queries = [bacteria] if isinstance(bacteria, str) else bacteria
+        if not isinstance(queries, list) or not queries or not all(
+                isinstance(b, str) and b.strip() for b in queries):
+            raise ValueError("bacteria must be a non-empty string or list of strings.")
+
+        rows = self.get_organism_index().lookup(queries, level=level)
+        candidates = self.df_genes.iloc[rows]
+
+        # Position of each gene in the query list, to keep the requested order
+        gene_order = {}
+        for position, gene in enumerate(important_genes):
+            gene_order.setdefault(gene.lower(), position)
+        positions = candidates["Gene_Name"].str.lower().map(gene_order)
+        matched = positions.notna().to_numpy()
+        order = np.argsort(positions[matched].to_numpy(), kind="stable")
+        return candidates[matched].iloc[order].reset_index(drop=True)
+
+    def category_enrichment(self, samples: Dict[str, pd.DataFrame], bacteria: Optional[Union[str, List[str]]] = None,
+                            min_count: int = 1) -> pd.DataFrame:
+        """
+        Tests the over-representation of VFDB functional categories in the hits of many samples.
+
+        Args:
+            samples (Dict[str, pd.DataFrame]): Sample names mapped to their virulence genes
+                                               (e.g. from `search_virulence_genes`).
+            bacteria (Optional[Union[str, List[str]]]): If given, the background is restricted
+                                                        to these organisms; otherwise the full VFDB.
+                                                        The sample hits must come from it.
+            min_count (int): Categories with fewer hits in a sample are not tested.
+
+        Returns:
+            pd.DataFrame: Long-format results (see `enrichment_stats.category_enrichment`).
+        """
+        if self.df_genes is None:
+            raise ValueError("Gene data not loaded. Call load_and_process() first.")
+        if not samples:
+            raise ValueError("samples must be a non-empty dictionary.")
+
+        background = self.df_genes
+        if bacteria is not None:
+            background = background.iloc[self.get_organism_index().lookup(bacteria)]
+
+        frames = [df[["Functional category"]].assign(Sample=name) for name, df in samples.items()
+                  if "Functional category" in df.columns]
+        if not frames:
+            raise ValueError("Sample hits must contain a 'Functional category' column.")
+        return category_enrichment(pd.concat(frames, ignore_index=True), background,
+                                   category_col="Functional category", min_count=min_count)
+
+    def load_kmer_index(self, k: int = 5, rebuild: bool = False) -> ProteinKmerIndex:
+        """
+        Loads the k-mer index of the VFDB proteins, building and saving it on first use.
+
+        The index is rebuilt when it is older than the FASTA file or uses another k.
+
+        Args:
+            k (int): k-mer length.
+            rebuild (bool): Force the index to be rebuilt.
+        """
+        if not os.path.exists(self.fasta_path):
+            raise FileNotFoundError(f"FASTA file not found at {self.fasta_path}")
+
+        index = None
+        if (not rebuild and os.path.exists(self.kmer_index_path)
+                and os.path.getmtime(self.kmer_index_path) >= os.path.getmtime(self.fasta_path)):
+            index = ProteinKmerIndex.load(self.kmer_index_path)
+            if index.k != k:
+                index = None
+
+        if index is None:
+            index = ProteinKmerIndex.from_fasta(self.fasta_path, k=k)
+            index.save(self.kmer_index_path)
+
+        self.kmer_index = index
+        return index
+
+    def search_virulence_sequences(self, proteins: Union[str, Dict[str, str], List[Tuple[str, str]]],
+                                   top_n: int = 5, min_shared: int = 2, min_coverage: float = 0.0,
+                                   align: bool = False) -> pd.DataFrame:
+        """
+        Finds candidate virulence factors for protein sequences, independently of gene names.
+
+        Candidates are ranked by the number of k-mers shared with the VFDB proteins and can be
+        confirmed with a local alignment. When `df_genes` is loaded, the VFDB annotation of
+        each hit is added.
+
+        Args:
+            proteins (Union[str, Dict[str, str], List[Tuple[str, str]]]): Path to a protein
+                FASTA file (e.g. a proteome), or query names and sequences.
+            top_n (int): Maximum number of hits per query.
+            min_shared (int): Minimum number of shared k-mers for a hit.
+            min_coverage (float): Minimum fraction of the query k-mers shared with the hit.
+            align (bool): If True, align each hit and add 'Alignment score' and 'Identity'.
+
+        Returns:
+            pd.DataFrame: One row per (query, VFDB protein) hit.
+        """
+        if isinstance(proteins, str):
+            proteins = [(header.split(" ", 1)[0], sequence) for header, sequence in iter_fasta(proteins)]
+        if not proteins:
+            raise ValueError("proteins must be a FASTA file or a non-empty collection of sequences.")
+
+        index = self.kmer_index or self.load_kmer_index()
+        hits = index.search(proteins, top_n=top_n, min_shared=min_shared)
+        hits = hits[hits["Coverage"] >= min_coverage].reset_index(drop=True)
+        if align:
+            hits = index.align_hits(hits, proteins)
+
+        # FASTA records and df_genes rows share the same order
+        if self.df_genes is not None and len(self.df_genes) == len(index):
+            annotation = self.df_genes.iloc[hits["Row"].to_numpy()].reset_index(drop=True)
+            hits = pd.concat([hits, annotation], axis=1)
+        return hits
+
+    def load_fasta_index(self) -> FastaIndex:
+        """
+        Opens the offset index of the VFDB proteins for random access to sequences.
+
+        The FASTA file is decompressed and indexed (`.fai` and `.hdr`) once; the files are
+        reused while they are newer than the downloaded file.
+        """
+        plain_path = decompress_fasta(self.fasta_path, self.fasta_plain_path)
+        if self.fasta_index is not None:
+            self.fasta_index.close()
+        self.fasta_index = FastaIndex(plain_path)
+        return self.fasta_index
+
+    def _rows_for(self, column: str, values: List[str]) -> List[int]:
+        """
+        Returns the df_genes rows (FASTA record numbers) whose `column` is in `values`.
+
+        The value -> rows lookup of a column is built once per loaded DataFrame, so each
+        value costs one dict access instead of a scan of df_genes. Gene names are matched
+        case-insensitively.
+        """
+        if self.df_genes is None:
+            raise ValueError("Gene data not loaded. Call load_and_process() first.")
+        if self._row_lookups_frame is not self.df_genes:
+            self._row_lookups = {}
+            self._row_lookups_frame = self.df_genes
+        lookup = self._row_lookups.get(column)
+        if lookup is None:
+            keys = self.df_genes[column].astype(str)
+            if column == "Gene_Name":
+                keys = keys.str.lower()
+            lookup = self._row_lookups[column] = keys.groupby(keys.to_numpy(), sort=False).indices
+        if column == "Gene_Name":
+            values = [v.lower() for v in values]
+        found = [lookup[v] for v in dict.fromkeys(values) if v in lookup]
+        return np.sort(np.concatenate(found)).tolist() if found else []
+
+    def _fasta_index_for_genes(self) -> FastaIndex:
+        """
+        Returns the FASTA index, checking that its records match the df_genes rows.
+
+        Raises:
+            ValueError: If df_genes and the FASTA file have different numbers of records.
+        """
+        index = self.fasta_index or self.load_fasta_index()
+        if len(self.df_genes) != len(index):
+            raise ValueError(f"df_genes has {len(self.df_genes)} rows but {index.fasta_path} has "
+                             f"{len(index)} records; reload both from the same VFDB release.")
+        return index
+
+    def get_sequences(self, rows: Optional[List[int]] = None, vfids: Optional[List[str]] = None,
+                      genes: Optional[List[str]] = None) -> Dict[str, str]:
+        """
+        Fetches VFDB protein sequences by record row, VFID or gene name.
+
+        Lookups by VFID or gene name use `df_genes`, whose rows follow the FASTA records.
+
+        Returns:
+            Dict[str, str]: Record names (e.g. 'VFG037176(gb|WP_001081735)') and sequences.
+        """
+        selected = list(rows or [])
+        if vfids:
+            selected += self._rows_for("VFID", vfids)
+        if genes:
+            selected += self._rows_for("Gene_Name", genes)
+
+        index = self._fasta_index_for_genes() if vfids or genes else (self.fasta_index or self.load_fasta_index())
+        return {index.names[row]: index.sequence(row) for row in dict.fromkeys(selected)}
+
+    def export_hits_fasta(self, hits: pd.DataFrame, out_path: str) -> int:
+        """
+        Writes the VFDB protein sequences of search hits to a FASTA file.
+
+        Hits with a 'Row' column (from `search_virulence_sequences`) are exported directly;
+        otherwise they are matched to df_genes by gene name, VFID and bacteria.
+
+        Returns:
+            int: Number of sequences written.
+        """
+        if "Row" in hits.columns:
+            rows = hits["Row"].astype(int).tolist()
+            index = self.fasta_index or self.load_fasta_index()
+        else:
+            if self.df_genes is None:
+                raise ValueError("Gene data not loaded. Call load_and_process() first.")
+            keys = [c for c in ("Gene_Name", "VFID", "Bacteria") if c in hits.columns]
+            if not keys:
+                raise ValueError("hits must contain a 'Row' column or Gene_Name/VFID/Bacteria columns.")
+            mask = pd.MultiIndex.from_frame(self.df_genes[keys]).isin(pd.MultiIndex.from_frame(hits[keys]))
+            rows = np.flatnonzero(mask).tolist()
+            index = self._fasta_index_for_genes()
+
+        return index.write_fasta(dict.fromkeys(rows), out_path)
+
+    @staticmethod
+    def plot_virulence_factors_percentage(df: pd.DataFrame,
                                           bacteria_name: str,
-                                          show_all_categories: bool = True) -> None:
+                                          show_all_categories: bool = True,
+                                          headless: bool = False,
+                                          save_path: Optional[str] = None):
         """
         Plots the percentage distribution of virulence factor categories.
+
+        Args:
+            df (pd.DataFrame): Virulence genes with a 'Functional category' column.
+            bacteria_name (str): Name used in the plot title.
+            show_all_categories (bool): If False, categories with 0% are hidden.
+            headless (bool): If True, draw on a standalone Agg figure and return it instead of
+                             calling `plt.show()` (safe for batch jobs and worker threads).
+            save_path (Optional[str]): If provided, the figure is saved to this path.
+
+        Returns:
+            Optional[Figure]: The figure in headless mode, otherwise None.
         """
         if df is None or df.empty:
             raise ValueError("DataFrame cannot be empty.")
@@ -194,12 +499,13 @@ class VFDBAnalysis:
         if not show_all_categories:
             freq = freq[freq["Percentage"] > 0].reset_index(drop=True)
 
-        plt.figure(figsize=(14, 6))
-        ax = sns.barplot(data=freq, x="Functional category", y="Percentage", palette="tab20")
-        plt.title(f"Relative Frequency of Virulence Factors - {bacteria_name}")
-        plt.xticks(rotation=45, ha='right')
-        plt.ylim(0, max(freq["Percentage"].max() + 5, 10))
-        plt.tight_layout()
+        fig, ax = new_figure(figsize=(14, 6), headless=headless)
+        sns.barplot(data=freq, x="Functional category", y="Percentage", palette="tab20", ax=ax)
+        ax.set_title(f"Relative Frequency of Virulence Factors - {bacteria_name}")
+        ax.tick_params(axis='x', labelrotation=45)
+        for label in ax.get_xticklabels():
+            label.set_horizontalalignment('right')
+        ax.set_ylim(0, max(freq["Percentage"].max() + 5, 10))
 
         for p in ax.patches:
             height = p.get_height()
@@ -207,4 +513,5 @@ class VFDBAnalysis:
                         (p.get_x() + p.get_width() / 2., height / 2 if height > 0 else 0.5),
                         ha='center', va='center', fontsize=9,
                         color='white' if height > 0 else 'black', fontweight='bold')
-        plt.show()
\ No newline at end of file
+
+        return finish_figure(fig, save_path=save_path, headless=headless)
@@ -0,0 +1,345 @@
+import os
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+import pandas as pd
+
+# Relationships that place a term below another one in the hierarchy
+HIERARCHY_RELATIONS = ("is_a", "part_of")
+
+# Roots of the ARO branches used for the roll-ups
+MECHANISM_ROOT = "ARO:1000002"    # mechanism of antibiotic resistance
+GENE_FAMILY_ROOT = "ARO:3000367"  # AMR Gene Family
+
+ROLLUP_COLUMNS = {
+    "drug_class": "Drug Class",
+    "mechanism": "Resistance Mechanism",
+    "gene_family": "AMR Gene Family",
+}
+
+
+class AROOntology:
+    """
+    In-memory index of the CARD Antibiotic Resistance Ontology (`aro.obo`).
+
+    `CARDAnalysis.find_gene_ids` re-reads the whole OBO file for every gene. This class
+    parses the file once and indexes every term name and synonym (case-insensitive), so
+    a gene list can be annotated with one dictionary lookup per gene. It is meant to be
+    loaded once and shared, e.g. by every sample handled by a pipeline worker.
+
+    The full relationship graph is parsed as well. The transitive closure of the `is_a` /
+    `part_of` hierarchy is stored as one ancestor bitset per term, and drug classes,
+    resistance mechanisms and AMR gene families are rolled up over the closure when the
+    ontology is loaded, so these queries are dictionary lookups per gene.
+
+    Attributes:
+        obo_file (str): Path to the parsed OBO file.
+        terms (List[dict]): Parsed terms, in file order.
+        name_index (Dict[str, dict]): Lower-cased names and synonyms mapped to their ARG record.
+        term_names (Dict[str, str]): ARO ID of every term mapped to its name.
+        parents (Dict[str, List[str]]): ARO ID mapped to its direct `is_a`/`part_of` parents.
+        relations (Dict[str, List[Tuple[str, str]]]): ARO ID mapped to its other
+                                                      (relationship, target ID) pairs.
+    """
+
+    def __init__(self, obo_file: str = "aro.obo"):
+        if not os.path.exists(obo_file):
+            raise FileNotFoundError(f"File not found: {obo_file}")
+
+        self.obo_file = obo_file
+        self.terms: List[dict] = []
+        self.name_index: Dict[str, dict] = {}
+        self.term_names: Dict[str, str] = {}
+        self.parents: Dict[str, List[str]] = {}
+        self.relations: Dict[str, List[Tuple[str, str]]] = {}
+        self._parse(obo_file)
+        self._build_closure()
+
+    def _parse(self, obo_file: str) -> None:
+        """Parse the OBO file once, mirroring the matching rules of `CARDAnalysis.find_gene_ids`."""
+        current_id = None
+        current_name = None
+        current_description = None
+        current_antibiotics = []
+        current_synonyms = []
+
+        # Graph of the current stanza; only [Term] stanzas are added to the graph
+        stanza_type = None
+        stanza_id = None
+
+        with open(obo_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+
+                if line.startswith("["):
+                    stanza_type, stanza_id = line, None
+                elif stanza_type == "[Term]":
+                    stanza_id = self._parse_graph_line(line, stanza_id)
+
+                if line.startswith("id: ARO:"):
+                    current_id = line.split(": ")[1]
+
+                elif line.startswith("name: "):
+                    current_name = line.split(": ", 1)[1]
+                    current_synonyms = []
+
+                elif line.startswith("synonym: "):
+                    match = re.search(r'^synonym: "([^"]+)"', line)
+                    if match:
+                        current_synonyms.extend(s.strip() for s in match.group(1).split(","))
+
+                elif line.startswith("def: "):
+                    current_description = line.split(": ", 1)[1] if ": " in line else ""
+
+                elif line.startswith("relationship: confers_resistance_to_antibiotic"):
+                    current_antibiotics.append(line.split(": ")[1].split("! ")[-1])
+
+                elif line == "[Term]" and current_name:
+                    self._add_term(current_id, current_name, current_description,
+                                   current_antibiotics, current_synonyms)
+
+                    # Reset
+                    current_id = None
+                    current_name = None
+                    current_description = None
+                    current_antibiotics = []
+                    current_synonyms = []
+
+    def _parse_graph_line(self, line: str, term_id: Optional[str]) -> Optional[str]:
+        """Record the name, hierarchy and relationships of a [Term] stanza line."""
+        if line.startswith("id: "):
+            term_id = line[4:].strip()
+            self.parents.setdefault(term_id, [])
+            self.relations.setdefault(term_id, [])
+        elif term_id is None:
+            return term_id
+        elif line.startswith("name: "):
+            self.term_names[term_id] = line[6:].strip()
+        elif line.startswith("is_a: "):
+            self.parents[term_id].append(line[6:].split("!")[0].split()[0])
+        elif line.startswith("relationship: "):
+            fields = line[14:].split("!")[0].split()
+            if len(fields) >= 2:
+                relation, target = fields[0], fields[1]
+                if relation in HIERARCHY_RELATIONS:
+                    self.parents[term_id].append(target)
+                else:
+                    self.relations[term_id].append((relation, target))
+        return term_id
+
+    def _build_closure(self) -> None:
+        """
+        Precompute ancestor bitsets and the drug class / mechanism / gene family roll-ups.
+        """
+        self.term_ids: List[str] = list(self.parents)
+        self._index: Dict[str, int] = {t: i for i, t in enumerate(self.term_ids)}
+        # Lower-cased term names (e.g. antibiotics) mapped to their ARO ID; the first term wins
+        self._term_ids_by_name: Dict[str, str] = {}
+        for term, name in self.term_names.items():
+            self._term_ids_by_name.setdefault(name.lower(), term)
+
+        # Parents first (iterative post-order DFS, so deep hierarchies cannot hit the recursion limit)
+        order, state = [], {}
+        for root in self.term_ids:
+            if root in state:
+                continue
+            stack = [(root, iter(self.parents[root]))]
+            state[root] = 0
+            while stack:
+                term, pending = stack[-1]
+                parent = next(pending, None)
+                if parent is None:
+                    stack.pop()
+                    state[term] = 1
+                    order.append(term)
+                elif parent in self.parents and parent not in state:
+                    state[parent] = 0
+                    stack.append((parent, iter(self.parents[parent])))
+
+        # Bit i of _ancestors[t] is set if term i is t itself or one of its ancestors
+        self._ancestors: List[int] = [0] * len(self.term_ids)
+        for term in order:
+            i = self._index[term]
+            bits = 1 << i
+            for parent in self.parents[term]:
+                if parent in self._index:
+                    bits |= self._ancestors[self._index[parent]]
+            self._ancestors[i] = bits
+
+        # Terms used as the target of a drug class relationship anywhere in the ontology
+        drug_class_ids = {target for rels in self.relations.values()
+                          for relation, target in rels if relation == "confers_resistance_to_drug_class"}
+        drug_class_mask = self._drug_class_mask = self._mask(drug_class_ids)
+        mechanism_mask = self._descendant_mask(MECHANISM_ROOT)
+        # Gene families are the direct children of the "AMR Gene Family" term
+        family_mask = self._family_mask = self._mask(
+            t for t, parents in self.parents.items() if GENE_FAMILY_ROOT in parents)
+
+        own_drug_bits = [0] * len(self.term_ids)
+        own_mechanism_bits = [0] * len(self.term_ids)
+        for term, rels in self.relations.items():
+            i = self._index[term]
+            for relation, target in rels:
+                if target not in self._index:
+                    continue
+                if relation == "confers_resistance_to_drug_class":
+                    own_drug_bits[i] |= 1 << self._index[target]
+                elif relation == "confers_resistance_to_antibiotic":
+                    # Drug classes of an antibiotic are its ancestors used as drug classes
+                    own_drug_bits[i] |= self._ancestors[self._index[target]] & drug_class_mask
+                elif relation == "participates_in":
+                    own_mechanism_bits[i] |= 1 << self._index[target]
+        if MECHANISM_ROOT in self._index:
+            own_mechanism_bits = [bits & mechanism_mask for bits in own_mechanism_bits]
+
+        # Roll the direct annotations up over each term's ancestors
+        self._drug_classes: Dict[str, FrozenSet[str]] = {}
+        self._mechanisms: Dict[str, FrozenSet[str]] = {}
+        self._gene_families: Dict[str, FrozenSet[str]] = {}
+        drug_bits = [0] * len(self.term_ids)
+        mechanism_bits = [0] * len(self.term_ids)
+        for term in order:
+            i = self._index[term]
+            drug_bits[i] = own_drug_bits[i]
+            mechanism_bits[i] = own_mechanism_bits[i]
+            for parent in self.parents[term]:
+                if parent in self._index:
+                    drug_bits[i] |= drug_bits[self._index[parent]]
+                    mechanism_bits[i] |= mechanism_bits[self._index[parent]]
+            self._drug_classes[term] = self._names(drug_bits[i])
+            self._mechanisms[term] = self._names(mechanism_bits[i])
+            self._gene_families[term] = self._names(self._ancestors[i] & family_mask)
+
+    def _mask(self, term_ids: Iterable[str]) -> int:
+        """Bitset of the given terms."""
+        bits = 0
+        for term in term_ids:
+            if term in self._index:
+                bits |= 1 << self._index[term]
+        return bits
+
+    def _descendant_mask(self, root: str) -> int:
+        """Bitset of `root` and all its descendants (0 if `root` is not in the ontology)."""
+        if root not in self._index:
+            return 0
+        root_bit = 1 << self._index[root]
+        return self._mask(t for i, t in enumerate(self.term_ids) if self._ancestors[i] & root_bit)
+
+    def _names(self, bits: int) -> FrozenSet[str]:
+        """Names of the terms in a bitset."""
+        names = []
+        while bits:
+            low = bits & -bits
+            term = self.term_ids[low.bit_length() - 1]
+            names.append(self.term_names.get(term, term))
+            bits ^= low
+        return frozenset(names)
+
+    def is_a(self, term_id: str, ancestor_id: str) -> bool:
+        """Return True if `ancestor_id` is `term_id` or one of its `is_a`/`part_of` ancestors."""
+        if term_id not in self._index or ancestor_id not in self._index:
+            return False
+        return bool(self._ancestors[self._index[term_id]] >> self._index[ancestor_id] & 1)
+
+    def ancestors(self, term_id: str) -> List[str]:
+        """Return the ARO IDs of every ancestor of a term (excluding the term itself)."""
+        if term_id not in self._index:
+            raise KeyError(f"Term '{term_id}' not found in the ontology.")
+        bits = self._ancestors[self._index[term_id]] & ~(1 << self._index[term_id])
+        ancestors = []
+        while bits:
+            low = bits & -bits
+            ancestors.append(self.term_ids[low.bit_length() - 1])
+            bits ^= low
+        return ancestors
+
+    def drug_classes(self, term_id: str) -> FrozenSet[str]:
+        """Drug classes a term (or any of its ancestors) confers resistance to."""
+        return self._drug_classes.get(term_id, frozenset())
+
+    def resistance_mechanisms(self, term_id: str) -> FrozenSet[str]:
+        """Resistance mechanisms a term (or any of its ancestors) participates in."""
+        return self._mechanisms.get(term_id, frozenset())
+
+    def gene_families(self, term_id: str) -> FrozenSet[str]:
+        """AMR gene families a term belongs to."""
+        return self._gene_families.get(term_id, frozenset())
+
+    def is_gene_family(self, term_id: str) -> bool:
+        """Return True if a term is an AMR gene family (a direct child of "AMR Gene Family")."""
+        return term_id in self._index and bool(self._family_mask >> self._index[term_id] & 1)
+
+    def antibiotic_drug_classes(self, antibiotics: Iterable[str]) -> FrozenSet[str]:
+        """
+        Drug classes of antibiotics given by name (case-insensitive), as rolled up for the
+        `confers_resistance_to_antibiotic` relationships. Unknown names are ignored.
+        """
+        terms = (self._term_ids_by_name.get(name.strip().lower()) for name in antibiotics)
+        bits = 0
+        for term in terms:
+            if term in self._index:
+                bits |= self._ancestors[self._index[term]] & self._drug_class_mask
+        return self._names(bits)
+
+    def rollup(self, term_id: str, kind: str) -> FrozenSet[str]:
+        """
+        Return the roll-up of a term for `kind` ("drug_class", "mechanism" or "gene_family").
+        """
+        if kind == "drug_class":
+            return self.drug_classes(term_id)
+        if kind == "mechanism":
+            return self.resistance_mechanisms(term_id)
+        if kind == "gene_family":
+            return self.gene_families(term_id)
+        raise ValueError(f"Invalid roll-up '{kind}'. Use one of {list(ROLLUP_COLUMNS)}.")
+
+    def _add_term(self, term_id: Optional[str], name: str, description: Optional[str],
+                  antibiotics: List[str], synonyms: List[str]) -> None:
+        """Store a term and index its name and synonyms (the first term using a name wins)."""
+        self.terms.append({
+            "id": term_id,
+            "name": name,
+            "description": description,
+            "antibiotics": list(antibiotics),
+            "synonyms": list(synonyms)
+        })
+
+        for matched_name in [name] + synonyms:
+            key = matched_name.lower()
+            if key in self.name_index:
+                continue
+            self.name_index[key] = {
+                "Gene Name": name,
+                "Matched Name": matched_name,
+                "Gene ID": term_id,
+                "Description": description or " ",
+                "Antibiotics": ", ".join(antibiotics) if antibiotics else pd.NA,
+                "All Synonyms": ", ".join(synonyms) if synonyms else pd.NA
+            }
+
+    def lookup(self, gene_name: str) -> Optional[dict]:
+        """
+        Return the ARG record for a gene name or synonym, or None if it is not in the ontology.
+
+        The record has the same keys as `CARDAnalysis.find_gene_ids`.
+        """
+        record = self.name_index.get(gene_name.lower())
+        return dict(record) if record is not None else None
+
+    def annotate(self, genes_list: Iterable[str]) -> Tuple[List[dict], List[str]]:
+        """
+        Split a gene list into ARG records and genes with no match in the ontology.
+
+        Returns:
+            Tuple[List[dict], List[str]]: Matched ARG records and unmatched gene names.
+        """
+        found, not_found = [], []
+        for gene in genes_list:
+            record = self.lookup(gene)
+            if record is not None:
+                found.append(record)
+            else:
+                not_found.append(gene)
+        return found, not_found
+
+    def __len__(self) -> int:
+        return len(self.terms)
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import tempfile
+from io import StringIO
+from typing import Any, Callable, Dict, Optional, Tuple
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+FRAME_SUFFIX = ".parquet" if HAS_PARQUET else ".frame.json"
+JSON_SUFFIX = ".json"
+
+# Checksums of database files, keyed by (path, size, mtime) so unchanged files are hashed once
+_CHECKSUMS: Dict[Tuple[str, int, int], str] = {}
+
+# Returned by `ArtifactCache._load` on a miss, so a stored None is still a hit
+_MISSING = object()
+
+
+def file_checksum(path: str) -> str:
+    """
+    Return the SHA-256 checksum of a file (e.g. a database version such as `aro.obo`).
+
+    The checksum is memoized per file size and modification time.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"File not found: {path}")
+
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _CHECKSUMS:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(block)
+        _CHECKSUMS[key] = sha.hexdigest()
+    return _CHECKSUMS[key]
+
+
+class ArtifactCache:
+    """
+    Content-addressed cache for the outputs of pipeline stages.
+
+    Each artifact is stored under `<cache_dir>/<stage>/<key>` where the key is a hash of
+    the stage inputs (gene list, database checksum, cutoff, background, ...). DataFrames
+    are stored as Parquet (JSON when pyarrow is not installed) and other values as JSON.
+    When the total size exceeds `max_size_bytes`, the least recently used artifacts are
+    removed. The size is tracked as a running total updated by every write, so the cache
+    directory is only walked on the first write and when the total crosses the limit
+    (artifacts written by other processes are counted at that point).
+
+    Attributes:
+        cache_dir (str): Root directory of the cache.
+        max_size_bytes (int): Size limit of the cache directory.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups that had to be computed.
+    """
+
+    def __init__(self, cache_dir: str, max_size_bytes: int = 2 * 1024 ** 3):
+        if not isinstance(cache_dir, str) or not cache_dir.strip():
+            raise ValueError("cache_dir must be a non-empty string.")
+        if not isinstance(max_size_bytes, int) or max_size_bytes <= 0:
+            raise ValueError("max_size_bytes must be a positive integer.")
+
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size_estimate: Optional[int] = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(**inputs: Any) -> str:
+        """
+        Hash stage inputs into a cache key.
+
+        Inputs must be JSON-serializable; sets are sorted so their order does not matter.
+        """
+        def normalize(value):
+            if isinstance(value, (set, frozenset)):
+                return sorted(value)
+            raise TypeError(f"Cache input of type {type(value).__name__} is not hashable as JSON.")
+
+        payload = json.dumps(inputs, sort_keys=True, separators=(",", ":"), default=normalize)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, stage: str, key: str, suffix: str) -> str:
+        """Return the file path of an artifact."""
+        return os.path.join(self.cache_dir, stage, key + suffix)
+
+    def _find(self, stage: str, key: str) -> Optional[str]:
+        """Return the path of a stored artifact, or None if it is not cached."""
+        for suffix in (FRAME_SUFFIX, JSON_SUFFIX):
+            path = self._path(stage, key, suffix)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def get(self, stage: str, key: str) -> Optional[Any]:
+        """
+        Load an artifact, or return None if it is not cached.
+        """
+        value = self._load(stage, key)
+        return None if value is _MISSING else value
+
+    def _load(self, stage: str, key: str) -> Any:
+        """Load an artifact, or return `_MISSING` if it is not cached."""
+        path = self._find(stage, key)
+        if path is None:
+            return _MISSING
+
+        try:
+            if path.endswith(".parquet"):
+                value = pd.read_parquet(path)
+            elif path.endswith(".frame.json"):
+                with open(path, "r", encoding="utf-8") as f:
+                    value = pd.read_json(StringIO(f.read()), orient="table")
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)
+        except (OSError, ValueError):
+            # Artifact removed or truncated by a concurrent writer/eviction: recompute
+            return _MISSING
+
+        # Mark as recently used for LRU eviction
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            pass
+        return value
+
+    def put(self, stage: str, key: str, value: Any) -> Any:
+        """
+        Store an artifact atomically and evict old artifacts if the running size total
+        exceeds `max_size_bytes`.
+
+        Returns:
+            Any: The stored value.
+        """
+        is_frame = isinstance(value, pd.DataFrame)
+        path = self._path(stage, key, FRAME_SUFFIX if is_frame else JSON_SUFFIX)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        if self._size_estimate is None:
+            self._size_estimate = self.total_size()
+        try:
+            replaced_size = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced_size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(fd)
+        try:
+            if is_frame and HAS_PARQUET:
+                value.to_parquet(tmp_path)
+            elif is_frame:
+                value.to_json(tmp_path, orient="table")
+            else:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(value, f)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self._size_estimate += size - replaced_size
+        if self._size_estimate > self.max_size_bytes:
+            self.evict()
+        return value
+
+    def cached(self, stage: str, inputs: Dict[str, Any], compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached output of `stage` for `inputs`, computing and storing it on a miss.
+
+        Args:
+            stage (str): Stage name (e.g. "card", "vfdb_merge", "enrichment").
+            inputs (Dict[str, Any]): Everything the stage output depends on.
+            compute (Callable[[], Any]): Function producing the output on a cache miss.
+        """
+        key = self.make_key(**inputs)
+        value = self._load(stage, key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        return self.put(stage, key, compute())
+
+    def _artifacts(self):
+        """List (mtime, size, path) of every stored artifact."""
+        artifacts = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                artifacts.append((stat.st_mtime_ns, stat.st_size, path))
+        return artifacts
+
+    def total_size(self) -> int:
+        """Return the total size in bytes of the stored artifacts."""
+        return sum(size for _, size, _ in self._artifacts())
+
+    def evict(self) -> int:
+        """
+        Remove least recently used artifacts until the cache fits in `max_size_bytes`.
+
+        Returns:
+            int: Number of artifacts removed.
+        """
+        artifacts = sorted(self._artifacts())
+        total = sum(size for _, size, _ in artifacts)
+        removed = 0
+        for _, size, path in artifacts:
+            if total <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        self._size_estimate = total
+        return removed
+
+    def clear(self) -> None:
+        """Remove every artifact from the cache."""
+        for _, _, path in self._artifacts():
+            os.remove(path)
+        self._size_estimate = 0
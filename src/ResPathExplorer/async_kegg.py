@@ -0,0 +1,293 @@
+import asyncio
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import requests
+
+from .KeggAnalysis import KeggAnalysis
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+KEGG_REST_URL = "https://rest.kegg.jp"
+MAX_GET_IDS = 10
+MAX_CACHED_RESPONSES = 512
+
+# Responses shared by every client of the process, keyed by full URL
+# (e.g. "https://rest.kegg.jp/list/pathway/eco"), least recently used first
+_RESPONSE_CACHE: Dict[str, str] = {}
+
+
+def _entry_key(kegg_id: str) -> str:
+    """Key matching a requested ID to the ENTRY line of its flat file ('path:eco00010' -> 'eco00010')."""
+    return kegg_id.split(":")[-1].lower()
+
+
+def split_entries(text: str) -> Dict[str, str]:
+    """Split a batched KEGG flat-file response into its entries, keyed by `_entry_key` of their ENTRY."""
+    entries = {}
+    for entry in text.split("///"):
+        match = re.search(r"^ENTRY\s+(\S+)", entry, re.MULTILINE)
+        if match:
+            entries[_entry_key(match.group(1))] = entry.strip("\n") + "\n///\n"
+    return entries
+
+
+class AsyncKeggClient:
+    """
+    Non-blocking client of the KEGG REST API for asyncio applications.
+
+    Requests go through aiohttp when it is installed; otherwise the blocking `requests`
+    calls run in the default executor, so the event loop is never blocked. A semaphore
+    bounds the number of requests in flight, identical concurrent requests share one
+    download, and responses are kept in a cache shared by all clients of the process.
+    The cache keeps the `max_cached` most recently used responses. Executor threads
+    each use their own `requests.Session`, which is not thread-safe.
+
+    Attributes:
+        base_url (str): KEGG REST endpoint.
+        semaphore (asyncio.Semaphore): Limits the concurrent requests.
+        cache (Dict[str, str]): Responses keyed by full URL, least recently used first.
+        max_cached (int): Maximum number of responses kept in `cache`.
+        timeout (float): Timeout of every request, in seconds.
+    """
+
+    def __init__(self, max_concurrency: int = 3, cache: Optional[Dict[str, str]] = None,
+                 base_url: str = KEGG_REST_URL, timeout: float = 30.0,
+                 max_cached: int = MAX_CACHED_RESPONSES):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be a positive integer.")
+        if max_cached < 1:
+            raise ValueError("max_cached must be a positive integer.")
+        self.base_url = base_url.rstrip("/")
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.cache = _RESPONSE_CACHE if cache is None else cache
+        self.max_cached = max_cached
+        self.timeout = timeout
+        self._pending: Dict[str, "asyncio.Future"] = {}
+        self._session = None
+        self._thread_sessions = threading.local()
+        self._blocking_sessions: List[requests.Session] = []
+        self._sessions_lock = threading.Lock()
+
+    async def __aenter__(self) -> "AsyncKeggClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the HTTP sessions of the client."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        with self._sessions_lock:
+            sessions, self._blocking_sessions = self._blocking_sessions, []
+            self._thread_sessions = threading.local()
+        for session in sessions:
+            session.close()
+
+    def _blocking_session(self) -> requests.Session:
+        """The `requests.Session` of the calling executor thread, created on first use."""
+        session = getattr(self._thread_sessions, "session", None)
+        if session is None:
+            session = self._thread_sessions.session = requests.Session()
+            with self._sessions_lock:
+                self._blocking_sessions.append(session)
+        return session
+
+    async def _fetch(self, path: str) -> str:
+        """Download one REST path; KEGG answers 404 when nothing matches, returned as ''."""
+        url = f"{self.base_url}/{path}"
+        if HAS_AIOHTTP:
+            if self._session is None:
+                self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+            async with self._session.get(url) as response:
+                if response.status == 404:
+                    return ""
+                response.raise_for_status()
+                return await response.text()
+
+        def fetch() -> str:
+            response = self._blocking_session().get(url, timeout=self.timeout)
+            if response.status_code == 404:
+                return ""
+            response.raise_for_status()
+            return response.text
+
+        return await asyncio.get_running_loop().run_in_executor(None, fetch)
+
+    async def _download(self, path: str) -> str:
+        async with self.semaphore:
+            text = await self._fetch(path)
+        key = f"{self.base_url}/{path}"
+        self.cache.pop(key, None)
+        self.cache[key] = text
+        while len(self.cache) > self.max_cached:
+            self.cache.pop(next(iter(self.cache)), None)
+        return text
+
+    async def request(self, path: str) -> str:
+        """
+        Return the response of a REST path (e.g. "list/organism"), from the cache if possible.
+        """
+        key = f"{self.base_url}/{path}"
+        if key in self.cache:
+            # Move the response to the most recently used end
+            text = self.cache[key] = self.cache.pop(key)
+            return text
+        future = self._pending.get(path)
+        if future is None:
+            future = asyncio.ensure_future(self._download(path))
+            self._pending[path] = future
+            future.add_done_callback(lambda _: self._pending.pop(path, None))
+        return await asyncio.shield(future)
+
+    async def list(self, database: str, organism: Optional[str] = None) -> List[List[str]]:
+        """
+        Entries of a KEGG database (e.g. `list("organism")`, `list("pathway", "eco")`).
+
+        Returns:
+            List[List[str]]: The tab-separated fields of every line.
+        """
+        path = f"list/{database}" + (f"/{organism}" if organism else "")
+        text = await self.request(path)
+        return [line.split("\t") for line in text.splitlines() if line.strip()]
+
+    async def get(self, kegg_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        Flat-file entries of KEGG IDs, requested in batches of `MAX_GET_IDS`.
+
+        Returns:
+            Dict[str, str]: The entry of every ID found; missing IDs are left out.
+        """
+        ids = list(dict.fromkeys(kegg_ids))
+        batches = [ids[i:i + MAX_GET_IDS] for i in range(0, len(ids), MAX_GET_IDS)]
+        texts = await asyncio.gather(*(self.request("get/" + "+".join(batch)) for batch in batches))
+
+        entries = {}
+        for batch, text in zip(batches, texts):
+            found = split_entries(text)
+            for kegg_id in batch:
+                entry = found.get(_entry_key(kegg_id))
+                if entry is not None:
+                    entries[kegg_id] = entry
+        return entries
+
+    async def find(self, database: str, query: str) -> List[List[str]]:
+        """Entries of a KEGG database matching a keyword (e.g. `find("genes", "dnaA")`)."""
+        text = await self.request(f"find/{database}/{query}")
+        return [line.split("\t") for line in text.splitlines() if line.strip()]
+
+    async def link(self, target: str, source: str) -> List[Tuple[str, str]]:
+        """
+        Cross-references between databases (e.g. `link("pathway", "eco")`).
+
+        Returns:
+            List[Tuple[str, str]]: (source ID, target ID) pairs.
+        """
+        text = await self.request(f"link/{target}/{source}")
+        return [tuple(line.split("\t")[:2]) for line in text.splitlines() if "\t" in line]
+
+    async def kgml(self, pathway_id: str) -> str:
+        """KGML of a pathway (KEGG does not batch this option)."""
+        text = await self.request(f"get/{pathway_id}/kgml")
+        if not text:
+            raise ValueError(f"Failed to get KGML for {pathway_id}")
+        return text
+
+
+async def organism_code(client: AsyncKeggClient, organism_name: str) -> str:
+    """KEGG code of an organism name (see `KeggAnalysis._get_organism_prefix`)."""
+    for entry in await client.list("organism"):
+        if len(entry) > 2 and organism_name.lower() in entry[2].lower():
+            return entry[1]
+    raise ValueError(f"Organism name '{organism_name}' not found in KEGG database.")
+
+
+async def organism_name(client: AsyncKeggClient, org_code: str) -> str:
+    """Full organism name of a KEGG code (see `KeggAnalysis._get_organism_name`)."""
+    for entry in await client.list("organism"):
+        if len(entry) > 2 and org_code.lower() == entry[1].lower():
+            return entry[2]
+    raise ValueError(f"Organism code '{org_code}' not found in KEGG database.")
+
+
+async def pathway_names(client: AsyncKeggClient, pathway_ids: Iterable[str]) -> Dict[str, str]:
+    """Names of pathways, fetched in batches (see `KeggAnalysis.get_pathway_name`)."""
+    names = {}
+    for pathway_id, entry in (await client.get(pathway_ids)).items():
+        match = re.search(r"^NAME\s+(.+)", entry, re.MULTILINE)
+        if match:
+            names[pathway_id] = match.group(1).strip()
+    return names
+
+
+async def gene_symbols(client: AsyncKeggClient, kegg_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+    """
+    Gene symbols of KEGG gene IDs, fetched in batches (see `get_gene_name_by_kegg_id`).
+
+    IDs without a SYMBOL line, or not found, map to None.
+    """
+    kegg_ids = list(kegg_ids)
+    for kegg_id in kegg_ids:
+        if not isinstance(kegg_id, str) or ":" not in kegg_id:
+            raise ValueError(f"'{kegg_id}' is not a valid KEGG gene ID (expected format: 'eco:b0002').")
+    entries = await client.get(kegg_ids)
+    symbols = {}
+    for kegg_id in kegg_ids:
+        match = re.search(r"^SYMBOL\s+(.+)", entries.get(kegg_id, ""), re.MULTILINE)
+        symbols[kegg_id] = match.group(1).strip() if match else None
+    return symbols
+
+
+async def search_gene_ids(client: AsyncKeggClient, gene_names: Iterable[str],
+                          org_code: str) -> Dict[str, Optional[str]]:
+    """
+    KEGG gene IDs of gene names in an organism, searched concurrently (see `search_gene_id_kegg`).
+    """
+    gene_names = list(dict.fromkeys(gene_names))
+    results = await asyncio.gather(*(client.find("genes", name) for name in gene_names))
+    ids = {}
+    for name, entries in zip(gene_names, results):
+        matches = [entry[0] for entry in entries if re.fullmatch(rf"{re.escape(org_code)}:\w+", entry[0])]
+        ids[name] = matches[0] if matches else None
+    return ids
+
+
+async def build_gene_sets(client: AsyncKeggClient, org_code: str) -> Dict[Tuple[str, str], Set[str]]:
+    """
+    Pathways of an organism and their genes, from the KGML of every pathway downloaded
+    concurrently (see `KeggAnalysis._create_GMT_file`).
+
+    Pathways without genes or without KGML are skipped.
+    """
+    paths = [entry[0] for entry in await client.list("pathway", org_code) if entry[0]]
+    kgmls = await asyncio.gather(*(client.kgml(path) for path in paths), return_exceptions=True)
+
+    gene_sets = {}
+    for path, kgml in zip(paths, kgmls):
+        if isinstance(kgml, Exception):
+            print(f"Pathway {path} has no information in KEGG, it was not added to the gene set: {kgml}")
+            continue
+        genes = KeggAnalysis.extract_genes_from_kgml_string(kgml)
+        if genes:
+            gene_sets[(path, KeggAnalysis.extract_path_name_from_kgml(kgml))] = genes
+        else:
+            print(f"For pathway {path} no genes were found")
+    return gene_sets
+
+
+async def create_gmt_file(client: AsyncKeggClient, org_code: str, output_file: str) -> Dict[Tuple[str, str], Set[str]]:
+    """
+    Build the gene sets of an organism and save them as a GMT file (and its binary companion).
+
+    The files are written in the default executor, so the event loop is not blocked.
+    """
+    gene_sets = await build_gene_sets(client, org_code)
+    await asyncio.get_running_loop().run_in_executor(None, KeggAnalysis.save_GeneSet_GMT, output_file, gene_sets)
+    print(f"GMT {output_file} saved with {len(gene_sets)} pathways")
+    return gene_sets
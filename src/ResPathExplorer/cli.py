@@ -0,0 +1,139 @@
+import argparse
+import sys
+from typing import List, Optional
+
+from .pipeline import read_manifest, run_pipeline
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of the `respath` command."""
+    parser = argparse.ArgumentParser(
+        prog="respath",
+        description="Run CARD, VFDB and KEGG analyses for every sample of a manifest."
+    )
+    parser.add_argument("manifest",
+                        help="TSV/CSV with the columns 'sample' and 'genes' "
+                             "(optional: 'bacteria', 'background').")
+    parser.add_argument("-o", "--outdir", default="respath_results",
+                        help="Output directory (default: respath_results).")
+    parser.add_argument("--card-obo",
+                        help="Path to the CARD ontology (aro.obo); enables ARG annotation.")
+    parser.add_argument("--card-overrides",
+                        help="Curation TSV ('Gene ID' plus curated columns) applied to the ARG annotation.")
+    parser.add_argument("--vfdb-dir",
+                        help="VFDB database directory; enables the virulence factor search.")
+    parser.add_argument("--organism",
+                        help="KEGG organism code or name; used with --gmt for enrichment.")
+    parser.add_argument("--gmt", help="GMT file with the KEGG gene sets of the organism.")
+    parser.add_argument("--gmt-filter", action="append",
+                        help="Only use pathways whose ID or name matches this pattern (e.g. 'map00*'); repeatable.")
+    parser.add_argument("--cutoff", type=float, default=0.05,
+                        help="Adjusted p-value cutoff for enrichment (default: 0.05).")
+    parser.add_argument("--top", type=int, default=20,
+                        help="Number of top pathways kept per sample (default: 20).")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Number of worker processes (default: number of CPUs).")
+    parser.add_argument("--cache-dir",
+                        help="Directory of the stage cache; reruns reuse stages whose inputs did not change.")
+    parser.add_argument("--cache-size", type=int, default=2048,
+                        help="Maximum size of the stage cache in MB (default: 2048).")
+    parser.add_argument("--no-plots", action="store_true", help="Do not render plots.")
+    parser.add_argument("--paginate", action="store_true",
+                        help="Paginate report tables client-side (for very large tables).")
+    return parser
+
+
+def build_serve_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of the `respath serve` command."""
+    parser = argparse.ArgumentParser(
+        prog="respath serve",
+        description="Load CARD, VFDB and KEGG once and answer annotate/search/enrich requests over HTTP."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000).")
+    parser.add_argument("--card-obo", help="Path to the CARD ontology (aro.obo); enables /annotate.")
+    parser.add_argument("--card-overrides",
+                        help="Curation TSV ('Gene ID' plus curated columns) applied to the ARG annotation.")
+    parser.add_argument("--vfdb-dir", help="VFDB database directory; enables /search.")
+    parser.add_argument("--gmt", action="append", metavar="ORGANISM=GMT",
+                        help="KEGG organism code and its GMT file, e.g. 'lmo=lmo.gmt'; enables /enrich. Repeatable.")
+    parser.add_argument("--gmt-filter", action="append",
+                        help="Only use pathways whose ID or name matches this pattern (e.g. 'map00*'); repeatable.")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not log requests.")
+    return parser
+
+
+def serve_main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of the `respath serve` command.
+
+    Returns:
+        int: Exit status.
+    """
+    from .server import AnnotationService, serve
+
+    args = build_serve_parser().parse_args(argv)
+    gmts = {}
+    for value in args.gmt or []:
+        organism, sep, path = value.partition("=")
+        if not sep or not organism or not path:
+            print(f"respath serve: error: --gmt expects ORGANISM=GMT, got '{value}'", file=sys.stderr)
+            return 2
+        gmts[organism] = path
+
+    try:
+        service = AnnotationService.from_config(card_obo=args.card_obo, card_overrides=args.card_overrides,
+                                                vfdb_dir=args.vfdb_dir, gmts=gmts, gmt_filter=args.gmt_filter)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"respath serve: error: {e}", file=sys.stderr)
+        return 2
+
+    serve(service, host=args.host, port=args.port, verbose=not args.quiet)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of the `respath` command.
+
+    `respath serve ...` starts the annotation server (see `serve_main`).
+
+    Returns:
+        int: Exit status (0 if every sample succeeded, 1 otherwise).
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "serve":
+        return serve_main(argv[1:])
+
+    args = build_parser().parse_args(argv)
+
+    config = {
+        "outdir": args.outdir,
+        "card_obo": args.card_obo,
+        "card_overrides": args.card_overrides,
+        "vfdb_dir": args.vfdb_dir,
+        "organism": args.organism,
+        "gmt": args.gmt,
+        "gmt_filter": args.gmt_filter,
+        "cutoff": args.cutoff,
+        "top": args.top,
+        "plots": not args.no_plots,
+        "paginate": args.paginate,
+        "cache_dir": args.cache_dir,
+        "cache_size": args.cache_size * 1024 ** 2,
+    }
+
+    try:
+        samples = read_manifest(args.manifest)
+        summary = run_pipeline(samples, config, n_workers=args.workers)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"respath: error: {e}", file=sys.stderr)
+        return 2
+
+    failed = summary[summary["status"] != "ok"]
+    print(f"{len(summary) - len(failed)}/{len(summary)} samples processed. Results in {args.outdir}")
+    return 1 if len(failed) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional, Tuple
+import pandas as pd
+
+from .artifact_cache import ArtifactCache
+
+
+class EnrichmentCache:
+    """
+    Memoizes unfiltered enrichment tables (gseapy `res2d`) across calls.
+
+    Entries are keyed by the sorted, de-duplicated gene list, the background and a
+    fingerprint of the gene sets, so the cutoff, the top-N selection and the pathway
+    names can be applied to a cached table without running gseapy again. The most
+    recently used tables are kept in memory; with `cache_dir`, tables are also persisted
+    through an `ArtifactCache` and survive the process. Lookups are thread-safe.
+
+    Attributes:
+        max_entries (int): Number of tables kept in memory.
+        disk (Optional[ArtifactCache]): Persistent store, if any.
+        hits (int): Number of lookups served from memory or disk.
+        misses (int): Number of lookups that had to be computed.
+    """
+
+    STAGE = "enrichment_res2d"
+
+    def __init__(self, max_entries: int = 32, cache_dir: Optional[str] = None,
+                 max_size_bytes: int = 2 * 1024 ** 3):
+        if not isinstance(max_entries, int) or max_entries < 1:
+            raise ValueError("max_entries must be a positive integer.")
+        self.max_entries = max_entries
+        self.disk = ArtifactCache(cache_dir, max_size_bytes) if cache_dir else None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(gene_list: Iterable[str], background: Optional[Iterable[str]], gene_sets: str) -> str:
+        """
+        Hash the inputs an enrichment table depends on.
+
+        Args:
+            gene_list (Iterable[str]): Genes of interest (order and duplicates are ignored).
+            background (Optional[Iterable[str]]): Background genes, if any.
+            gene_sets (str): Fingerprint of the gene sets (e.g. GMT checksum and filter).
+        """
+        return ArtifactCache.make_key(
+            genes=sorted(set(gene_list)),
+            background=sorted(set(background)) if background is not None else None,
+            gene_sets=gene_sets,
+        )
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Return a copy of a cached table, or None if it is not cached."""
+        with self._lock:
+            table = self._entries.get(key)
+            if table is not None:
+                self._entries.move_to_end(key)
+        if table is None and self.disk is not None:
+            table = self.disk.get(self.STAGE, key)
+            if table is not None:
+                self._remember(key, table)
+        return None if table is None else table.copy()
+
+    def put(self, key: str, table: pd.DataFrame) -> None:
+        """Store a table in memory and, if configured, on disk."""
+        self._remember(key, table.copy())
+        if self.disk is not None:
+            self.disk.put(self.STAGE, key, table)
+
+    def _remember(self, key: str, table: pd.DataFrame) -> None:
+        with self._lock:
+            self._entries[key] = table
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: str, compute: Callable[[], pd.DataFrame]) -> Tuple[pd.DataFrame, bool]:
+        """
+        Return the cached table for `key`, computing and storing it on a miss.
+
+        Returns:
+            Tuple[pd.DataFrame, bool]: The table and whether it came from the cache.
+        """
+        table = self.get(key)
+        if table is not None:
+            with self._lock:
+                self.hits += 1
+            return table, True
+
+        with self._lock:
+            self.misses += 1
+        table = compute()
+        self.put(key, table)
+        return table.copy(), False
+
+    def keys(self) -> List[str]:
+        """Keys held in memory, least recently used first."""
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self) -> None:
+        """Drop the in-memory tables (persisted tables are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,149 @@
+from typing import Optional
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+ENRICHMENT_COLUMNS = [
+    "Sample", "Category", "Observed", "Sample size", "Background", "Background size",
+    "Expected", "Fold enrichment", "P-value", "Adjusted P-value",
+]
+
+
+def benjamini_hochberg(pvalues: np.ndarray) -> np.ndarray:
+    """
+    Benjamini-Hochberg adjusted p-values along the last axis.
+
+    Each row of a 2D array is corrected as its own family of tests; NaN entries are not
+    tests and stay NaN.
+
+    Args:
+        pvalues (np.ndarray): 1D or 2D array of p-values.
+
+    Returns:
+        np.ndarray: Adjusted p-values with the shape of `pvalues`.
+    """
+    p = np.atleast_2d(np.asarray(pvalues, dtype=float))
+    n_tests = np.sum(~np.isnan(p), axis=1, keepdims=True)
+
+    # NaNs sort last, so the tested p-values occupy the first n_tests ranks of each row
+    order = np.argsort(p, axis=1, kind="stable")
+    sorted_p = np.take_along_axis(p, order, axis=1)
+    ranks = np.arange(1, p.shape[1] + 1)
+    scaled = sorted_p * n_tests / ranks
+    scaled = np.where(np.isnan(scaled), np.inf, scaled)
+    adjusted_sorted = np.minimum.accumulate(scaled[:, ::-1], axis=1)[:, ::-1]
+    adjusted_sorted = np.minimum(adjusted_sorted, 1.0)
+
+    adjusted = np.empty_like(p)
+    np.put_along_axis(adjusted, order, adjusted_sorted, axis=1)
+    adjusted[np.isnan(p)] = np.nan
+    return adjusted.reshape(np.shape(pvalues))
+
+
+def category_enrichment(sample_annotations: pd.DataFrame, background_annotations: pd.DataFrame,
+                        category_col: str, item_col: Optional[str] = None, sample_col: str = "Sample",
+                        min_count: int = 1) -> pd.DataFrame:
+    """
+    Over-representation of categories in many samples at once (one-sided Fisher's exact test).
+
+    For each sample and category, the number of sample items in the category is compared
+    with the background through the hypergeometric upper tail, which equals a one-sided
+    Fisher's exact test. Counts of every (sample, category) pair are computed together and
+    all p-values come from one vectorized call; they are Benjamini-Hochberg corrected
+    within each sample.
+
+    Args:
+        sample_annotations (pd.DataFrame): Long-format annotations of the samples, one row
+                                           per (sample, item, category).
+        background_annotations (pd.DataFrame): Annotations of the background (e.g. the full
+                                               VFDB or CARD), one row per (item, category).
+        category_col (str): Category column in both frames.
+        item_col (Optional[str]): Item identifier column in both frames. Items with several
+                                  categories count once in the sizes. If None, each row is
+                                  a distinct item.
+        sample_col (str): Sample column of `sample_annotations`.
+        min_count (int): Categories observed fewer times in a sample are not tested.
+
+    Returns:
+        pd.DataFrame: One row per tested (sample, category) with the columns of
+                      `ENRICHMENT_COLUMNS`, sorted by sample and adjusted p-value.
+
+    Raises:
+        ValueError: If the samples are not drawn from the background: an (item, category)
+                    pair missing from it, or more sample items than background items.
+    """
+    for frame, columns, label in ((sample_annotations, [sample_col, category_col], "sample_annotations"),
+                                  (background_annotations, [category_col], "background_annotations")):
+        missing = {c for c in columns + ([item_col] if item_col else []) if c not in frame.columns}
+        if missing:
+            raise ValueError(f"Missing columns in {label}: {missing}")
+    if min_count < 1:
+        raise ValueError("min_count must be a positive integer.")
+
+    samples = sample_annotations[sample_annotations[category_col].notna()]
+    background = background_annotations[background_annotations[category_col].notna()]
+    if samples.empty or background.empty:
+        return pd.DataFrame(columns=ENRICHMENT_COLUMNS)
+
+    def items(frame: pd.DataFrame) -> pd.Series:
+        if item_col is None:
+            return pd.Series(np.arange(len(frame)), index=frame.index)
+        return frame[item_col].astype(str)
+
+    if item_col is not None:
+        known = pd.MultiIndex.from_arrays([items(background).to_numpy(),
+                                           background[category_col].astype(str).to_numpy()])
+        unknown = ~pd.MultiIndex.from_arrays([items(samples).to_numpy(),
+                                              samples[category_col].astype(str).to_numpy()]).isin(known)
+        if unknown.any():
+            examples = samples.loc[unknown, [item_col, category_col]].drop_duplicates().head(5)
+            raise ValueError(f"{int(unknown.sum())} sample annotations are not in the background, e.g. "
+                             f"{list(examples.itertuples(index=False, name=None))}")
+
+    # Background: distinct items and distinct items per category
+    background_items = items(background)
+    background_size = background_items.nunique()
+    categories, category_codes = np.unique(
+        np.concatenate([background[category_col].astype(str), samples[category_col].astype(str)]),
+        return_inverse=True)
+    background_codes = category_codes[:len(background)]
+    sample_codes = category_codes[len(background):]
+    pairs = pd.DataFrame({"item": background_items.to_numpy(), "category": background_codes}).drop_duplicates()
+    background_counts = np.bincount(pairs["category"], minlength=len(categories))
+
+    # Samples: distinct items and a sample x category count matrix
+    sample_names, sample_idx = np.unique(samples[sample_col].astype(str), return_inverse=True)
+    pairs = pd.DataFrame({"sample": sample_idx, "item": items(samples).to_numpy(),
+                          "category": sample_codes}).drop_duplicates()
+    observed = np.zeros((len(sample_names), len(categories)), dtype=np.int64)
+    np.add.at(observed, (pairs["sample"].to_numpy(), pairs["category"].to_numpy()), 1)
+    sample_sizes = pairs.drop_duplicates(["sample", "item"]).groupby("sample").size()
+    sample_sizes = sample_sizes.reindex(range(len(sample_names)), fill_value=0).to_numpy()
+
+    # Samples larger than the background would make the hypergeometric test undefined
+    if (sample_sizes > background_size).any() or (observed > background_counts[None, :]).any():
+        raise ValueError("Sample counts exceed the background counts; the samples must be drawn "
+                         "from the background.")
+    population = background_size
+    successes = np.broadcast_to(background_counts[None, :], observed.shape)
+    draws = sample_sizes[:, None]
+
+    tested = observed >= min_count
+    pvalues = np.where(tested, stats.hypergeom.sf(observed - 1, population, successes, draws), np.nan)
+    adjusted = benjamini_hochberg(pvalues)
+    expected = draws * successes / population
+
+    rows, cols = np.nonzero(tested)
+    result = pd.DataFrame({
+        "Sample": sample_names[rows],
+        "Category": categories[cols],
+        "Observed": observed[rows, cols],
+        "Sample size": sample_sizes[rows],
+        "Background": successes[rows, cols],
+        "Background size": np.full(len(rows), population),
+        "Expected": expected[rows, cols],
+        "Fold enrichment": observed[rows, cols] / expected[rows, cols],
+        "P-value": pvalues[rows, cols],
+        "Adjusted P-value": adjusted[rows, cols],
+    })
+    return result.sort_values(["Sample", "Adjusted P-value", "P-value"]).reset_index(drop=True)
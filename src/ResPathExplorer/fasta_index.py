@@ -0,0 +1,196 @@
+import gzip
+import mmap
+import os
+import shutil
+from typing import Dict, Iterable, List, Optional, Union
+import numpy as np
+
+
+def decompress_fasta(gz_path: str, out_path: Optional[str] = None) -> str:
+    """
+    Decompresses a gzip FASTA file next to it, unless an up-to-date copy already exists.
+
+    Returns:
+        str: Path of the decompressed file.
+    """
+    if not os.path.exists(gz_path):
+        raise FileNotFoundError(f"FASTA file not found: {gz_path}")
+    out_path = out_path or (gz_path[:-3] if gz_path.endswith(".gz") else gz_path + ".fa")
+
+    if not os.path.exists(out_path) or os.path.getmtime(out_path) < os.path.getmtime(gz_path):
+        tmp_path = out_path + ".tmp"
+        with gzip.open(gz_path, "rb") as f_in, open(tmp_path, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        os.replace(tmp_path, out_path)
+    return out_path
+
+
+class FastaIndex:
+    """
+    Random access to the records of an uncompressed FASTA file through a `.fai` index.
+
+    The index uses the samtools `.fai` layout (name, length, offset, line bases, line
+    width), is written next to the FASTA file once and reused while it is newer than the
+    FASTA. The offsets of the header lines, which `.fai` does not keep, are stored next to
+    it in a `.hdr` file. Sequences are read from a memory map, so fetching a record costs
+    one slice.
+
+    Attributes:
+        fasta_path (str): Path of the FASTA file.
+        names (List[str]): Record names (headers up to the first space), in file order.
+    """
+
+    def __init__(self, fasta_path: str):
+        if not os.path.exists(fasta_path):
+            raise FileNotFoundError(f"FASTA file not found: {fasta_path}")
+        if fasta_path.endswith(".gz"):
+            raise ValueError("FastaIndex needs an uncompressed FASTA file; use decompress_fasta() first.")
+        if os.path.getsize(fasta_path) == 0:
+            raise ValueError(f"FASTA file is empty: {fasta_path}")
+
+        self.fasta_path = fasta_path
+        self.fai_path = fasta_path + ".fai"
+        self.hdr_path = fasta_path + ".hdr"
+        if any(not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(fasta_path)
+               for path in (self.fai_path, self.hdr_path)):
+            self.build(fasta_path, self.fai_path, self.hdr_path)
+        self._load(self.fai_path, self.hdr_path)
+
+        self._file = open(fasta_path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def build(fasta_path: str, fai_path: str, hdr_path: Optional[str] = None) -> None:
+        """
+        Scans a FASTA file once and writes its `.fai` index (and the header offsets to `hdr_path`).
+
+        Raises:
+            ValueError: If a record has lines of different lengths (other than its last line).
+        """
+        rows = []
+        header_offsets = []
+        name = None
+        length = offset = line_bases = line_width = 0
+        short_line_seen = False
+        position = 0
+
+        with open(fasta_path, "rb") as f:
+            for line in f:
+                if line.startswith(b">"):
+                    if name is not None:
+                        rows.append((name, length, offset, line_bases, line_width))
+                    fields = line[1:].split(None, 1)
+                    name = fields[0].decode() if fields else ""
+                    header_offsets.append(position)
+                    length = line_bases = line_width = 0
+                    short_line_seen = False
+                    offset = position + len(line)
+                elif name is not None:
+                    bases = len(line.rstrip(b"\r\n"))
+                    if bases:
+                        if line_bases == 0:
+                            line_bases, line_width = bases, len(line)
+                        elif short_line_seen or bases > line_bases or (
+                                bases == line_bases and line.endswith(b"\n") and len(line) != line_width):
+                            raise ValueError(f"Record '{name}' has lines of different lengths; "
+                                             f"cannot index {fasta_path}.")
+                        short_line_seen = short_line_seen or bases < line_bases
+                        length += bases
+                position += len(line)
+        if name is not None:
+            rows.append((name, length, offset, line_bases, line_width))
+
+        with open(fai_path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write("\t".join(str(value) for value in row) + "\n")
+        if hdr_path is not None:
+            with open(hdr_path, "w", encoding="utf-8") as f:
+                f.writelines(f"{offset}\n" for offset in header_offsets)
+
+    def _load(self, fai_path: str, hdr_path: str) -> None:
+        """Loads the `.fai` columns and header offsets into arrays, and the name lookup."""
+        names, values = [], []
+        with open(fai_path, "r", encoding="utf-8") as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                names.append(fields[0])
+                values.append([int(v) for v in fields[1:5]])
+
+        table = np.array(values, dtype=np.int64).reshape(-1, 4)
+        self.names: List[str] = names
+        self.lengths, self.offsets, self.line_bases, self.line_widths = table.T
+        with open(hdr_path, "r", encoding="utf-8") as f:
+            self.header_offsets = np.array(f.read().split(), dtype=np.int64)
+        if len(self.header_offsets) != len(names):
+            raise ValueError(f"{hdr_path} does not match {fai_path}; delete both to rebuild the index.")
+        self._rows: Dict[str, int] = {}
+        for row, name in enumerate(names):
+            self._rows.setdefault(name, row)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._rows
+
+    def close(self) -> None:
+        """Closes the memory map and the FASTA file."""
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> "FastaIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def row(self, name: str) -> int:
+        """Returns the row of a record name."""
+        if name not in self._rows:
+            raise KeyError(f"Record '{name}' not found in {self.fasta_path}")
+        return self._rows[name]
+
+    def _check_row(self, row: int) -> int:
+        """Returns a record row as int, rejecting rows outside the index (no negative wrap-around)."""
+        row = int(row)
+        if not 0 <= row < len(self):
+            raise IndexError(f"Row {row} out of range for {len(self)} records.")
+        return row
+
+    def _end(self, row: int) -> int:
+        """Returns the file offset just after the last residue of a record."""
+        length, line_bases = int(self.lengths[row]), int(self.line_bases[row])
+        if length == 0:
+            return int(self.offsets[row])
+        full_lines, remainder = divmod(length, line_bases)
+        return int(self.offsets[row]) + full_lines * int(self.line_widths[row]) + remainder
+
+    def header(self, row: int) -> str:
+        """Returns the full header line of a record, without the leading '>'."""
+        row = self._check_row(row)
+        return self._mmap[int(self.header_offsets[row]) + 1:int(self.offsets[row])].rstrip(b"\r\n").decode()
+
+    def sequence(self, key: Union[int, str]) -> str:
+        """
+        Returns the sequence of a record, by row number or record name.
+        """
+        row = self._check_row(key) if isinstance(key, (int, np.integer)) else self.row(key)
+        raw = self._mmap[int(self.offsets[row]):self._end(row)]
+        return raw.replace(b"\n", b"").replace(b"\r", b"").decode()
+
+    def write_fasta(self, rows: Iterable[int], out_path: str) -> int:
+        """
+        Writes a subset of records to a FASTA file by copying their bytes from the memory map.
+
+        Returns:
+            int: Number of records written.
+
+        Raises:
+            IndexError: If a row is outside the index.
+        """
+        rows = [self._check_row(row) for row in rows]
+        with open(out_path, "wb") as f:
+            for row in rows:
+                record = self._mmap[int(self.header_offsets[row]):self._end(row)]
+                f.write(record.rstrip(b"\r\n") + b"\n")
+        return len(rows)
@@ -0,0 +1,162 @@
+import os
+from collections.abc import Mapping
+from typing import Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+from .aro_ontology import AROOntology, ROLLUP_COLUMNS
+from .artifact_cache import HAS_PARQUET
+
+ARG_COLUMNS = ["ARO ID", "ARO Name", "Antibiotics"] + list(ROLLUP_COLUMNS.values())
+VF_COLUMNS = ["VFID", "VF_Name", "Functional category", "VF organisms"]
+KEGG_COLUMNS = ["KEGG pathways", "KEGG pathway count"]
+
+
+def normalize_genes(genes: Iterable[str]) -> pd.Series:
+    """Gene keys used by the index: names stripped and lower-cased."""
+    return pd.Series(list(genes), dtype=object).astype(str).str.strip().str.lower()
+
+
+def _join_unique(values: pd.Series) -> str:
+    return ", ".join(sorted({str(v) for v in values if pd.notna(v)}))
+
+
+class GeneAnnotationIndex:
+    """
+    One table of ARG, virulence factor and KEGG pathway annotations per gene key.
+
+    CARD names and synonyms, VFDB gene names and KEGG gene set members are normalized to
+    the same keys (see `normalize_genes`) and joined once into a wide table. Annotating a
+    gene list is then a single vectorized reindex of that table instead of one scan per
+    database. The table can be saved and reloaded, so it is only built once per set of
+    database versions.
+
+    Attributes:
+        table (pd.DataFrame): Annotations indexed by gene key, with the columns of
+                              `ARG_COLUMNS`, `VF_COLUMNS`, `KEGG_COLUMNS` and 'Databases'.
+    """
+
+    def __init__(self, table: pd.DataFrame):
+        missing = set(ARG_COLUMNS + VF_COLUMNS + KEGG_COLUMNS + ["Databases"]) - set(table.columns)
+        if missing:
+            raise ValueError(f"Missing columns in annotation table: {missing}")
+        self.table = table
+
+    @classmethod
+    def build(cls, ontology: Optional[AROOntology] = None, vfdb_genes: Optional[pd.DataFrame] = None,
+              gene_sets: Optional[Mapping] = None) -> "GeneAnnotationIndex":
+        """
+        Join the annotations of the given databases.
+
+        Args:
+            ontology (Optional[AROOntology]): CARD ontology; every name and synonym is a key.
+            vfdb_genes (Optional[pd.DataFrame]): VFDB genes (`VFDBAnalysis.df_genes`), keyed
+                                                 by 'Gene_Name'.
+            gene_sets (Optional[Mapping]): KEGG gene sets (`KeggAnalysis.gene_set`).
+        """
+        if ontology is None and vfdb_genes is None and gene_sets is None:
+            raise ValueError("Provide at least one database: ontology, vfdb_genes or gene_sets.")
+        frames = []
+
+        if ontology is not None:
+            records = pd.DataFrame.from_dict(ontology.name_index, orient="index")
+            arg = pd.DataFrame(index=records.index)
+            if not records.empty:
+                arg["ARO ID"] = records["Gene ID"]
+                arg["ARO Name"] = records["Gene Name"]
+                arg["Antibiotics"] = records["Antibiotics"]
+                for kind, column in ROLLUP_COLUMNS.items():
+                    arg[column] = [", ".join(sorted(ontology.rollup(term_id, kind))) or np.nan
+                                   for term_id in records["Gene ID"]]
+            frames.append(arg.reindex(columns=ARG_COLUMNS).assign(ARG=True))
+
+        if vfdb_genes is not None:
+            missing = {"Gene_Name", "VFID", "Bacteria"} - set(vfdb_genes.columns)
+            if missing:
+                raise ValueError(f"Missing columns in vfdb_genes: {missing}")
+            genes = vfdb_genes[vfdb_genes["Gene_Name"].notna()]
+            keys = normalize_genes(genes["Gene_Name"]).to_numpy()
+            grouped = genes.reindex(columns=["VFID", "VF_Name", "Functional category", "Bacteria"]).groupby(keys)
+            vf = pd.DataFrame({
+                "VFID": grouped["VFID"].agg(_join_unique),
+                "VF_Name": grouped["VF_Name"].agg(_join_unique),
+                "Functional category": grouped["Functional category"].agg(_join_unique),
+                "VF organisms": grouped["Bacteria"].nunique(),
+            }).replace("", np.nan)
+            frames.append(vf.reindex(columns=VF_COLUMNS).assign(VF=True))
+
+        if gene_sets is not None:
+            pathways, members = [], []
+            for key in gene_sets:
+                genes = list(gene_sets[key])
+                pathways.extend([key[0] if isinstance(key, tuple) else key] * len(genes))
+                members.extend(genes)
+            memberships = pd.DataFrame({"key": normalize_genes(members).to_numpy(), "pathway": pathways})
+            grouped = memberships.drop_duplicates().groupby("key")["pathway"]
+            kegg = pd.DataFrame({"KEGG pathways": grouped.agg(lambda p: ";".join(sorted(p))),
+                                 "KEGG pathway count": grouped.size()})
+            frames.append(kegg.reindex(columns=KEGG_COLUMNS).assign(KEGG=True))
+
+        table = pd.concat(frames, axis=1, join="outer").sort_index()
+        flags = [name for name in ("ARG", "VF", "KEGG") if name in table.columns]
+        present = table[flags].fillna(False).astype(bool).to_numpy()
+        table["Databases"] = [",".join(np.array(flags)[row]) for row in present]
+        table = table.drop(columns=flags).reindex(columns=ARG_COLUMNS + VF_COLUMNS + KEGG_COLUMNS + ["Databases"])
+        table["VF organisms"] = table["VF organisms"].fillna(0).astype(np.int64)
+        table["KEGG pathway count"] = table["KEGG pathway count"].fillna(0).astype(np.int64)
+        table.index.name = "Key"
+        return cls(table)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __contains__(self, gene: str) -> bool:
+        return normalize_genes([gene]).iloc[0] in self.table.index
+
+    def lookup(self, genes: List[str], annotated_only: bool = False) -> pd.DataFrame:
+        """
+        Annotate a gene list in one vectorized lookup.
+
+        Args:
+            genes (List[str]): Gene names or identifiers, matched case-insensitively.
+            annotated_only (bool): Drop the genes without any annotation.
+
+        Returns:
+            pd.DataFrame: One row per gene, in input order: 'Gene' followed by the columns
+                          of `table`. 'Databases' is empty for unknown genes.
+        """
+        keys = normalize_genes(genes)
+        result = self.table.reindex(keys.to_numpy())
+        result.insert(0, "Gene", list(genes))
+        result = result.reset_index(drop=True)
+        result["Databases"] = result["Databases"].fillna("")
+        result["VF organisms"] = result["VF organisms"].fillna(0).astype(np.int64)
+        result["KEGG pathway count"] = result["KEGG pathway count"].fillna(0).astype(np.int64)
+        if annotated_only:
+            result = result[result["Databases"] != ""].reset_index(drop=True)
+        return result
+
+    def save(self, path: str) -> None:
+        """
+        Persist the table as Parquet (`.parquet`, needs pyarrow) or JSON (any other suffix).
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        if path.endswith(".parquet"):
+            if not HAS_PARQUET:
+                raise ValueError("Saving as Parquet needs pyarrow; use a .json path instead.")
+            self.table.to_parquet(tmp_path)
+        else:
+            self.table.to_json(tmp_path, orient="table")
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "GeneAnnotationIndex":
+        """Load a table written by `save`."""
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Annotation index not found: {path}")
+        if path.endswith(".parquet"):
+            return cls(pd.read_parquet(path))
+        return cls(pd.read_json(path, orient="table"))
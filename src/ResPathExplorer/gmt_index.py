@@ -0,0 +1,310 @@
+import fnmatch
+import mmap
+import os
+import struct
+import zipfile
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import numpy as np
+
+GeneSetKey = Tuple[str, str]
+
+BINARY_SUFFIX = ".npz"
+
+
+def _compile_patterns(include: Optional[Union[str, Iterable[str]]]) -> Optional[List[str]]:
+    """Normalizes ID/name filters (shell-style patterns such as 'map00*') to a lower-cased list."""
+    if include is None:
+        return None
+    patterns = [include] if isinstance(include, str) else list(include)
+    if not patterns or not all(isinstance(p, str) and p for p in patterns):
+        raise ValueError("include must be a non-empty pattern or list of patterns.")
+    return [p.lower() for p in patterns]
+
+
+def _select(ids: List[str], names: List[str], include: Optional[List[str]]) -> List[int]:
+    """Returns the rows whose pathway ID or name matches one of the patterns."""
+    if include is None:
+        return list(range(len(ids)))
+    return [i for i, (pathway, name) in enumerate(zip(ids, names))
+            if any(fnmatch.fnmatchcase(pathway.lower(), p) or fnmatch.fnmatchcase(name.lower(), p)
+                   for p in include)]
+
+
+class _GeneSetMapping(Mapping, ABC):
+    """
+    Read-only (pathway ID, pathway name) -> genes mapping over rows of a gene-set file.
+
+    Subclasses set `_keys` and implement `_genes_at(row)`, and override `close` when they
+    hold open files. Mappings are context managers that close on exit.
+    """
+
+    _keys: List[GeneSetKey]
+
+    def _index_keys(self, keys: List[GeneSetKey]) -> None:
+        self._keys = keys
+        self._rows: Dict[str, int] = {}
+        for row, (pathway, _) in enumerate(keys):
+            self._rows.setdefault(pathway, row)
+
+    @abstractmethod
+    def _genes_at(self, row: int) -> List[str]:
+        """Returns the genes of a row of `_keys`."""
+
+    def _row(self, key: Union[GeneSetKey, str]) -> int:
+        pathway = key[0] if isinstance(key, tuple) else key
+        row = self._rows.get(pathway)
+        if row is None or (isinstance(key, tuple) and self._keys[row] != key):
+            raise KeyError(key)
+        return row
+
+    def __getitem__(self, key: Union[GeneSetKey, str]) -> List[str]:
+        """
+        Returns the genes of a pathway, by (pathway ID, name) key or pathway ID.
+        """
+        return self._genes_at(self._row(key))
+
+    def __iter__(self) -> Iterator[GeneSetKey]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        """Returns the selected gene sets keyed by pathway ID (the format accepted by gseapy)."""
+        return {pathway: self._genes_at(row) for row, (pathway, _) in enumerate(self._keys)}
+
+    def close(self) -> None:
+        """Releases the open files of the mapping (nothing by default)."""
+
+    def __enter__(self) -> "_GeneSetMapping":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class GMTIndex(_GeneSetMapping):
+    """
+    Read-only mapping of a GMT file, keyed like `KeggAnalysis.gene_set`:
+    (pathway ID, pathway name) -> list of genes.
+
+    Only the first two fields of each line are read, once, to build an offset index
+    (pathway ID, name, byte range) that is saved next to the GMT as `<gmt>.idx` and reused
+    while it is newer than the GMT. The GMT itself is memory-mapped and a gene list is
+    split only when its pathway is first accessed, so opening a large GMT costs neither
+    time nor memory proportional to the number of genes.
+
+    Args:
+        gmt_file (str): Path to the GMT file.
+        include (Optional[Union[str, Iterable[str]]]): Shell-style patterns matched against
+            pathway IDs and names (case-insensitive), e.g. "map00*". Only matching pathways
+            are exposed.
+    """
+
+    def __init__(self, gmt_file: str, include: Optional[Union[str, Iterable[str]]] = None):
+        if not os.path.exists(gmt_file):
+            raise FileNotFoundError(f"GMT file '{gmt_file}' not found.")
+
+        self.gmt_file = gmt_file
+        self.index_file = gmt_file + ".idx"
+        self.include = _compile_patterns(include)
+
+        ids, names, starts, ends = self._load_index()
+        keep = _select(ids, names, self.include)
+        self._index_keys([(ids[i], names[i]) for i in keep])
+        self._starts = starts[keep]
+        self._ends = ends[keep]
+        self._genes: Dict[int, List[str]] = {}
+
+        self._file = open(gmt_file, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._keys else None
+
+    def _load_index(self) -> Tuple[List[str], List[str], np.ndarray, np.ndarray]:
+        """Reads the persisted offset index, building it first if missing or stale."""
+        if (not os.path.exists(self.index_file)
+                or os.path.getmtime(self.index_file) < os.path.getmtime(self.gmt_file)):
+            entries = self.build_index(self.gmt_file)
+            try:
+                with open(self.index_file, "w", encoding="utf-8") as f:
+                    for pathway, name, start, end in entries:
+                        f.write(f"{pathway}\t{name}\t{start}\t{end}\n")
+            except OSError:
+                pass  # Read-only location: keep the index in memory only
+        else:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                entries = [line.rstrip("\n").split("\t") for line in f]
+
+        ids = [e[0] for e in entries]
+        names = [e[1] for e in entries]
+        starts = np.array([int(e[2]) for e in entries], dtype=np.int64)
+        ends = np.array([int(e[3]) for e in entries], dtype=np.int64)
+        return ids, names, starts, ends
+
+    @staticmethod
+    def build_index(gmt_file: str) -> List[Tuple[str, str, int, int]]:
+        """
+        Scans a GMT file once and returns (pathway ID, name, start, end) for every line,
+        where [start, end) is the byte range of the gene fields.
+        """
+        entries = []
+        position = 0
+        with open(gmt_file, "rb") as f:
+            for line in f:
+                fields = line.rstrip(b"\r\n").split(b"\t", 2)
+                if len(fields) >= 2 and fields[0]:
+                    genes_start = position + len(fields[0]) + len(fields[1]) + 2
+                    genes_end = position + len(line.rstrip(b"\r\n"))
+                    entries.append((fields[0].decode().strip(), fields[1].decode().strip(),
+                                    min(genes_start, genes_end), genes_end))
+                position += len(line)
+        return entries
+
+    def close(self) -> None:
+        """Closes the memory map and the GMT file; already loaded gene lists stay readable."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def _genes_at(self, row: int) -> List[str]:
+        if row not in self._genes:
+            if self._mmap is None:
+                raise ValueError(f"GMTIndex of '{self.gmt_file}' is closed.")
+            raw = self._mmap[int(self._starts[row]):int(self._ends[row])]
+            self._genes[row] = [g for g in raw.decode().split("\t") if g]
+        return self._genes[row]
+
+    def __repr__(self) -> str:
+        return f"GMTIndex({self.gmt_file!r}, {len(self)} pathways, {len(self._genes)} loaded)"
+
+
+def binary_gene_sets_path(gmt_file: str) -> str:
+    """Returns the path of the binary companion of a GMT file (`<gmt>.npz`)."""
+    return gmt_file + BINARY_SUFFIX
+
+
+def save_binary_gene_sets(gene_sets: Mapping, out_path: str, gmt_file: Optional[str] = None) -> None:
+    """
+    Writes gene sets in the binary companion format: an uncompressed `.npz` with the pathway
+    IDs and names, the sorted gene vocabulary and CSR offsets/indices into it.
+
+    Args:
+        gene_sets (Mapping): (pathway ID, name) -> genes, e.g. `KeggAnalysis.gene_set`.
+        out_path (str): Output `.npz` path.
+        gmt_file (Optional[str]): Text GMT the binary file mirrors; its size and modification
+                                  time are stored to detect a stale companion.
+    """
+    keys = list(gene_sets.keys())
+    gene_lists = [list(gene_sets[key]) for key in keys]
+    all_genes = [gene for genes in gene_lists for gene in genes]
+    vocabulary, indices = np.unique(np.array(all_genes, dtype=str), return_inverse=True)
+    offsets = np.concatenate([[0], np.cumsum([len(genes) for genes in gene_lists])]).astype(np.int64)
+
+    stat = os.stat(gmt_file) if gmt_file else None
+    source = np.array([stat.st_size, stat.st_mtime_ns] if stat else [-1, -1], dtype=np.int64)
+
+    tmp_path = out_path + ".tmp.npz"
+    np.savez(tmp_path,
+             ids=np.array([k[0] for k in keys], dtype=str), names=np.array([k[1] for k in keys], dtype=str),
+             vocabulary=vocabulary, indices=indices.astype(np.int32).ravel(), offsets=offsets, source=source)
+    os.replace(tmp_path, out_path)
+
+
+def _memmap_npz(path: str) -> Dict[str, np.ndarray]:
+    """
+    Memory-maps the arrays of an uncompressed `.npz` file, using the offset of each
+    member inside the zip archive.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path} is compressed and cannot be memory-mapped.")
+            f.seek(info.header_offset)
+            local_header = f.read(30)
+            name_length, extra_length = struct.unpack("<HH", local_header[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            elif version == (2, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            else:
+                raise ValueError(f"Array '{name}' of {path} has unsupported .npy format version {version}.")
+            if dtype.hasobject:
+                raise ValueError(f"Array '{name}' of {path} holds Python objects.")
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                                         order="F" if fortran_order else "C")
+    return arrays
+
+
+def is_binary_fresh(gmt_file: str, binary_file: Optional[str] = None) -> bool:
+    """
+    Tells whether the binary companion of a GMT exists and matches the GMT's size and
+    modification time (a companion without its GMT is considered fresh).
+    """
+    binary_file = binary_file or binary_gene_sets_path(gmt_file)
+    if not os.path.exists(binary_file):
+        return False
+    if not os.path.exists(gmt_file):
+        return True
+    try:
+        source = _memmap_npz(binary_file)["source"]
+    except (KeyError, ValueError, OSError, zipfile.BadZipFile):
+        return False
+    stat = os.stat(gmt_file)
+    return [int(source[0]), int(source[1])] == [stat.st_size, stat.st_mtime_ns]
+
+
+class BinaryGeneSets(_GeneSetMapping):
+    """
+    Read-only mapping of gene sets stored by `save_binary_gene_sets`, with the same keys
+    as `GMTIndex`.
+
+    The arrays are memory-mapped straight from the `.npz` file, so loading does not parse
+    any text and gene lists are decoded from the vocabulary on access.
+
+    Args:
+        binary_file (str): Path to the `.npz` file.
+        include (Optional[Union[str, Iterable[str]]]): Pathway ID/name patterns, as in `GMTIndex`.
+    """
+
+    def __init__(self, binary_file: str, include: Optional[Union[str, Iterable[str]]] = None):
+        if not os.path.exists(binary_file):
+            raise FileNotFoundError(f"Gene set file '{binary_file}' not found.")
+        self.binary_file = binary_file
+        self.include = _compile_patterns(include)
+
+        arrays = _memmap_npz(binary_file)
+        ids, names = arrays["ids"].tolist(), arrays["names"].tolist()
+        self._vocabulary = arrays["vocabulary"]
+        self._indices = arrays["indices"]
+        self._offsets = arrays["offsets"]
+        self._source_rows = _select(ids, names, self.include)
+        self._index_keys([(ids[i], names[i]) for i in self._source_rows])
+
+    def _genes_at(self, row: int) -> List[str]:
+        source_row = self._source_rows[row]
+        start, end = self._offsets[source_row], self._offsets[source_row + 1]
+        return self._vocabulary[self._indices[start:end]].tolist()
+
+    def __repr__(self) -> str:
+        return f"BinaryGeneSets({self.binary_file!r}, {len(self)} pathways)"
+
+
+def open_gene_sets(gmt_file: str, include: Optional[Union[str, Iterable[str]]] = None) -> _GeneSetMapping:
+    """
+    Opens the gene sets of a GMT file, preferring its binary companion when it is up to
+    date and falling back to the text GMT through `GMTIndex` otherwise.
+    """
+    binary_file = binary_gene_sets_path(gmt_file)
+    if is_binary_fresh(gmt_file, binary_file):
+        return BinaryGeneSets(binary_file, include=include)
+    return GMTIndex(gmt_file, include=include)
@@ -0,0 +1,193 @@
+import html
+import json
+import math
+from typing import Dict, IO, List, Union
+import numpy as np
+import pandas as pd
+
+HTML_STYLE = """
+        body {
+            font-family: Arial, sans-serif;
+        }
+        table {
+            width: 100%;
+            border-collapse: collapse;
+            margin-top: 20px;
+        }
+        th, td {
+            border: 1px solid black;
+            padding: 8px;
+            text-align: center;
+        }
+        th {
+            background-color: #f2f2f2;
+        }
+        h1, h2 {
+            text-align: center;
+            margin-top: 20px;
+        }
+        .pager {
+            text-align: center;
+            margin: 10px;
+        }
+"""
+
+# Renders the JSON-embedded tables one page at a time, so the browser only
+# ever holds `page_size` rows in the DOM.
+PAGINATION_SCRIPT = """
+    <script>
+    document.querySelectorAll("table[data-source]").forEach(function (table) {
+        var payload = JSON.parse(document.getElementById(table.dataset.source).textContent);
+        var pageSize = parseInt(table.dataset.pageSize, 10);
+        var pages = Math.max(1, Math.ceil(payload.rows.length / pageSize));
+        var tbody = table.querySelector("tbody");
+        var pager = document.getElementById(table.id + "-pager");
+        var label = pager.querySelector("span");
+        var page = 0;
+
+        function render() {
+            tbody.textContent = "";
+            payload.rows.slice(page * pageSize, (page + 1) * pageSize).forEach(function (row) {
+                var tr = document.createElement("tr");
+                row.forEach(function (value) {
+                    var td = document.createElement("td");
+                    td.textContent = value === null ? "" : value;
+                    tr.appendChild(td);
+                });
+                tbody.appendChild(tr);
+            });
+            label.textContent = "Page " + (page + 1) + " of " + pages + " (" + payload.rows.length + " rows)";
+        }
+
+        pager.querySelector(".prev").onclick = function () { if (page > 0) { page--; render(); } };
+        pager.querySelector(".next").onclick = function () { if (page < pages - 1) { page++; render(); } };
+        render();
+    });
+    </script>
+"""
+
+
+def _cell(value) -> str:
+    """Format a single table cell as escaped text."""
+    if value is None or (not isinstance(value, (list, tuple, dict)) and pd.isna(value)):
+        return ""
+    return html.escape(str(value))
+
+
+def _json_safe_rows(chunk: pd.DataFrame) -> List[list]:
+    """
+    Return the rows of `chunk` as lists of JSON-serializable values.
+
+    Missing and non-finite values (NaN, inf) become None, since JSON has no literal for them.
+    """
+    valid = chunk.notna()
+    numeric = chunk.select_dtypes(include="number").columns
+    if len(numeric):
+        valid[numeric] &= np.isfinite(chunk[numeric].to_numpy(dtype=float))
+    # Mixed columns may still hold float infinities
+    for column in chunk.columns[(chunk.dtypes == object).to_numpy()]:
+        valid[column] &= chunk[column].map(lambda v: not isinstance(v, float) or math.isfinite(v)).astype(bool)
+    return chunk.astype(object).where(valid, None).values.tolist()
+
+
+def _write_header(f: IO[str], columns: List[str]) -> None:
+    """Write the table header row."""
+    f.write("<thead><tr>")
+    f.write("".join(f"<th>{_cell(c)}</th>" for c in columns))
+    f.write("</tr></thead>\n")
+
+
+def _write_static_table(f: IO[str], df: pd.DataFrame, chunk_size: int) -> None:
+    """Write a plain HTML table, converting and emitting `chunk_size` rows at a time."""
+    f.write('<table border="1" class="dataframe">\n')
+    _write_header(f, list(df.columns))
+    f.write("<tbody>\n")
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        rows = [
+            "<tr>" + "".join(f"<td>{_cell(v)}</td>" for v in row) + "</tr>\n"
+            for row in chunk.itertuples(index=False, name=None)
+        ]
+        f.write("".join(rows))
+    f.write("</tbody>\n</table>\n")
+
+
+def _write_paginated_table(f: IO[str], df: pd.DataFrame, table_id: str,
+                           chunk_size: int, page_size: int) -> None:
+    """Write an empty table shell plus its rows as compact JSON, streamed in chunks."""
+    f.write(f'<table border="1" class="dataframe" id="{table_id}" '
+            f'data-source="{table_id}-data" data-page-size="{page_size}">\n')
+    _write_header(f, list(df.columns))
+    f.write("<tbody></tbody>\n</table>\n")
+    f.write(f'<div class="pager" id="{table_id}-pager">'
+            '<button class="prev">&laquo; Previous</button> <span></span> '
+            '<button class="next">Next &raquo;</button></div>\n')
+
+    f.write(f'<script type="application/json" id="{table_id}-data">')
+    header = json.dumps({"columns": [str(c) for c in df.columns]}, separators=(",", ":"))
+    f.write(header[:-1].replace("<", "\\u003c") + ',"rows":[')
+    for start in range(0, len(df), chunk_size):
+        rows = _json_safe_rows(df.iloc[start:start + chunk_size])
+        payload = json.dumps(rows, separators=(",", ":"), default=str, ensure_ascii=False,
+                             allow_nan=False)[1:-1]
+        if start > 0:
+            f.write(",")
+        # A literal "</script>" or "<!--" in the data would break out of the <script> element
+        f.write(payload.replace("<", "\\u003c"))
+    f.write("]}</script>\n")
+
+
+def write_html_report(
+        tables: Union[pd.DataFrame, Dict[str, pd.DataFrame]],
+        filename: str,
+        title: str = "Table",
+        chunk_size: int = 5000,
+        paginate: bool = False,
+        page_size: int = 100) -> None:
+    """
+    Stream one or more DataFrames into a single HTML report.
+
+    Rows are converted and written `chunk_size` at a time straight to the file, so the
+    full document is never held in memory. With `paginate=True` each table's data is
+    embedded as compact JSON and rendered client-side one page at a time, which keeps
+    very large reports responsive in the browser.
+
+    Args:
+        tables (Union[pd.DataFrame, Dict[str, pd.DataFrame]]): A DataFrame, or a mapping of
+            section titles to DataFrames (e.g. {"ARGs": ..., "Virulence factors": ..., "Enrichment": ...}).
+        filename (str): Output filename (.html).
+        title (str): Title for the HTML document and visible heading.
+        chunk_size (int): Number of rows converted and written per chunk.
+        paginate (bool): If True, embed the data as JSON and paginate client-side.
+        page_size (int): Rows per page when `paginate` is True.
+
+    Raises:
+        ValueError: If the arguments are invalid.
+    """
+    if isinstance(tables, pd.DataFrame):
+        sections = {None: tables}
+    elif isinstance(tables, dict) and all(isinstance(df, pd.DataFrame) for df in tables.values()):
+        sections = tables
+    else:
+        raise ValueError("tables must be a DataFrame or a dict of section titles to DataFrames.")
+    if not isinstance(chunk_size, int) or chunk_size <= 0:
+        raise ValueError("chunk_size must be a positive integer.")
+    if not isinstance(page_size, int) or page_size <= 0:
+        raise ValueError("page_size must be a positive integer.")
+
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n")
+        f.write(f"<title>{html.escape(title)}</title>\n<style>{HTML_STYLE}</style>\n</head>\n<body>\n")
+        f.write(f"<h1>{html.escape(title)}</h1>\n")
+
+        for i, (section, df) in enumerate(sections.items()):
+            if section is not None:
+                f.write(f"<h2>{html.escape(str(section))}</h2>\n")
+            if paginate:
+                _write_paginated_table(f, df, f"table-{i}", chunk_size, page_size)
+            else:
+                _write_static_table(f, df, chunk_size)
+
+        if paginate:
+            f.write(PAGINATION_SCRIPT)
+        f.write("</body>\n</html>\n")
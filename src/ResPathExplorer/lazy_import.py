@@ -0,0 +1,68 @@
+import importlib
+from typing import Any, Optional
+
+
+class LazyImport:
+    """
+    Proxy that imports a module (or one of its attributes) on first use.
+
+    Heavy dependencies such as gseapy, bioservices, seaborn and matplotlib.pyplot
+    are only needed by a few methods, so importing them when the package is loaded
+    slows down every script and worker start. Attribute access, assignment and
+    calls are forwarded to the real object, which keeps `unittest.mock.patch`
+    working on attributes such as `KeggAnalysis.gp.enrich`.
+
+    Attributes:
+        module_name (str): Dotted name of the module to import.
+        attr (Optional[str]): Attribute of the module to resolve, e.g. a class name.
+    """
+
+    def __init__(self, module_name: str, attr: Optional[str] = None):
+        object.__setattr__(self, "module_name", module_name)
+        object.__setattr__(self, "attr", attr)
+        object.__setattr__(self, "_target", None)
+
+    def _load(self) -> Any:
+        """Import the target on first access and return it."""
+        target = object.__getattribute__(self, "_target")
+        if target is None:
+            target = importlib.import_module(self.module_name)
+            if self.attr is not None:
+                target = getattr(target, self.attr)
+            object.__setattr__(self, "_target", target)
+        return target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._load(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs) -> Any:
+        return self._load()(*args, **kwargs)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        target = f"{self.module_name}.{self.attr}" if self.attr else self.module_name
+        return f"<LazyImport '{target}'>"
+
+
+def lazy_import(module_name: str, attr: Optional[str] = None) -> LazyImport:
+    """
+    Return a proxy that imports `module_name` (and optionally `attr`) on first use.
+
+    Args:
+        module_name (str): Dotted module name (e.g., "gseapy" or "Bio.KEGG.REST").
+        attr (Optional[str]): Attribute to resolve from the module (e.g., "KEGG").
+
+    Returns:
+        LazyImport: Proxy forwarding attribute access and calls to the imported object.
+    """
+    if not module_name or not isinstance(module_name, str):
+        raise ValueError("module_name must be a non-empty string.")
+    return LazyImport(module_name, attr)
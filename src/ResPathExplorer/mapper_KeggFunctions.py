@@ -1,6 +1,8 @@
 import re
-from Bio.KEGG import REST
 from typing import Optional
+from .lazy_import import lazy_import
+
+REST = lazy_import("Bio.KEGG.REST")
 
 def search_gene_id_kegg(gene_name: str, org_code: Optional[str] = None) -> Optional[str]:
     """Convert a gene name to a KEGG gene ID."""
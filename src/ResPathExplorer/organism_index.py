@@ -0,0 +1,114 @@
+import bisect
+from typing import Dict, Iterable, List, Tuple, Union
+import numpy as np
+import pandas as pd
+
+LOOKUP_LEVELS = ("taxon", "exact", "prefix", "species", "genus")
+
+
+def normalize_organism(name: str) -> str:
+    """Lower-cases an organism name and collapses whitespace."""
+    return " ".join(str(name).lower().split())
+
+
+def parse_organism(name: str) -> Tuple[str, str, str]:
+    """
+    Splits an organism name into genus, species and strain.
+
+    Example: "Escherichia coli O157:H7 str. EDL933" -> ("escherichia", "escherichia coli",
+    "o157:h7 str. edl933"). The species keeps the genus, as in the binomial name.
+    """
+    tokens = normalize_organism(name).split(" ")
+    genus = tokens[0]
+    species = " ".join(tokens[:2])
+    strain = " ".join(tokens[2:])
+    return genus, species, strain
+
+
+class OrganismIndex:
+    """
+    Index of the organisms of a DataFrame column (e.g. `df_genes['Bacteria']`) to row positions.
+
+    The distinct organism names are parsed once into genus, species and strain and mapped
+    to the sorted rows where they occur. Lookups return row positions without scanning the
+    frame, and queries are matched literally (no regular expressions).
+
+    Lookup levels:
+        - "taxon": names equal to the query or extending it by whole words, so
+          "Listeria" matches every Listeria, "Listeria monocytogenes" every strain of
+          the species, and a full name the strain.
+        - "exact": names equal to the query.
+        - "prefix": names starting with the query, e.g. "Lister".
+        - "species": names in the species of the query's first two words.
+        - "genus": names in the genus of the query's first word.
+
+    Matching ignores case and repeated whitespace.
+    """
+
+    def __init__(self, organisms: Iterable[str]):
+        values = pd.Series(list(organisms), dtype=object)
+        codes, uniques = pd.factorize(values.map(normalize_organism, na_action="ignore"))
+
+        # Rows of every distinct name, from one stable sort of the codes
+        valid = np.flatnonzero(codes >= 0)
+        order = valid[np.argsort(codes[valid], kind="stable")]
+        boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+        row_groups = np.split(order, boundaries) if len(order) else []
+
+        self._rows: Dict[str, np.ndarray] = {}
+        for name, rows in zip(uniques, row_groups):
+            self._rows[name] = rows
+
+        self._genera: Dict[str, List[str]] = {}
+        self._species: Dict[str, List[str]] = {}
+        for name in self._rows:
+            genus, species, _ = parse_organism(name)
+            self._genera.setdefault(genus, []).append(name)
+            self._species.setdefault(species, []).append(name)
+        self.names: List[str] = sorted(self._rows)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _prefixed(self, prefix: str) -> List[str]:
+        """Returns the names starting with `prefix` (binary search over the sorted names)."""
+        start = bisect.bisect_left(self.names, prefix)
+        end = bisect.bisect_left(self.names, prefix + "\uffff")
+        return self.names[start:end]
+
+    def matching_names(self, query: str, level: str = "taxon") -> List[str]:
+        """
+        Returns the normalized organism names matched by `query` at the given level.
+        """
+        if level not in LOOKUP_LEVELS:
+            raise ValueError(f"Invalid level '{level}'. Use one of {list(LOOKUP_LEVELS)}.")
+        if not isinstance(query, str) or not query.strip():
+            raise ValueError("query must be a non-empty string.")
+
+        query = normalize_organism(query)
+        if level == "exact":
+            return [query] if query in self._rows else []
+        if level == "prefix":
+            return self._prefixed(query)
+        if level == "species":
+            return sorted(self._species.get(parse_organism(query)[1], []))
+        if level == "genus":
+            return sorted(self._genera.get(parse_organism(query)[0], []))
+
+        names = [query] if query in self._rows else []
+        return names + self._prefixed(query + " ")
+
+    def lookup(self, queries: Union[str, Iterable[str]], level: str = "taxon") -> np.ndarray:
+        """
+        Returns the sorted row positions of the organisms matched by one or more queries.
+
+        Args:
+            queries (Union[str, Iterable[str]]): Organism name(s).
+            level (str): "taxon", "exact", "prefix", "species" or "genus".
+        """
+        if isinstance(queries, str):
+            queries = [queries]
+        names = {name for query in queries for name in self.matching_names(query, level)}
+        if not names:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate([self._rows[name] for name in names]))
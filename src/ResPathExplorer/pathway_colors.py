@@ -0,0 +1,110 @@
+from functools import lru_cache
+from typing import Dict, Optional, Union
+import numpy as np
+import pandas as pd
+
+from .lazy_import import lazy_import
+from .URL_pathway import get_url_pathways
+from .validate_color_code import validate_color_code
+
+matplotlib = lazy_import("matplotlib")
+
+
+@lru_cache(maxsize=None)
+def colormap_lut(cmap: str = "coolwarm", n_colors: int = 256) -> np.ndarray:
+    """
+    Hex colors ("#rrggbb") of a matplotlib colormap sampled at `n_colors` evenly spaced points.
+    """
+    if n_colors < 2:
+        raise ValueError("n_colors must be at least 2.")
+    try:
+        colormap = matplotlib.colormaps[cmap]
+    except KeyError:
+        raise ValueError(f"Unknown colormap '{cmap}'.")
+    rgb = np.round(colormap(np.linspace(0.0, 1.0, n_colors))[:, :3] * 255).astype(np.int64)
+    packed = (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+    return np.array([f"#{value:06x}" for value in packed])
+
+
+def pathway_gene_colors(
+        enrichment_results: pd.DataFrame,
+        scores: Optional[Union[pd.Series, Dict[str, float]]] = None,
+        cmap: str = "coolwarm",
+        vmin: Optional[float] = None,
+        vmax: Optional[float] = None,
+        color: str = "red",
+        missing_color: str = "lightgray",
+        border: str = "black",
+        n_colors: int = 256) -> Dict[str, Dict[str, str]]:
+    """
+    Gene color dicts of every pathway of an enrichment table, ready for `get_url_pathways`.
+
+    The genes of all pathways are exploded into one table and scored with a single
+    case-insensitive reindex; scores are mapped to colors through a lookup table of the
+    colormap (see `colormap_lut`), so no Python loop runs per gene.
+
+    Args:
+        enrichment_results (pd.DataFrame): Pathways with 'Term' and ';'-separated 'Genes'
+                                           (e.g. `KeggAnalysis.limited_enrichment_results`).
+        scores (Optional[Union[pd.Series, Dict[str, float]]]): Gene -> score (e.g. log2 fold
+                                                              change). Without scores, every
+                                                              gene gets `color`.
+        cmap (str): Matplotlib colormap of the scores.
+        vmin (Optional[float]): Score of the first color. Defaults to -max(|score|), which
+                                centers diverging colormaps on 0.
+        vmax (Optional[float]): Score of the last color. Defaults to max(|score|).
+        color (str): Background of the genes when no scores are given.
+        missing_color (str): Background of the genes without a score.
+        border (str): Border color of every gene.
+        n_colors (int): Size of the colormap lookup table.
+
+    Returns:
+        Dict[str, Dict[str, str]]: Pathway -> {gene: "background,border"}.
+    """
+    missing = {"Term", "Genes"} - set(enrichment_results.columns)
+    if missing:
+        raise ValueError(f"Missing columns in enrichment results: {missing}")
+    for value in (color, missing_color, border):
+        validate_color_code(value)
+
+    genes = (enrichment_results[["Term", "Genes"]].dropna()
+             .assign(Gene=lambda df: df["Genes"].astype(str).str.split(";"))
+             .explode("Gene"))
+    genes["Gene"] = genes["Gene"].str.strip()
+    genes = genes[genes["Gene"] != ""]
+
+    if scores is None:
+        backgrounds = np.full(len(genes), color, dtype=object)
+    else:
+        scores = pd.Series(scores, dtype=float) if not isinstance(scores, pd.Series) else scores.astype(float)
+        scores = scores.dropna()
+        scores.index = scores.index.astype(str).str.upper()
+        scores = scores[~scores.index.duplicated(keep="first")]
+        values = scores.reindex(genes["Gene"].str.upper().to_numpy()).to_numpy()
+
+        known = ~np.isnan(values)
+        limit = np.abs(scores.to_numpy()).max() if len(scores) else 1.0
+        low = -limit if vmin is None else vmin
+        high = limit if vmax is None else vmax
+        if not high > low:
+            high = low + 1.0
+        lut = colormap_lut(cmap, n_colors)
+        positions = np.clip(np.round((values[known] - low) / (high - low) * (n_colors - 1)), 0, n_colors - 1)
+
+        backgrounds = np.full(len(genes), missing_color, dtype=object)
+        backgrounds[known] = lut[positions.astype(np.int64)]
+
+    genes["Color"] = backgrounds + ("," + border)
+    return {term: dict(zip(group["Gene"], group["Color"]))
+            for term, group in genes.groupby("Term", sort=False)}
+
+
+def pathway_color_urls(enrichment_results: pd.DataFrame,
+                       scores: Optional[Union[pd.Series, Dict[str, float]]] = None,
+                       **kwargs) -> Dict[str, str]:
+    """
+    Colored KEGG map URLs of every pathway of an enrichment table.
+
+    Keyword arguments are passed to `pathway_gene_colors`.
+    """
+    return get_url_pathways(pathway_gene_colors(enrichment_results, scores, **kwargs))
@@ -0,0 +1,148 @@
+import os
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .enrichment_stats import benjamini_hochberg
+
+PERMUTATION_COLUMNS = [
+    "Term", "Overlap", "Gene set size", "Expected overlap", "Empirical P-value", "Empirical FDR",
+]
+
+# Incidence matrix and observed overlaps shared by the blocks of a worker process
+_PERMUTATION_STATE: Dict[str, Any] = {}
+
+
+def gene_set_incidence(gene_sets: Mapping, universe: Optional[Sequence[str]] = None
+                       ) -> Tuple[List[str], List[str], sparse.csr_matrix]:
+    """
+    Builds the gene x pathway incidence matrix of a gene-set collection.
+
+    Args:
+        gene_sets (Mapping): Pathway -> genes, keyed by pathway ID or by (pathway ID, name)
+                             as `KeggAnalysis.gene_set`.
+        universe (Optional[Sequence[str]]): Genes of the rows. Defaults to the union of
+                                            the gene sets; other genes are ignored.
+
+    Returns:
+        Tuple[List[str], List[str], sparse.csr_matrix]: The pathway IDs, the genes and the
+        binary (genes x pathways) matrix.
+    """
+    terms = [key[0] if isinstance(key, tuple) else key for key in gene_sets]
+    gene_lists = [list(gene_sets[key]) for key in gene_sets]
+    if universe is None:
+        universe = sorted({gene for genes in gene_lists for gene in genes})
+    universe = list(dict.fromkeys(universe))
+    rows = {gene: i for i, gene in enumerate(universe)}
+
+    gene_idx, term_idx = [], []
+    for j, genes in enumerate(gene_lists):
+        members = {rows[gene] for gene in genes if gene in rows}
+        gene_idx.extend(members)
+        term_idx.extend([j] * len(members))
+    incidence = sparse.csr_matrix((np.ones(len(gene_idx), dtype=np.int32), (gene_idx, term_idx)),
+                                  shape=(len(universe), len(terms)))
+    return terms, universe, incidence
+
+
+def _init_permutation_worker(incidence: sparse.csr_matrix, observed: np.ndarray, list_size: int) -> None:
+    """Keep the inputs shared by every block in the worker process."""
+    _PERMUTATION_STATE["incidence"] = incidence
+    _PERMUTATION_STATE["observed"] = observed
+    _PERMUTATION_STATE["list_size"] = list_size
+
+
+def _permutation_block(seed: np.random.SeedSequence, n_permutations: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Draws a block of random gene lists and counts, per pathway, the permutations whose
+    overlap reaches the observed one.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Exceedance counts and summed overlaps per pathway.
+    """
+    incidence = _PERMUTATION_STATE["incidence"]
+    observed = _PERMUTATION_STATE["observed"]
+    list_size = _PERMUTATION_STATE["list_size"]
+    n_genes = incidence.shape[0]
+
+    # One row of distinct gene indices per permutation (sampling without replacement)
+    rng = np.random.default_rng(seed)
+    draws = np.argpartition(rng.random((n_permutations, n_genes)), list_size - 1, axis=1)[:, :list_size]
+
+    indicator = sparse.csr_matrix(
+        (np.ones(draws.size, dtype=np.int32), draws.ravel(),
+         np.arange(0, draws.size + 1, list_size)), shape=(n_permutations, n_genes))
+    overlaps = (indicator @ incidence).toarray()
+    return (overlaps >= observed).sum(axis=0), overlaps.sum(axis=0)
+
+
+def permutation_enrichment(gene_list: Sequence[str], gene_sets: Mapping,
+                           background: Optional[Sequence[str]] = None, n_permutations: int = 10000,
+                           seed: int = 0, block_size: int = 1000, n_workers: Optional[int] = None
+                           ) -> pd.DataFrame:
+    """
+    Empirical over-representation p-values from random gene lists of the same size.
+
+    All random lists of a block are drawn as one integer matrix and their overlaps with
+    every pathway come from a single sparse product with the incidence matrix. Blocks
+    are seeded from one `SeedSequence`, so results depend on `seed` only, not on the
+    number of workers.
+
+    Args:
+        gene_list (Sequence[str]): Genes of interest.
+        gene_sets (Mapping): Pathway -> genes (e.g. `KeggAnalysis.gene_set`).
+        background (Optional[Sequence[str]]): Genes the random lists are drawn from.
+                                              Defaults to the genes of the gene sets.
+        n_permutations (int): Number of random gene lists.
+        seed (int): Seed of the random draws.
+        block_size (int): Permutations per block.
+        n_workers (Optional[int]): Number of worker processes. Defaults to the CPU count;
+                                   use 1 to run in the current process.
+
+    Returns:
+        pd.DataFrame: One row per pathway with the columns of `PERMUTATION_COLUMNS`. The
+        empirical p-value is (1 + #{random overlap >= observed}) / (1 + n_permutations)
+        and the FDR is its Benjamini-Hochberg correction.
+    """
+    if n_permutations < 1 or block_size < 1:
+        raise ValueError("n_permutations and block_size must be positive integers.")
+
+    terms, universe, incidence = gene_set_incidence(gene_sets, background)
+    rows = {gene: i for i, gene in enumerate(universe)}
+    query = sorted({rows[gene] for gene in gene_list if gene in rows})
+    if not query or not terms:
+        return pd.DataFrame(columns=PERMUTATION_COLUMNS)
+
+    observed = np.asarray(incidence[query].sum(axis=0)).ravel()
+    list_size = len(query)
+
+    blocks = [block_size] * (n_permutations // block_size)
+    if n_permutations % block_size:
+        blocks.append(n_permutations % block_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(blocks))
+
+    n_workers = min(n_workers or os.cpu_count() or 1, len(blocks))
+    if n_workers == 1:
+        _init_permutation_worker(incidence, observed, list_size)
+        results = [_permutation_block(s, n) for s, n in zip(seeds, blocks)]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_permutation_worker,
+                                 initargs=(incidence, observed, list_size)) as executor:
+            results = list(executor.map(_permutation_block, seeds, blocks))
+
+    exceed = np.sum([r[0] for r in results], axis=0)
+    overlap_sums = np.sum([r[1] for r in results], axis=0)
+    pvalues = (1 + exceed) / (1 + n_permutations)
+
+    result = pd.DataFrame({
+        "Term": terms,
+        "Overlap": observed,
+        "Gene set size": np.asarray(incidence.sum(axis=0)).ravel(),
+        "Expected overlap": overlap_sums / n_permutations,
+        "Empirical P-value": pvalues,
+        "Empirical FDR": benjamini_hochberg(pvalues),
+    })
+    return result.sort_values(["Empirical P-value", "Term"]).reset_index(drop=True)
@@ -0,0 +1,284 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+import pandas as pd
+
+from .aro_ontology import AROOntology
+from .CARDAnalysis import CARDAnalysis
+from .VFDBAnalysis import VFDBAnalysis
+from .KeggAnalysis import KeggAnalysis
+from .html_report import write_html_report
+from .artifact_cache import ArtifactCache, file_checksum
+
+# Databases loaded once per worker process by `init_worker`
+_WORKER_STATE: Dict[str, Any] = {}
+
+DEFAULT_CONFIG = {
+    "outdir": "respath_results",
+    "card_obo": None,
+    "card_overrides": None,
+    "vfdb_dir": None,
+    "organism": None,
+    "gmt": None,
+    "gmt_filter": None,
+    "cutoff": 0.05,
+    "top": 20,
+    "plots": True,
+    "paginate": False,
+    "cache_dir": None,
+    "cache_size": 2 * 1024 ** 3,
+}
+
+
+def read_gene_list(path: str) -> List[str]:
+    """
+    Read a gene list file with one gene per line (blank lines and '#' comments are ignored).
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Gene list not found: {path}")
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def read_manifest(manifest_file: str) -> List[Dict[str, Any]]:
+    """
+    Read a sample manifest (TSV, or CSV if the file ends with `.csv`).
+
+    Required columns are `sample` and `genes` (path to a gene list file). Optional columns
+    are `bacteria` (species used for the VFDB search) and `background` (path to a
+    background gene list for the enrichment). Relative paths are resolved against the
+    manifest directory.
+
+    Sample names name the output directories under `outdir`, so they must be unique and
+    non-empty, and cannot contain path separators or be '.' or '..'.
+
+    Returns:
+        List[Dict[str, Any]]: One dictionary per sample.
+    """
+    if not os.path.exists(manifest_file):
+        raise FileNotFoundError(f"Manifest not found: {manifest_file}")
+
+    sep = "," if manifest_file.lower().endswith(".csv") else "\t"
+    manifest = pd.read_csv(manifest_file, sep=sep, dtype=str, comment="#").fillna("")
+
+    missing = {"sample", "genes"} - set(manifest.columns)
+    if missing:
+        raise ValueError(f"Missing required columns in manifest: {missing}")
+    manifest["sample"] = manifest["sample"].str.strip()
+    separators = {os.sep, "/", "\\"} | ({os.altsep} if os.altsep else set())
+    invalid = [name for name in manifest["sample"]
+               if name in ("", ".", "..") or any(sep in name for sep in separators)]
+    if invalid:
+        raise ValueError(f"Invalid sample names in manifest (empty, '.', '..' or with a path separator): "
+                         f"{invalid}")
+    if manifest["sample"].duplicated().any():
+        duplicated = manifest.loc[manifest["sample"].duplicated(), "sample"].tolist()
+        raise ValueError(f"Duplicated sample names in manifest: {duplicated}")
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_file))
+    samples = []
+    for row in manifest.to_dict("records"):
+        sample = {
+            "sample": row["sample"],
+            "genes": os.path.join(base_dir, row["genes"].strip()),
+            "bacteria": row.get("bacteria", "").strip() or None,
+            "background": None,
+        }
+        if row.get("background", "").strip():
+            sample["background"] = os.path.join(base_dir, row["background"].strip())
+        samples.append(sample)
+    return samples
+
+
+def prepare_databases(config: Dict[str, Any]) -> None:
+    """
+    Download missing databases once in the parent process, before workers start.
+    """
+    card_obo = config.get("card_obo")
+    if card_obo and not os.path.exists(card_obo):
+        CARDAnalysis.download_CARD_file(card_obo)
+        if not os.path.exists(card_obo):
+            raise FileNotFoundError(f"CARD ontology not found after download: {card_obo}")
+
+    if config.get("vfdb_dir"):
+        VFDBAnalysis(db_dir=config["vfdb_dir"]).download_data()
+
+
+def _cached(stage: str, inputs: Dict[str, Any], compute):
+    """Run a pipeline stage through the worker's artifact cache, if one is configured."""
+    cache = _WORKER_STATE.get("cache")
+    if cache is None:
+        return compute()
+    return cache.cached(stage, inputs, compute)
+
+
+def init_worker(config: Dict[str, Any]) -> None:
+    """
+    Load the shared databases once per worker process.
+
+    Args:
+        config (Dict[str, Any]): Pipeline configuration (see `DEFAULT_CONFIG`).
+    """
+    _WORKER_STATE.clear()
+    _WORKER_STATE["config"] = config
+
+    if config.get("cache_dir"):
+        _WORKER_STATE["cache"] = ArtifactCache(config["cache_dir"], config["cache_size"])
+
+    if config.get("card_obo"):
+        _WORKER_STATE["ontology"] = AROOntology(config["card_obo"])
+        _WORKER_STATE["card_version"] = file_checksum(config["card_obo"])
+        if config.get("card_overrides"):
+            _WORKER_STATE["card_version"] += ":" + file_checksum(config["card_overrides"])
+
+    if config.get("vfdb_dir"):
+        vfdb = VFDBAnalysis(db_dir=config["vfdb_dir"])
+        vfdb_version = [file_checksum(vfdb.fasta_path), file_checksum(vfdb.xls_path)]
+        vfdb.df_genes = _cached("vfdb_merge", {"vfdb": vfdb_version}, vfdb.load_and_process)
+        _WORKER_STATE["vfdb"] = vfdb
+        _WORKER_STATE["vfdb_version"] = vfdb_version
+
+    if config.get("organism") and config.get("gmt"):
+        _WORKER_STATE["kegg"] = KeggAnalysis(config["organism"], config["gmt"], use_existing_gmt=True,
+                                             gmt_filter=config.get("gmt_filter"))
+        _WORKER_STATE["gmt_version"] = file_checksum(config["gmt"])
+
+
+def process_sample(sample: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run ARG annotation, VF search, enrichment and reporting for one sample.
+
+    Must be called in a process initialized with `init_worker`. Results are written to
+    `<outdir>/<sample>/`.
+
+    Returns:
+        Dict[str, Any]: Summary with the number of hits per stage.
+    """
+    config = _WORKER_STATE["config"]
+    name = sample["sample"]
+    sample_dir = os.path.join(config["outdir"], name)
+    os.makedirs(sample_dir, exist_ok=True)
+
+    genes = read_gene_list(sample["genes"])
+    summary = {"sample": name, "genes": len(genes)}
+    tables = {}
+    plot_jobs = []
+
+    if "ontology" in _WORKER_STATE:
+        arg_df = _cached(
+            "card", {"genes": genes, "card": _WORKER_STATE["card_version"]},
+            lambda: CARDAnalysis(genes, has_CARDdata=True, ontology=_WORKER_STATE["ontology"],
+                                 overrides_file=config.get("card_overrides")).ARGdf
+        )
+        arg_df.to_csv(os.path.join(sample_dir, "ARG.tsv"), sep="\t", index=False)
+        summary["ARGs"] = len(arg_df)
+        tables["Antibiotic resistance genes"] = arg_df
+        if not arg_df.empty and "Antibiotics" in arg_df.columns:
+            plot_jobs.append((CARDAnalysis.plot_antibiotic_frequencies, arg_df,
+                              "antibiotic_frequencies.png", {}))
+
+    if "vfdb" in _WORKER_STATE and sample.get("bacteria") and genes:
+        vf_df = _cached(
+            "vfdb_search",
+            {"genes": genes, "bacteria": sample["bacteria"], "vfdb": _WORKER_STATE["vfdb_version"]},
+            lambda: _WORKER_STATE["vfdb"].search_virulence_genes(genes, sample["bacteria"])
+        )
+        vf_df.to_csv(os.path.join(sample_dir, "VF.tsv"), sep="\t", index=False)
+        summary["VFs"] = len(vf_df)
+        tables["Virulence factors"] = vf_df
+        if not vf_df.empty:
+            plot_jobs.append((VFDBAnalysis.plot_virulence_factors_percentage, vf_df,
+                              "virulence_factors.png", {"bacteria_name": sample["bacteria"]}))
+
+    if "kegg" in _WORKER_STATE and genes:
+        kegg = _WORKER_STATE["kegg"]
+        background = read_gene_list(sample["background"]) if sample.get("background") else None
+
+        def run_enrichment():
+            kegg.enrichment_analysis(genes, config["cutoff"], sample_dir, config["top"], "enrichment", background)
+            return kegg.enrichment_results
+
+        # The top-N selection is not part of the key: changing --top reuses the enrichment
+        enrichment_df = _cached(
+            "enrichment",
+            {"genes": sorted(set(genes)), "background": sorted(set(background)) if background else None,
+             "gmt": _WORKER_STATE["gmt_version"], "gmt_filter": config.get("gmt_filter"),
+             "cutoff": config["cutoff"]},
+            run_enrichment
+        )
+        top_df, _ = KeggAnalysis.select_top_pathways(enrichment_df, config["top"])
+        enrichment_df.to_csv(os.path.join(sample_dir, "enrichment.tsv"), sep="\t", index=False)
+        summary["enriched pathways"] = len(enrichment_df)
+        tables["Enriched pathways"] = top_df
+        if not top_df.empty:
+            plot_jobs.append((KeggAnalysis.plot_enrichment_results, top_df,
+                              "enrichment_barplot.png", {"plot_title": name}))
+
+    if config.get("plots"):
+        for plot_function, data, file_name, options in plot_jobs:
+            plot_function(data, headless=True, save_path=os.path.join(sample_dir, file_name), **options)
+
+    write_html_report(tables, os.path.join(sample_dir, "report.html"),
+                      title=f"ResPathExplorer report - {name}", paginate=config.get("paginate", False))
+    return summary
+
+
+def _run_sample(sample: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one sample, turning failures into a summary row instead of aborting the run."""
+    try:
+        summary = process_sample(sample)
+        summary["status"] = "ok"
+    except Exception as e:
+        summary = {"sample": sample["sample"], "status": f"failed: {e}"}
+    return summary
+
+
+def run_pipeline(samples: List[Dict[str, Any]], config: Optional[Dict[str, Any]] = None,
+                 n_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Process many samples in parallel across a worker pool.
+
+    Each worker loads the databases once (`init_worker`) and then handles whole samples.
+    A summary table is written to `<outdir>/summary.tsv`.
+
+    Args:
+        samples (List[Dict[str, Any]]): Samples as returned by `read_manifest`.
+        config (Optional[Dict[str, Any]]): Pipeline options overriding `DEFAULT_CONFIG`.
+        n_workers (Optional[int]): Number of worker processes. Defaults to the CPU count;
+                                   use 1 to run in the current process.
+
+    Returns:
+        pd.DataFrame: One summary row per sample, in manifest order.
+    """
+    if not samples:
+        raise ValueError("samples must be a non-empty list.")
+
+    config = {**DEFAULT_CONFIG, **(config or {})}
+    if not any(config.get(k) for k in ("card_obo", "vfdb_dir", "gmt")):
+        raise ValueError("Enable at least one stage: CARD ontology, VFDB directory or KEGG GMT.")
+    if bool(config.get("organism")) != bool(config.get("gmt")):
+        raise ValueError("KEGG enrichment needs both an organism and a GMT file.")
+
+    os.makedirs(config["outdir"], exist_ok=True)
+    prepare_databases(config)
+
+    n_workers = min(n_workers or os.cpu_count() or 1, len(samples))
+    summaries: List[Optional[Dict[str, Any]]] = [None] * len(samples)
+
+    if n_workers == 1:
+        init_worker(config)
+        for i, sample in enumerate(samples):
+            summaries[i] = _run_sample(sample)
+            print(f"Sample {summaries[i]['sample']}: {summaries[i]['status']}")
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=init_worker,
+                                 initargs=(config,)) as executor:
+            futures = {executor.submit(_run_sample, sample): i for i, sample in enumerate(samples)}
+            for future in as_completed(futures):
+                i = futures[future]
+                summaries[i] = future.result()
+                print(f"Sample {summaries[i]['sample']}: {summaries[i]['status']}")
+
+    summary_df = pd.DataFrame(summaries)
+    summary_df.to_csv(os.path.join(config["outdir"], "summary.tsv"), sep="\t", index=False)
+    return summary_df
@@ -0,0 +1,153 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple, Union
+from .lazy_import import lazy_import
+
+plt = lazy_import("matplotlib.pyplot")
+
+PLOT_KINDS = ("antibiotic_frequencies", "virulence_factors", "enrichment")
+
+
+def new_figure(figsize: Tuple[float, float], headless: bool = False) -> Tuple[Any, Any]:
+    """
+    Create a figure and a single axes.
+
+    In headless mode the figure is built with the object-oriented API on an Agg canvas,
+    so it never touches the global pyplot state and is safe to use from worker threads
+    or processes.
+
+    Args:
+        figsize (Tuple[float, float]): Figure size in inches.
+        headless (bool): If True, build a standalone Agg figure instead of using pyplot.
+
+    Returns:
+        Tuple[Figure, Axes]: The new figure and its axes.
+    """
+    if headless:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        return fig, ax
+
+    return plt.subplots(figsize=figsize)
+
+
+def finish_figure(fig: Any, save_path: Optional[str] = None, headless: bool = False) -> Optional[Any]:
+    """
+    Lay out, optionally save, and show or return a figure created by `new_figure`.
+
+    Args:
+        fig (Figure): Figure to finish.
+        save_path (Optional[str]): If provided, the figure is saved to this path.
+        headless (bool): If True, return the figure instead of calling `plt.show()`.
+
+    Returns:
+        Optional[Figure]: The figure in headless mode, otherwise None.
+    """
+    fig.tight_layout()
+    if save_path:
+        fig.savefig(save_path, bbox_inches='tight')
+    if headless:
+        return fig
+    plt.show()
+    return None
+
+
+def _init_render_worker() -> None:
+    """Select the non-interactive Agg backend in each worker process."""
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def render_plot_job(job: Dict[str, Any]) -> str:
+    """
+    Render a single plot job headlessly and save it to `job["output_file"]`.
+
+    Args:
+        job (Dict[str, Any]): Dictionary with the keys:
+            - "kind": One of "antibiotic_frequencies", "virulence_factors" or "enrichment".
+            - "data": DataFrame to plot.
+            - "output_file": Path of the image to write.
+            - "options" (optional): Extra keyword arguments for the plotting function.
+
+    Returns:
+        str: Path of the saved image.
+
+    Raises:
+        ValueError: If the job is malformed or its kind is unknown.
+    """
+    kind = job.get("kind")
+    output_file = job.get("output_file")
+    options = dict(job.get("options") or {})
+
+    if kind not in PLOT_KINDS:
+        raise ValueError(f"Invalid plot kind '{kind}'. Use one of {PLOT_KINDS}.")
+    if not output_file or not isinstance(output_file, str):
+        raise ValueError("Each plot job needs an 'output_file' path.")
+
+    # Imported here to avoid circular imports between this module and the analysis classes
+    if kind == "antibiotic_frequencies":
+        from .CARDAnalysis import CARDAnalysis
+        plot_function = CARDAnalysis.plot_antibiotic_frequencies
+    elif kind == "virulence_factors":
+        from .VFDBAnalysis import VFDBAnalysis
+        plot_function = VFDBAnalysis.plot_virulence_factors_percentage
+    else:
+        from .KeggAnalysis import KeggAnalysis
+        plot_function = KeggAnalysis.plot_enrichment_results
+
+    fig = plot_function(job.get("data"), headless=True, save_path=output_file, **options)
+    fig.clear()
+    return output_file
+
+
+def render_plots_batch(jobs: List[Dict[str, Any]],
+                       n_workers: Optional[int] = None) -> List[Union[str, Exception]]:
+    """
+    Render many plots headlessly across a process pool.
+
+    A failing job does not stop the others: its exception is reported and returned in
+    place of its path.
+
+    Args:
+        jobs (List[Dict[str, Any]]): Plot jobs as accepted by `render_plot_job`.
+        n_workers (Optional[int]): Number of worker processes. Defaults to the CPU count;
+                                   use 1 to render in the current process.
+
+    Returns:
+        List[Union[str, Exception]]: For each job, in the order of `jobs`, the path of the
+                                     written image or the exception that stopped it.
+    """
+    if not isinstance(jobs, list):
+        raise ValueError("jobs must be a list of plot job dictionaries.")
+
+    for job in jobs:
+        output_dir = os.path.dirname(job.get("output_file") or "")
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+    n_workers = n_workers or os.cpu_count() or 1
+    results: List[Union[str, Exception]] = [None] * len(jobs)
+
+    if n_workers == 1 or len(jobs) <= 1:
+        for i, job in enumerate(jobs):
+            try:
+                results[i] = render_plot_job(job)
+            except Exception as e:
+                print(f"Plot {job.get('output_file')} failed: {e}")
+                results[i] = e
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_render_worker) as executor:
+            futures = {executor.submit(render_plot_job, job): i for i, job in enumerate(jobs)}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    print(f"Plot {jobs[i].get('output_file')} failed: {e}")
+                    results[i] = e
+
+    return results
@@ -0,0 +1,260 @@
+import os
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+PRERANK_COLUMNS = [
+    "Term", "ES", "NES", "NOM p-val", "FDR q-val", "Size", "Tag %", "Gene %", "Lead_genes",
+]
+
+# Ranking and gene-set layout shared by the permutation blocks of a worker process
+_PRERANK_STATE: Dict[str, Any] = {}
+
+
+def prepare_ranking(ranking: Union[pd.Series, Mapping]) -> pd.Series:
+    """
+    Sorts a gene -> score ranking in decreasing order.
+
+    Missing scores are dropped and a gene listed twice keeps its highest score.
+    """
+    series = pd.Series(ranking, dtype=float) if not isinstance(ranking, pd.Series) else ranking.astype(float)
+    series = series.dropna()
+    series.index = series.index.astype(str)
+    series = series.sort_values(ascending=False, kind="stable")
+    return series[~series.index.duplicated(keep="first")]
+
+
+def _layout(gene_ranks: Dict[str, int], gene_sets: Mapping, min_size: int, max_size: int
+            ) -> Tuple[list, list, np.ndarray, np.ndarray]:
+    """
+    Concatenates the ranked members of every gene set within the size limits.
+
+    Returns:
+        Tuple[list, list, np.ndarray, np.ndarray]: The pathway IDs, their member genes,
+        the member ranks in one array and the start of every pathway segment in it.
+    """
+    terms, members, ranks, starts = [], [], [], []
+    position = 0
+    for key in gene_sets:
+        present = sorted({gene_ranks[g] for g in gene_sets[key] if g in gene_ranks})
+        if not min_size <= len(present) <= max_size:
+            continue
+        terms.append(key[0] if isinstance(key, tuple) else key)
+        members.append(present)
+        ranks.extend(present)
+        starts.append(position)
+        position += len(present)
+    return terms, members, np.array(ranks, dtype=np.int64), np.array(starts, dtype=np.int64)
+
+
+def running_sum_extremes(positions: np.ndarray, starts: np.ndarray, weights: np.ndarray,
+                         locate: bool = False) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Enrichment scores of many gene sets under many rankings at once.
+
+    The running sum of a gene set only changes direction at its hits, so its extremes are
+    found from the hit positions alone: at the i-th hit (0-based) at rank p, the sum is
+    cumsum(w)/sum(w) - (p - i)/(n - k) just after the hit and the same minus w just before.
+    Segment-wise cumulative sums give these values for every set and row in one pass.
+
+    Args:
+        positions (np.ndarray): (rows, members) ranks of the members, sorted within the
+                                segment of every gene set.
+        starts (np.ndarray): Start of every gene-set segment along the members axis.
+        weights (np.ndarray): Weight of every rank, |score|^p.
+        locate (bool): Also find the hits at the extremes (for the leading edge).
+
+    Returns:
+        Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]: The (rows, sets)
+        enrichment scores and, with `locate`, the hit number (within its set) of the
+        maximum and of the minimum of every running sum.
+    """
+    n = len(weights)
+    n_members = positions.shape[1]
+    sizes = np.diff(np.append(starts, n_members))
+    segment = np.repeat(np.arange(len(starts)), sizes)
+    hit_number = np.arange(n_members) - starts[segment]
+
+    w = weights[positions]
+    cumulative = np.cumsum(w, axis=1)
+    before = np.concatenate([np.zeros((len(w), 1)), cumulative[:, starts[1:] - 1]], axis=1)
+    segment_sums = cumulative - before[:, segment]
+    totals = cumulative[:, starts + sizes - 1] - before
+    totals = np.where(totals > 0, totals, 1.0)
+
+    misses = (positions - hit_number) / (n - sizes[segment])
+    after_hit = segment_sums / totals[:, segment] - misses
+    before_hit = (segment_sums - w) / totals[:, segment] - misses
+
+    peaks = np.maximum.reduceat(after_hit, starts, axis=1)
+    troughs = np.minimum.reduceat(before_hit, starts, axis=1)
+    scores = np.where(peaks >= -troughs, peaks, troughs)
+    if not locate:
+        return scores, None, None
+
+    # Hit number of the extremes (first occurrence within each set)
+    at_peak = np.where(after_hit == peaks[:, segment], hit_number, n_members)
+    at_trough = np.where(before_hit == troughs[:, segment], hit_number, n_members)
+    return (scores, np.minimum.reduceat(at_peak, starts, axis=1),
+            np.minimum.reduceat(at_trough, starts, axis=1))
+
+
+def _init_prerank_worker(ranks: np.ndarray, starts: np.ndarray, weights: np.ndarray) -> None:
+    """Keep the inputs shared by every block in the worker process."""
+    _PRERANK_STATE["ranks"] = ranks
+    _PRERANK_STATE["starts"] = starts
+    _PRERANK_STATE["weights"] = weights
+
+
+def _prerank_block(seed: np.random.SeedSequence, n_permutations: int) -> np.ndarray:
+    """
+    Enrichment scores of every gene set under a block of random gene-label permutations.
+
+    Returns:
+        np.ndarray: (n_permutations, sets) null enrichment scores.
+    """
+    ranks, starts, weights = _PRERANK_STATE["ranks"], _PRERANK_STATE["starts"], _PRERANK_STATE["weights"]
+    n = len(weights)
+
+    # Each row relabels the ranked genes; members move to the ranks of their new labels
+    rng = np.random.default_rng(seed)
+    permutations = np.argsort(rng.random((n_permutations, n)), axis=1)
+    positions = permutations[:, ranks]
+
+    # Sort within each segment by offsetting the segments apart
+    sizes = np.diff(np.append(starts, len(ranks)))
+    offsets = np.repeat(np.arange(len(starts), dtype=np.int64) * n, sizes)
+    positions = np.sort(positions + offsets, axis=1) - offsets
+    return running_sum_extremes(positions, starts, weights)[0]
+
+
+def _normalize(scores: np.ndarray, null: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Divides observed and null scores by the mean null score of the same sign, per set.
+    """
+    positive, negative = null >= 0, null < 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        positive_mean = np.where(positive, null, 0).sum(axis=0) / positive.sum(axis=0)
+        negative_mean = -np.where(negative, null, 0).sum(axis=0) / negative.sum(axis=0)
+        normalized = np.where(scores >= 0, scores / positive_mean, scores / negative_mean)
+        null_normalized = np.where(null >= 0, null / positive_mean, null / negative_mean)
+    return normalized, null_normalized
+
+
+def _upper_fraction(sorted_values: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """Fraction of `sorted_values` greater than or equal to each threshold."""
+    if len(sorted_values) == 0:
+        return np.full(len(thresholds), np.nan)
+    return (len(sorted_values) - np.searchsorted(sorted_values, thresholds, side="left")) / len(sorted_values)
+
+
+def prerank_gsea(ranking: Union[pd.Series, Mapping], gene_sets: Mapping, weight: float = 1.0,
+                 min_size: int = 15, max_size: int = 500, n_permutations: int = 1000, seed: int = 0,
+                 block_size: int = 100, n_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Preranked gene set enrichment analysis (GSEA) of a gene -> score ranking.
+
+    Enrichment scores follow the weighted Kolmogorov-Smirnov running sum of GSEA and are
+    computed for all gene sets together (see `running_sum_extremes`). Significance comes
+    from gene-label permutations, drawn in blocks that are spread over a process pool and
+    seeded from one `SeedSequence`, so results depend on `seed` only. Nothing is written
+    to disk.
+
+    Args:
+        ranking (Union[pd.Series, Mapping]): Gene -> score (e.g. log2 fold change).
+        gene_sets (Mapping): Pathway -> genes (e.g. `KeggAnalysis.gene_set`).
+        weight (float): Exponent p of the score weights |score|^p (0 gives the classic
+                        Kolmogorov-Smirnov statistic).
+        min_size (int): Gene sets with fewer ranked genes are skipped.
+        max_size (int): Gene sets with more ranked genes are skipped.
+        n_permutations (int): Number of permutations.
+        seed (int): Seed of the permutations.
+        block_size (int): Permutations per block.
+        n_workers (Optional[int]): Number of worker processes. Defaults to the CPU count;
+                                   use 1 to run in the current process.
+
+    Returns:
+        pd.DataFrame: One row per tested gene set with the columns of `PRERANK_COLUMNS`
+        (as in gseapy's `res2d`), sorted by FDR and nominal p-value.
+    """
+    if n_permutations < 1 or block_size < 1:
+        raise ValueError("n_permutations and block_size must be positive integers.")
+    if min_size < 1 or max_size < min_size:
+        raise ValueError("Gene set sizes must satisfy 1 <= min_size <= max_size.")
+
+    ranked = prepare_ranking(ranking)
+    gene_ranks = {gene: i for i, gene in enumerate(ranked.index)}
+    terms, members, ranks, starts = _layout(gene_ranks, gene_sets, min_size, max_size)
+    if not terms:
+        return pd.DataFrame(columns=PRERANK_COLUMNS)
+    if any(len(m) == len(ranked) for m in members):
+        raise ValueError("A gene set contains every ranked gene; its enrichment score is undefined.")
+
+    weights = np.abs(ranked.to_numpy()) ** weight
+    scores, peaks, troughs = running_sum_extremes(ranks[None, :], starts, weights, locate=True)
+    scores, peaks, troughs = scores[0], peaks[0], troughs[0]
+
+    blocks = [block_size] * (n_permutations // block_size)
+    if n_permutations % block_size:
+        blocks.append(n_permutations % block_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(blocks))
+
+    n_workers = min(n_workers or os.cpu_count() or 1, len(blocks))
+    if n_workers == 1:
+        _init_prerank_worker(ranks, starts, weights)
+        null = np.vstack([_prerank_block(s, b) for s, b in zip(seeds, blocks)])
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_prerank_worker,
+                                 initargs=(ranks, starts, weights)) as executor:
+            null = np.vstack(list(executor.map(_prerank_block, seeds, blocks)))
+
+    # Nominal p-value against the null scores of the same set and sign
+    positive = scores >= 0
+    same_sign = np.where(positive, null >= 0, null < 0)
+    beyond = np.where(positive, null >= scores, null <= scores) & same_sign
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pvalues = beyond.sum(axis=0) / same_sign.sum(axis=0)
+
+    # FDR: null NES of all sets beyond each NES, relative to the observed NES beyond it
+    nes, null_nes = _normalize(scores, null)
+    null_nes = null_nes[np.isfinite(null_nes)]
+    fdr = np.full(len(terms), np.nan)
+    for sign in (1, -1):
+        selected = (nes >= 0) if sign == 1 else (nes < 0)
+        if not selected.any():
+            continue
+        null_side = np.sort(sign * null_nes[(null_nes >= 0) if sign == 1 else (null_nes < 0)])
+        observed_side = np.sort(sign * nes[selected & np.isfinite(nes)])
+        thresholds = sign * nes[selected]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fdr[selected] = np.minimum(_upper_fraction(null_side, thresholds)
+                                       / _upper_fraction(observed_side, thresholds), 1.0)
+
+    # Leading edge: hits up to the peak (positive scores) or from the trough (negative)
+    n = len(ranked)
+    genes = ranked.index.to_numpy()
+    lead_genes, tag, gene_pct = [], [], []
+    for i, hits in enumerate(members):
+        if positive[i]:
+            leading = hits[:peaks[i] + 1]
+            gene_pct.append((leading[-1] + 1) / n)
+        else:
+            leading = hits[troughs[i]:]
+            gene_pct.append((n - leading[0]) / n)
+        lead_genes.append(";".join(genes[leading]))
+        tag.append(len(leading) / len(hits))
+
+    result = pd.DataFrame({
+        "Term": terms,
+        "ES": scores,
+        "NES": nes,
+        "NOM p-val": pvalues,
+        "FDR q-val": fdr,
+        "Size": [len(m) for m in members],
+        "Tag %": tag,
+        "Gene %": gene_pct,
+        "Lead_genes": lead_genes,
+    })
+    return result.sort_values(["FDR q-val", "NOM p-val", "Term"]).reset_index(drop=True)
@@ -0,0 +1,322 @@
+import gzip
+import os
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+import numpy as np
+import pandas as pd
+from .lazy_import import lazy_import
+
+# Biopython's aligner is only imported when hits are aligned
+Align = lazy_import("Bio.Align")
+substitution_matrices = lazy_import("Bio.Align.substitution_matrices")
+
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+BITS_PER_RESIDUE = 5
+INVALID = 255
+
+# Residue code lookup table; ambiguous residues (X, B, Z, U, *) break k-mers
+_CODES = np.full(256, INVALID, dtype=np.uint8)
+for _i, _aa in enumerate(AMINO_ACIDS):
+    _CODES[ord(_aa)] = _i
+    _CODES[ord(_aa.lower())] = _i
+
+
+def iter_fasta(fasta_file: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yields (header, sequence) records of a FASTA file (plain or gzip-compressed).
+
+    The header is returned without the leading '>'.
+    """
+    if not os.path.exists(fasta_file):
+        raise FileNotFoundError(f"FASTA file not found: {fasta_file}")
+
+    opener = gzip.open if fasta_file.endswith(".gz") else open
+    header = None
+    chunks: List[str] = []
+    with opener(fasta_file, "rt") as f:
+        for line in f:
+            line = line.rstrip()
+            if line.startswith(">"):
+                if header is not None:
+                    yield header, "".join(chunks)
+                header, chunks = line[1:], []
+            elif header is not None and line:
+                chunks.append(line)
+    if header is not None:
+        yield header, "".join(chunks)
+
+
+def _encode(sequences: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Concatenates sequences into one residue code array separated by INVALID codes.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The codes and the sequence index of every position.
+    """
+    joined = "*".join(sequences) + "*"
+    codes = _CODES[np.frombuffer(joined.encode("ascii", "replace"), dtype=np.uint8)]
+    lengths = np.fromiter((len(s) + 1 for s in sequences), dtype=np.int64, count=len(sequences))
+    owners = np.repeat(np.arange(len(sequences), dtype=np.int64), lengths)
+    return codes, owners
+
+
+def _kmers(codes: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Packs every valid k-mer of a code array into an integer.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The packed k-mers and their start positions.
+    """
+    n = len(codes) - k + 1
+    if n <= 0:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+
+    invalid = np.concatenate([[0], np.cumsum(codes == INVALID)])
+    valid = (invalid[k:] - invalid[:-k]) == 0
+    values = np.where(codes == INVALID, 0, codes).astype(np.uint64)
+
+    packed = np.zeros(n, dtype=np.uint64)
+    for i in range(k):
+        packed = (packed << np.uint64(BITS_PER_RESIDUE)) | values[i:i + n]
+    positions = np.flatnonzero(valid)
+    return packed[positions], positions
+
+
+def _check_key_bits(k: int, n_owners: int) -> None:
+    """
+    Checks that k-mers of length `k` combined with `n_owners` sequence numbers fit the
+    64-bit integer keys used to sort (k-mer, sequence) pairs.
+    """
+    if not isinstance(k, (int, np.integer)) or not 3 <= k <= 8:
+        raise ValueError("k must be an integer between 3 and 8.")
+    if BITS_PER_RESIDUE * k + max(int(n_owners) - 1, 0).bit_length() > 64:
+        raise ValueError(f"{n_owners} sequences with k={k} do not fit in 64-bit k-mer keys.")
+
+
+def _check_unique_names(items: List[Tuple[str, str]]) -> List[str]:
+    """Returns the query names, rejecting repeated names (their hits could not be told apart)."""
+    names = [name for name, _ in items]
+    if len(set(names)) != len(names):
+        repeated = sorted(name for name, count in Counter(names).items() if count > 1)
+        raise ValueError(f"Query names must be unique; repeated: {repeated}")
+    return names
+
+
+def _sorted_unique(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sorts integer keys and returns the distinct keys with the index of their first occurrence.
+
+    A plain sort is used instead of `np.unique`, whose hash-based path is much slower on
+    the tens of millions of keys of a protein database.
+    """
+    values = np.sort(values)
+    first = np.empty(len(values), dtype=bool)
+    first[:1] = True
+    np.not_equal(values[1:], values[:-1], out=first[1:])
+    starts = np.flatnonzero(first)
+    return values[starts], starts
+
+
+class ProteinKmerIndex:
+    """
+    Inverted index of protein k-mers for fast candidate search, e.g. over VFDB proteins.
+
+    Every k-mer is packed into an integer (5 bits per residue). The index keeps the sorted
+    distinct k-mers, CSR-style offsets into an array of postings (target sequence numbers)
+    and the target sequences themselves, so it can be persisted as a single `.npz` file.
+    Queries are ranked by the number of distinct k-mers they share with each target.
+
+    Attributes:
+        k (int): k-mer length.
+        ids (np.ndarray): Target identifiers (FASTA headers up to the first space).
+    """
+
+    def __init__(self, k: int, ids: np.ndarray, kmers: np.ndarray, offsets: np.ndarray,
+                 postings: np.ndarray, residues: np.ndarray, sequence_offsets: np.ndarray):
+        _check_key_bits(k, len(ids))
+        self.k = k
+        self.ids = ids
+        self.kmers = kmers
+        self.offsets = offsets
+        self.postings = postings
+        self.residues = residues
+        self.sequence_offsets = sequence_offsets
+
+    @classmethod
+    def build(cls, records: Iterable[Tuple[str, str]], k: int = 5) -> "ProteinKmerIndex":
+        """
+        Builds the index from (header, sequence) records.
+
+        Args:
+            records (Iterable[Tuple[str, str]]): FASTA records, e.g. from `iter_fasta`.
+            k (int): k-mer length, between 3 and 8.
+
+        Raises:
+            ValueError: If `k` is out of range or the packed (k-mer, target) keys would not
+                        fit in 64 bits.
+        """
+        _check_key_bits(k, 0)
+
+        headers, sequences = [], []
+        for header, sequence in records:
+            headers.append(header.split(" ", 1)[0])
+            sequences.append(sequence.upper())
+        if not sequences:
+            raise ValueError("No sequences to index.")
+        _check_key_bits(k, len(sequences))
+
+        codes, owners = _encode(sequences)
+        kmers, positions = _kmers(codes, k)
+
+        # Distinct (k-mer, target) pairs, sorted by k-mer then target
+        n_targets = np.uint64(len(sequences))
+        pairs, _ = _sorted_unique(kmers * n_targets + owners[positions].astype(np.uint64))
+        postings = (pairs % n_targets).astype(np.int32)
+        distinct, starts = _sorted_unique(pairs // n_targets)
+        offsets = np.append(starts, len(postings)).astype(np.int64)
+
+        residues = np.frombuffer("".join(sequences).encode("ascii", "replace"), dtype=np.uint8)
+        sequence_offsets = np.concatenate([[0], np.cumsum([len(s) for s in sequences])]).astype(np.int64)
+        return cls(k, np.array(headers), distinct, offsets, postings, residues, sequence_offsets)
+
+    @classmethod
+    def from_fasta(cls, fasta_file: str, k: int = 5) -> "ProteinKmerIndex":
+        """Builds the index from a (gzip-compressed) protein FASTA file."""
+        return cls.build(iter_fasta(fasta_file), k=k)
+
+    def save(self, path: str) -> None:
+        """Persists the index to an uncompressed `.npz` file."""
+        np.savez(path, k=np.int64(self.k), ids=self.ids, kmers=self.kmers, offsets=self.offsets,
+                 postings=self.postings, residues=self.residues, sequence_offsets=self.sequence_offsets)
+
+    @classmethod
+    def load(cls, path: str) -> "ProteinKmerIndex":
+        """Loads an index written by `save`."""
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Index file not found: {path}")
+        with np.load(path, allow_pickle=False) as data:
+            return cls(int(data["k"]), data["ids"], data["kmers"], data["offsets"], data["postings"],
+                       data["residues"], data["sequence_offsets"])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def sequence(self, row: int) -> str:
+        """Returns the sequence of the target at `row`."""
+        start, end = self.sequence_offsets[row], self.sequence_offsets[row + 1]
+        return self.residues[start:end].tobytes().decode("ascii")
+
+    def search(self, queries: Union[Dict[str, str], List[Tuple[str, str]]], top_n: int = 5,
+               min_shared: int = 2) -> pd.DataFrame:
+        """
+        Ranks targets for every query protein by shared distinct k-mers.
+
+        All queries are processed together: their k-mers are located with a binary search
+        over the sorted index and the (query, target) pairs are counted in one pass, so whole
+        proteomes are searched in seconds.
+
+        Args:
+            queries (Union[Dict[str, str], List[Tuple[str, str]]]): Query names and sequences;
+                names must be unique.
+            top_n (int): Maximum number of targets kept per query.
+            min_shared (int): Minimum number of shared k-mers for a hit.
+
+        Returns:
+            pd.DataFrame: Columns 'Query', 'Target', 'Row', 'Shared k-mers' and 'Coverage'
+                          (shared k-mers / distinct query k-mers), best hits first.
+        """
+        if top_n < 1:
+            raise ValueError("top_n must be a positive integer.")
+        columns = ["Query", "Target", "Row", "Shared k-mers", "Coverage"]
+        items = list(queries.items()) if isinstance(queries, dict) else list(queries)
+        if not items:
+            return pd.DataFrame(columns=columns)
+
+        names = _check_unique_names(items)
+        _check_key_bits(self.k, len(items))
+        codes, owners = _encode([sequence.upper() for _, sequence in items])
+        kmers, positions = _kmers(codes, self.k)
+
+        # Distinct k-mers per query
+        shift = np.uint64(BITS_PER_RESIDUE * self.k)
+        keys, _ = _sorted_unique((owners[positions].astype(np.uint64) << shift) | kmers)
+        query_ids = (keys >> shift).astype(np.int64)
+        query_kmers = keys & ((np.uint64(1) << shift) - np.uint64(1))
+        n_query_kmers = np.bincount(query_ids, minlength=len(items))
+
+        # Posting lists of the k-mers present in the index
+        found = np.searchsorted(self.kmers, query_kmers)
+        present = found < len(self.kmers)
+        present[present] = self.kmers[found[present]] == query_kmers[present]
+        found, query_ids = found[present], query_ids[present]
+        starts, lengths = self.offsets[found], self.offsets[found + 1] - self.offsets[found]
+        total = int(lengths.sum())
+        if total == 0:
+            return pd.DataFrame(columns=columns)
+
+        gather = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        targets = self.postings[gather].astype(np.int64)
+        hit_queries = np.repeat(query_ids, lengths)
+
+        pairs, starts = _sorted_unique(hit_queries * len(self) + targets)
+        shared = np.diff(np.append(starts, total))
+        keep = shared >= min_shared
+        pairs, shared = pairs[keep], shared[keep]
+        hit_queries, targets = pairs // len(self), pairs % len(self)
+
+        # Best hits first within each query, then keep the top_n
+        order = np.lexsort((targets, -shared, hit_queries))
+        hit_queries, targets, shared = hit_queries[order], targets[order], shared[order]
+        group_start = np.searchsorted(hit_queries, hit_queries)
+        keep = (np.arange(len(hit_queries)) - group_start) < top_n
+        hit_queries, targets, shared = hit_queries[keep], targets[keep], shared[keep]
+
+        return pd.DataFrame({
+            "Query": np.asarray(names, dtype=object)[hit_queries],
+            "Target": self.ids[targets],
+            "Row": targets,
+            "Shared k-mers": shared,
+            "Coverage": shared / n_query_kmers[hit_queries],
+        })
+
+    def align_hits(self, hits: pd.DataFrame, queries: Union[Dict[str, str], List[Tuple[str, str]]]) -> pd.DataFrame:
+        """
+        Adds local alignment scores (BLOSUM62) and identities to the hits of `search`.
+
+        Args:
+            hits (pd.DataFrame): Hits returned by `search`.
+            queries (Union[Dict[str, str], List[Tuple[str, str]]]): The searched queries.
+
+        Returns:
+            pd.DataFrame: The hits with 'Alignment score' and 'Identity' columns.
+        """
+        hits = hits.copy()
+        if hits.empty:
+            hits["Alignment score"] = pd.Series(dtype=float)
+            hits["Identity"] = pd.Series(dtype=float)
+            return hits
+
+        items = list(queries.items()) if isinstance(queries, dict) else list(queries)
+        sequences = dict(zip(_check_unique_names(items), (sequence for _, sequence in items)))
+        aligner = Align.PairwiseAligner()
+        aligner.mode = "local"
+        aligner.substitution_matrix = substitution_matrices.load("BLOSUM62")
+        aligner.open_gap_score = -11
+        aligner.extend_gap_score = -1
+
+        scores, identities = [], []
+        for query, row in zip(hits["Query"], hits["Row"]):
+            query_sequence = sequences[query].upper()
+            target_sequence = self.sequence(int(row))
+            alignment = aligner.align(query_sequence, target_sequence)[0]
+            identical = aligned = 0
+            for (q_start, q_end), (t_start, t_end) in zip(*alignment.aligned):
+                aligned += q_end - q_start
+                identical += sum(a == b for a, b in zip(query_sequence[q_start:q_end],
+                                                        target_sequence[t_start:t_end]))
+            scores.append(alignment.score)
+            identities.append(identical / aligned if aligned else 0.0)
+
+        hits["Alignment score"] = scores
+        hits["Identity"] = identities
+        return hits
@@ -0,0 +1,200 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def encode_antibiotics(arg_df: pd.DataFrame) -> Tuple[np.ndarray, List[str]]:
+    """
+    Split the comma-joined 'Antibiotics' column of an ARG DataFrame once into integer codes.
+
+    Args:
+        arg_df (pd.DataFrame): ARG DataFrame (e.g. `CARDAnalysis.ARGdf`).
+
+    Returns:
+        Tuple[np.ndarray, List[str]]: An (n, 2) array of (row position, antibiotic code)
+        pairs, and the antibiotic vocabulary indexed by code.
+    """
+    if "Antibiotics" not in arg_df.columns:
+        raise ValueError("DataFrame must contain an 'Antibiotics' column.")
+
+    antibiotics = arg_df["Antibiotics"].reset_index(drop=True).dropna()
+    exploded = antibiotics.astype(str).str.split(",").explode().str.strip()
+    exploded = exploded[exploded != ""]
+    codes, vocabulary = pd.factorize(exploded)
+    pairs = np.column_stack([exploded.index.to_numpy(dtype=np.int64), codes.astype(np.int64)])
+    return pairs, list(vocabulary)
+
+
+class ResistanceCohort:
+    """
+    Sparse sample x antibiotic and sample x ARG matrices for cohorts of isolates.
+
+    Each sample's ARG results are split once when added and stored as integer codes
+    (sample, ARG, antibiotic). Frequencies, prevalence and co-occurrence are then computed
+    with sparse matrix operations instead of re-splitting strings per analysis.
+
+    Attributes:
+        samples (List[str]): Sample names, indexed by row of the matrices.
+        antibiotics (List[str]): Antibiotic names, indexed by column of the antibiotic matrix.
+        args (List[str]): ARG identifiers ('Gene ID'), indexed by column of the ARG matrix.
+    """
+
+    def __init__(self):
+        self.samples: List[str] = []
+        self._sample_rows: Dict[str, int] = {}
+        self.antibiotics: List[str] = []
+        self.args: List[str] = []
+        self._antibiotic_codes: Dict[str, int] = {}
+        self._arg_codes: Dict[str, int] = {}
+        self._arg_counts: List[int] = []
+        # Triplets of the sparse matrices, one array per added sample
+        self._arg_rows: List[np.ndarray] = []
+        self._arg_cols: List[np.ndarray] = []
+        self._abx_rows: List[np.ndarray] = []
+        self._abx_cols: List[np.ndarray] = []
+        self._abx_args: List[np.ndarray] = []
+
+    @classmethod
+    def from_samples(cls, arg_tables: Dict[str, pd.DataFrame]) -> "ResistanceCohort":
+        """Build a cohort from a dictionary of sample names to ARG DataFrames."""
+        cohort = cls()
+        for sample, arg_df in arg_tables.items():
+            cohort.add_sample(sample, arg_df)
+        return cohort
+
+    @staticmethod
+    def _encode(values, vocabulary: List[str], codes: Dict[str, int]) -> np.ndarray:
+        """Map values to integer codes, extending the vocabulary with unseen values."""
+        encoded = np.empty(len(values), dtype=np.int64)
+        for i, value in enumerate(values):
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(vocabulary)
+                vocabulary.append(value)
+            encoded[i] = code
+        return encoded
+
+    def add_sample(self, sample: str, arg_df: pd.DataFrame) -> None:
+        """
+        Add the ARG results of one sample.
+
+        Args:
+            sample (str): Unique sample name.
+            arg_df (pd.DataFrame): ARG DataFrame with 'Gene ID' and 'Antibiotics' columns.
+        """
+        if not isinstance(sample, str) or not sample:
+            raise ValueError("sample must be a non-empty string.")
+        if sample in self._sample_rows:
+            raise ValueError(f"Sample '{sample}' was already added.")
+        if arg_df.empty:
+            arg_df = pd.DataFrame(columns=["Gene ID", "Antibiotics"])
+        if "Gene ID" not in arg_df.columns:
+            raise ValueError("DataFrame must contain a 'Gene ID' column.")
+
+        row = len(self.samples)
+        arg_codes = self._encode(arg_df["Gene ID"].astype(str).tolist(), self.args, self._arg_codes)
+
+        pairs, vocabulary = encode_antibiotics(arg_df)
+        local_to_global = self._encode(vocabulary, self.antibiotics, self._antibiotic_codes)
+
+        self.samples.append(sample)
+        self._sample_rows[sample] = row
+        self._arg_counts.append(len(arg_df))
+        self._arg_rows.append(np.full(len(arg_codes), row, dtype=np.int64))
+        self._arg_cols.append(arg_codes)
+        self._abx_rows.append(np.full(len(pairs), row, dtype=np.int64))
+        self._abx_cols.append(local_to_global[pairs[:, 1]])
+        self._abx_args.append(arg_codes[pairs[:, 0]])
+
+    def _check_not_empty(self) -> None:
+        if not self.samples:
+            raise ValueError("The cohort has no samples. Call add_sample() first.")
+
+    def sample_antibiotic_matrix(self, binary: bool = False) -> sparse.csr_matrix:
+        """
+        Sparse sample x antibiotic matrix.
+
+        Args:
+            binary (bool): If True, entries are 1 when any ARG of the sample confers resistance
+                           to the antibiotic; otherwise they count those ARGs.
+        """
+        self._check_not_empty()
+        rows = np.concatenate(self._abx_rows)
+        cols = np.concatenate(self._abx_cols)
+        matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                                   shape=(len(self.samples), len(self.antibiotics)))
+        matrix.sum_duplicates()
+        if binary:
+            matrix.data[:] = 1
+        return matrix
+
+    def sample_arg_matrix(self) -> sparse.csr_matrix:
+        """Sparse binary sample x ARG matrix."""
+        self._check_not_empty()
+        rows = np.concatenate(self._arg_rows)
+        cols = np.concatenate(self._arg_cols)
+        matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                                   shape=(len(self.samples), len(self.args)))
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        return matrix
+
+    def arg_antibiotic_matrix(self) -> sparse.csr_matrix:
+        """Sparse binary ARG x antibiotic matrix (which antibiotics each ARG confers resistance to)."""
+        self._check_not_empty()
+        rows = np.concatenate(self._abx_args)
+        cols = np.concatenate(self._abx_cols)
+        matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                                   shape=(len(self.args), len(self.antibiotics)))
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        return matrix
+
+    def antibiotic_frequencies(self, sample: Optional[str] = None) -> pd.DataFrame:
+        """
+        Percentage of each sample's ARGs that confer resistance to each antibiotic.
+
+        This is the quantity shown by `CARDAnalysis.plot_antibiotic_frequencies`.
+
+        Args:
+            sample (Optional[str]): If given, return a single-row frame for that sample.
+
+        Returns:
+            pd.DataFrame: Samples x antibiotics frequencies (%).
+        """
+        if sample is not None and sample not in self._sample_rows:
+            raise KeyError(f"Sample '{sample}' not found in the cohort.")
+        counts = self.sample_antibiotic_matrix()
+        n_args = np.asarray(self._arg_counts, dtype=float)
+        scale = np.divide(100.0, n_args, out=np.zeros_like(n_args), where=n_args > 0)
+        if sample is not None:
+            row = self._sample_rows[sample]
+            frequencies = counts[[row]] * scale[row]
+            return pd.DataFrame(frequencies.toarray(), index=[sample], columns=self.antibiotics)
+        frequencies = sparse.diags(scale) @ counts
+        return pd.DataFrame(frequencies.toarray(), index=self.samples, columns=self.antibiotics)
+
+    def prevalence(self) -> pd.Series:
+        """
+        Fraction of samples carrying at least one ARG for each antibiotic, sorted descending.
+        """
+        presence = self.sample_antibiotic_matrix(binary=True)
+        prevalence = np.asarray(presence.sum(axis=0)).ravel() / len(self.samples)
+        return pd.Series(prevalence, index=self.antibiotics, name="Prevalence").sort_values(ascending=False)
+
+    def arg_prevalence(self) -> pd.Series:
+        """Fraction of samples carrying each ARG, sorted descending."""
+        presence = self.sample_arg_matrix()
+        prevalence = np.asarray(presence.sum(axis=0)).ravel() / len(self.samples)
+        return pd.Series(prevalence, index=self.args, name="Prevalence").sort_values(ascending=False)
+
+    def cooccurrence(self) -> pd.DataFrame:
+        """
+        Number of samples with resistance to both antibiotics, for every antibiotic pair.
+
+        The diagonal holds the number of samples with resistance to each antibiotic.
+        """
+        presence = self.sample_antibiotic_matrix(binary=True)
+        cooccurrence = (presence.T @ presence).toarray()
+        return pd.DataFrame(cooccurrence, index=self.antibiotics, columns=self.antibiotics)
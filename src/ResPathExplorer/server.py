@@ -0,0 +1,289 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+import pandas as pd
+
+from .aro_ontology import AROOntology
+from .CARDAnalysis import CARDAnalysis
+from .VFDBAnalysis import VFDBAnalysis
+from .KeggAnalysis import KeggAnalysis
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+ENDPOINTS = ("annotate", "search", "enrich")
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _gene_list(payload: Dict[str, Any], key: str = "genes", required: bool = True) -> Optional[List[str]]:
+    """Validate a list of gene names in a request payload."""
+    genes = payload.get(key)
+    if genes is None and not required:
+        return None
+    if not isinstance(genes, list) or not all(isinstance(g, str) for g in genes):
+        raise ValueError(f"'{key}' must be a list of gene names.")
+    return genes
+
+
+def _parameter(payload: Dict[str, Any], key: str, default, kind):
+    """Validate a numeric request parameter (`kind` is int or float)."""
+    value = payload.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"'{key}' must be a number.")
+    try:
+        return kind(value)
+    except ValueError:
+        raise ValueError(f"'{key}' must be a number.")
+
+
+def _optional_string(payload: Dict[str, Any], key: str, default: Optional[str] = None) -> Optional[str]:
+    """Validate an optional string request parameter."""
+    value = payload.get(key, default)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"'{key}' must be a string.")
+    return value
+
+
+class AnnotationService:
+    """
+    Databases loaded once and shared by every request of the annotation server.
+
+    The CARD ontology, the VFDB gene table (with its organism index) and one
+    `KeggAnalysis` per organism are kept in memory, so requests only pay for the lookup.
+    All methods only read the shared state and can be called from several threads.
+
+    Attributes:
+        ontology (Optional[AROOntology]): CARD ontology, enables `annotate`.
+        vfdb (Optional[VFDBAnalysis]): VFDB with `df_genes` loaded, enables `search`.
+        kegg (Dict[str, KeggAnalysis]): KEGG gene sets per organism, enables `enrich`.
+        overrides_file (Optional[str]): Curation file applied to every ARG annotation.
+        overrides (Optional[pd.DataFrame]): The curations of `overrides_file`, read once.
+    """
+
+    def __init__(self, ontology: Optional[AROOntology] = None, vfdb: Optional[VFDBAnalysis] = None,
+                 kegg: Optional[Dict[str, KeggAnalysis]] = None, overrides_file: Optional[str] = None):
+        self.ontology = ontology
+        self.vfdb = vfdb
+        self.kegg = dict(kegg or {})
+        self.overrides_file = overrides_file
+        self.overrides = CARDAnalysis.load_overrides(overrides_file) if overrides_file else None
+        if vfdb is not None:
+            if vfdb.df_genes is None:
+                raise ValueError("VFDB gene data not loaded. Call load_and_process() first.")
+            vfdb.get_organism_index()
+
+    @classmethod
+    def from_config(cls, card_obo: Optional[str] = None, card_overrides: Optional[str] = None,
+                    vfdb_dir: Optional[str] = None, gmts: Optional[Dict[str, str]] = None,
+                    gmt_filter: Optional[List[str]] = None) -> "AnnotationService":
+        """
+        Load the databases of the server.
+
+        Args:
+            card_obo (Optional[str]): Path to `aro.obo`.
+            card_overrides (Optional[str]): Curation TSV applied to ARG annotations.
+            vfdb_dir (Optional[str]): VFDB directory (downloaded if missing).
+            gmts (Optional[Dict[str, str]]): KEGG organism -> GMT file.
+            gmt_filter (Optional[List[str]]): Pathway ID/name patterns of the gene sets.
+        """
+        if not card_obo and not vfdb_dir and not gmts:
+            raise ValueError("Load at least one database: CARD ontology, VFDB directory or KEGG GMT.")
+
+        ontology = AROOntology(card_obo) if card_obo else None
+        vfdb = None
+        if vfdb_dir:
+            vfdb = VFDBAnalysis(db_dir=vfdb_dir)
+            vfdb.download_data()
+            vfdb.load_and_process()
+        kegg = {organism: KeggAnalysis(organism, gmt, use_existing_gmt=True, gmt_filter=gmt_filter)
+                for organism, gmt in (gmts or {}).items()}
+        return cls(ontology=ontology, vfdb=vfdb, kegg=kegg, overrides_file=card_overrides)
+
+    def databases(self) -> Dict[str, Any]:
+        """Summary of the loaded databases."""
+        return {
+            "card": len(self.ontology) if self.ontology is not None else None,
+            "vfdb": len(self.vfdb.df_genes) if self.vfdb is not None else None,
+            "kegg": {organism: len(kegg.gene_set) for organism, kegg in self.kegg.items()},
+        }
+
+    def annotate(self, genes: List[str]) -> pd.DataFrame:
+        """Annotate genes against the CARD ontology (see `CARDAnalysis`)."""
+        if self.ontology is None:
+            raise ValueError("The CARD ontology is not loaded.")
+        return CARDAnalysis(genes, has_CARDdata=True, ontology=self.ontology,
+                            overrides_file=self.overrides).ARGdf
+
+    def search(self, genes: List[str], bacteria, level: str = "taxon") -> pd.DataFrame:
+        """Search virulence genes of one or more organisms (see `VFDBAnalysis.search_virulence_genes`)."""
+        if self.vfdb is None:
+            raise ValueError("VFDB is not loaded.")
+        return self.vfdb.search_virulence_genes(genes, bacteria, level=level)
+
+    def enrich(self, organism: Optional[str], genes: List[str], cutoff: float = 0.05, top: int = 20,
+               background: Optional[List[str]] = None):
+        """
+        KEGG pathway enrichment on the gene sets of an organism (see `KeggAnalysis.enrich`).
+
+        The organism may be omitted when a single one is loaded.
+        """
+        if not self.kegg:
+            raise ValueError("No KEGG gene sets are loaded.")
+        if organism is None and len(self.kegg) == 1:
+            organism = next(iter(self.kegg))
+        if organism not in self.kegg:
+            raise ValueError(f"Organism '{organism}' is not loaded. Use one of {sorted(self.kegg)}.")
+        return self.kegg[organism].enrich(genes, cutoff, top, genes_background=background)
+
+    def handle(self, endpoint: str, payload: Dict[str, Any]) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """
+        Run a request of the server.
+
+        Args:
+            endpoint (str): "annotate", "search" or "enrich".
+            payload (Dict[str, Any]): Decoded JSON body of the request.
+
+        Returns:
+            Tuple[pd.DataFrame, Dict[str, Any]]: The result table and extra JSON fields.
+        """
+        if not isinstance(payload, dict):
+            raise ValueError("The request body must be a JSON object.")
+
+        if endpoint == "annotate":
+            return self.annotate(_gene_list(payload)), {}
+        if endpoint == "search":
+            if "bacteria" not in payload:
+                raise ValueError("'bacteria' is required.")
+            return self.search(_gene_list(payload), payload["bacteria"],
+                               _optional_string(payload, "level", "taxon")), {}
+        if endpoint == "enrich":
+            result = self.enrich(_optional_string(payload, "organism"), _gene_list(payload),
+                                 cutoff=_parameter(payload, "cutoff", 0.05, float),
+                                 top=_parameter(payload, "top", 20, int),
+                                 background=_gene_list(payload, "background", required=False))
+            extra = {
+                "top_pathways": result.top_pathways["Term"].tolist(),
+                "paths_genes": {k: list(v) for k, v in result.paths_genes.items()},
+                "from_cache": result.from_cache,
+            }
+            return result.results, extra
+        raise ValueError(f"Unknown endpoint '{endpoint}'. Use one of {list(ENDPOINTS)}.")
+
+
+class AnnotationRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP handler of the annotation server.
+
+    Endpoints:
+        GET  /health    Loaded databases.
+        POST /annotate  {"genes": [...]} -> ARG annotations.
+        POST /search    {"genes": [...], "bacteria": "...", "level": "taxon"} -> virulence genes.
+        POST /enrich    {"genes": [...], "organism": "...", "cutoff": 0.05, "top": 20,
+                         "background": [...]} -> enriched pathways.
+
+    Tables are returned as JSON ({"rows": [...], ...}) or, when the request accepts
+    `application/vnd.apache.arrow.stream` and pyarrow is installed, as an Arrow stream
+    whose schema metadata holds the other fields of the JSON response under "respath".
+    """
+
+    server_version = "ResPathExplorer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:
+        if getattr(self.server, "verbose", False):
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: bytes, content_type: str = JSON_MEDIA_TYPE) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, value: Dict[str, Any]) -> None:
+        self._send(status, json.dumps(value).encode("utf-8"))
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") == "/health":
+            self._send_json(200, {"status": "ok", "databases": self.server.service.databases()})
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self) -> None:
+        endpoint = self.path.strip("/")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError
+        except ValueError:
+            # The body cannot be delimited, so the connection cannot be reused
+            self.close_connection = True
+            self._send_json(400, {"error": f"Invalid Content-Length: {self.headers.get('Content-Length')}"})
+            return
+        body = self.rfile.read(length)
+        if endpoint not in ENDPOINTS:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+
+        start = time.perf_counter()
+        try:
+            payload = json.loads(body or b"{}")
+            table, extra = self.server.service.handle(endpoint, payload)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+
+        if ARROW_MEDIA_TYPE in (self.headers.get("Accept") or ""):
+            if not HAS_ARROW:
+                self._send_json(406, {"error": "Arrow responses need pyarrow to be installed."})
+                return
+            extra["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            sink = pyarrow.BufferOutputStream()
+            arrow_table = pyarrow.Table.from_pandas(table, preserve_index=False)
+            metadata = dict(arrow_table.schema.metadata or {})
+            metadata[b"respath"] = json.dumps(extra).encode("utf-8")
+            arrow_table = arrow_table.replace_schema_metadata(metadata)
+            with pyarrow.ipc.new_stream(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+            self._send(200, sink.getvalue().to_pybytes(), ARROW_MEDIA_TYPE)
+            return
+
+        rows = table.to_json(orient="records") if not table.empty else "[]"
+        extra["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        body = '{"rows":' + rows + "," + json.dumps(extra)[1:]
+        self._send(200, body.encode("utf-8"))
+
+
+def make_server(service: AnnotationService, host: str = "127.0.0.1", port: int = 8000,
+                verbose: bool = False) -> ThreadingHTTPServer:
+    """
+    Create a threaded HTTP server answering requests from `service`.
+
+    Use port 0 to pick a free port (see `server.server_address`).
+    """
+    server = ThreadingHTTPServer((host, port), AnnotationRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+def serve(service: AnnotationService, host: str = "127.0.0.1", port: int = 8000, verbose: bool = True) -> None:
+    """Serve requests until interrupted."""
+    server = make_server(service, host, port, verbose=verbose)
+    print(f"Serving ResPathExplorer annotations on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,231 @@
+import bz2
+import gzip
+import lzma
+import os
+from typing import Dict, Iterator, List
+from urllib.parse import unquote
+import pandas as pd
+
+from .artifact_cache import HAS_PARQUET
+from .gene_annotation_index import GeneAnnotationIndex, normalize_genes
+
+INPUT_FORMATS = ("text", "tsv", "gff")
+COMPRESSED = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+COUNT_COLUMNS = ("VF organisms", "KEGG pathway count")
+
+
+def detect_format(path: str) -> str:
+    """Guess the input format of a gene file from its extension."""
+    name = path.lower()
+    root, suffix = os.path.splitext(name)
+    if suffix in COMPRESSED:
+        name = root
+    if name.endswith((".gff", ".gff3")):
+        return "gff"
+    if name.endswith(".tsv"):
+        return "tsv"
+    return "text"
+
+
+def _read_text(handle) -> Iterator[str]:
+    """One gene per line; blank lines and '#' comments are skipped."""
+    for line in handle:
+        gene = line.strip()
+        if gene and not gene.startswith("#"):
+            yield gene
+
+
+def _read_tsv(handle, field: str) -> Iterator[str]:
+    """
+    Gene column of a Prokka or Bakta annotation table.
+
+    Prokka tables start with a header line; Bakta tables start with '#' comments, the
+    last of which is the header. The column is matched case-insensitively.
+    """
+    header = None
+    column = None
+    for line in handle:
+        line = line.rstrip("\r\n")
+        if column is None:
+            if line.startswith("#"):
+                header = line.lstrip("#")
+                continue
+            if header is None:
+                header = line
+                line = None
+            columns = [name.strip() for name in header.split("\t")]
+            names = [name.lower() for name in columns]
+            if field.lower() not in names:
+                raise ValueError(f"Column '{field}' not found in the table header: {columns}")
+            column = names.index(field.lower())
+            if line is None:
+                continue
+        values = line.split("\t")
+        if len(values) > column and values[column].strip():
+            yield values[column].strip()
+
+
+def _read_gff(handle, field: str) -> Iterator[str]:
+    """Values of a GFF3 attribute (e.g. 'gene'); an embedded '##FASTA' section ends the features."""
+    prefix = field + "="
+    for line in handle:
+        if line.startswith("##FASTA"):
+            break
+        if line.startswith("#"):
+            continue
+        columns = line.rstrip("\r\n").split("\t")
+        if len(columns) < 9:
+            continue
+        for attribute in columns[8].split(";"):
+            if attribute.startswith(prefix):
+                value = unquote(attribute[len(prefix):]).strip()
+                if value:
+                    yield value
+                break
+
+
+def iter_gene_chunks(path: str, fmt: str = "auto", chunk_size: int = 100_000,
+                     field: str = "gene") -> Iterator[List[str]]:
+    """
+    Read the gene identifiers of a file in chunks, without loading the whole file.
+
+    Args:
+        path (str): Plain text (one gene per line), Prokka/Bakta TSV or GFF3 file,
+                    optionally compressed (.gz, .bz2, .xz).
+        fmt (str): "text", "tsv", "gff" or "auto" (guessed from the extension).
+        chunk_size (int): Number of identifiers per chunk.
+        field (str): TSV column or GFF attribute holding the identifiers (e.g. "gene" or
+                     "locus_tag"); ignored for plain text.
+
+    Yields:
+        List[str]: Up to `chunk_size` identifiers, in file order.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"File not found: {path}")
+    if fmt == "auto":
+        fmt = detect_format(path)
+    if fmt not in INPUT_FORMATS:
+        raise ValueError(f"Invalid format '{fmt}'. Use one of {list(INPUT_FORMATS)} or 'auto'.")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer.")
+
+    opener = COMPRESSED.get(os.path.splitext(path)[1].lower(), open)
+    with opener(path, "rt", encoding="utf-8") as handle:
+        if fmt == "text":
+            genes = _read_text(handle)
+        elif fmt == "tsv":
+            genes = _read_tsv(handle, field)
+        else:
+            genes = _read_gff(handle, field)
+
+        chunk = []
+        for gene in genes:
+            chunk.append(gene)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+class _ChunkWriter:
+    """Appends annotation chunks to a CSV or Parquet file."""
+
+    def __init__(self, path: str, columns: List[str]):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.parquet = path.endswith(".parquet")
+        if self.parquet and not HAS_PARQUET:
+            raise ValueError("Writing Parquet needs pyarrow; use a .csv output instead.")
+        self.columns = columns
+        self._writer = None
+        self._rows = 0
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if self.parquet:
+            import pyarrow
+            import pyarrow.parquet
+
+            if self._writer is None:
+                schema = pyarrow.schema([(c, pyarrow.int64() if c in COUNT_COLUMNS else pyarrow.string())
+                                         for c in self.columns])
+                self._writer = pyarrow.parquet.ParquetWriter(self.tmp_path, schema)
+            self._writer.write_table(pyarrow.Table.from_pandas(frame, schema=self._writer.schema,
+                                                               preserve_index=False))
+        else:
+            frame.to_csv(self.tmp_path, mode="w" if self._rows == 0 else "a", header=self._rows == 0,
+                         index=False)
+        self._rows += len(frame)
+
+    def close(self) -> None:
+        if self.parquet:
+            if self._writer is None:
+                self.write(pd.DataFrame(columns=self.columns))
+            self._writer.close()
+        elif self._rows == 0:
+            pd.DataFrame(columns=self.columns).to_csv(self.tmp_path, index=False)
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def annotate_stream(path: str, index: GeneAnnotationIndex, out_path: str, fmt: str = "auto",
+                    chunk_size: int = 100_000, field: str = "gene",
+                    annotated_only: bool = True) -> Dict[str, int]:
+    """
+    Annotate the genes of a large file chunk by chunk and write the results incrementally.
+
+    Identifiers are read in chunks (see `iter_gene_chunks`); genes already written from an
+    earlier chunk are skipped, the remaining ones are annotated with one
+    `GeneAnnotationIndex.lookup` and appended to the output. Only the keys of written
+    genes are remembered, so with `annotated_only` memory holds one chunk plus at most
+    the keys of the index, whatever the size of the input. The output only appears at
+    `out_path` once the whole input is processed.
+
+    Args:
+        path (str): Gene file (plain text, Prokka/Bakta TSV or GFF3).
+        index (GeneAnnotationIndex): Annotations to join (e.g. built from CARD and VFDB).
+        out_path (str): Output file; Parquet if it ends with `.parquet` (needs pyarrow),
+                        CSV otherwise.
+        fmt (str): Input format, see `iter_gene_chunks`.
+        chunk_size (int): Number of identifiers read per chunk.
+        field (str): TSV column or GFF attribute holding the identifiers.
+        annotated_only (bool): Only write the genes found in at least one database.
+
+    Returns:
+        Dict[str, int]: Number of identifiers read, of genes looked up ('unique'; with
+        `annotated_only`, a gene missing from the index is looked up again in every
+        chunk it appears in) and of rows written.
+    """
+    directory = os.path.dirname(out_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    writer = _ChunkWriter(out_path, ["Gene"] + list(index.table.columns))
+    seen = set()
+    summary = {"genes": 0, "unique": 0, "written": 0}
+    try:
+        for chunk in iter_gene_chunks(path, fmt, chunk_size, field):
+            summary["genes"] += len(chunk)
+            keys = normalize_genes(chunk)
+            # Set membership per key: O(chunk), unlike isin, which hashes `seen` every chunk
+            first = ~keys.duplicated().to_numpy() & ~keys.map(seen.__contains__).to_numpy(dtype=bool)
+            if not first.any():
+                continue
+            genes = [gene for gene, keep in zip(chunk, first) if keep]
+            summary["unique"] += len(genes)
+
+            annotations = index.lookup(genes, annotated_only=annotated_only)
+            if not annotations.empty:
+                seen.update(normalize_genes(annotations["Gene"]))
+                writer.write(annotations)
+                summary["written"] += len(annotations)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    return summary
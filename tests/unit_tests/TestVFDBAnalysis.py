@@ -1,3 +1,6 @@
+import gzip
+import os
+import tempfile
 import unittest
 from unittest.mock import patch, mock_open, MagicMock
 import pandas as pd
@@ -135,3 +138,127 @@ FHLTGTNGATPTKRSFVNNEWDWIDGNPATADRGYTWKTYAERLEEAGISWICYQNMPDE"""
         except Exception as e:
             self.fail(f"Plot with filtered categories raised error: {e}")
         mock_show.assert_called_once()
+
+    def _write_vfdb_fasta(self, db_dir):
+        vfdb = VFDBAnalysis(db_dir=db_dir)
+        with gzip.open(vfdb.fasta_path, "wt") as f:
+            f.write(">VFG037176(gb|WP_001081735) (plc1) phospholipase C [Phospholipase C (VF0470) - Exotoxin (VFC0235)] [Acinetobacter baumannii ACICU]\n"
+                    "MNRREFLLNSTKTMFGTAALASFPLSIQKALAIDAKVESGTIQDVKHIVILTQENRSFDN\n"
+                    ">VFG037177(gb|WP_000632986) (plc2) phospholipase C [Phospholipase C (VF0470) - Exotoxin (VFC0235)] [Acinetobacter baumannii ACICU]\n"
+                    "MITRRKFLNYSLNMGFGAAALAAFPSSIQKALAIPANNKTGTIQDVEHVIILMQENRSFD\n")
+        return vfdb
+
+    def test_load_kmer_index_builds_and_reuses_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            vfdb = self._write_vfdb_fasta(tmpdir)
+            index = vfdb.load_kmer_index(k=5)
+            self.assertTrue(os.path.exists(vfdb.kmer_index_path))
+            self.assertEqual(len(index), 2)
+
+            with patch("src.ResPathExplorer.VFDBAnalysis.ProteinKmerIndex.from_fasta") as mock_build:
+                self.assertEqual(vfdb.load_kmer_index(k=5).k, 5)
+                mock_build.assert_not_called()
+
+    def test_search_virulence_sequences_adds_annotation(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            vfdb = self._write_vfdb_fasta(tmpdir)
+            vfdb.df_genes = pd.DataFrame({"Gene_Name": ["plc1", "plc2"], "VFID": ["VF0470", "VF0470"]})
+            hits = vfdb.search_virulence_sequences(
+                {"my_protein": "MITRRKFLNYSLNMGFGAAALAAFPSSIQK"}, top_n=1, align=True
+            )
+        self.assertEqual(hits.loc[0, "Gene_Name"], "plc2")
+        self.assertEqual(hits.loc[0, "Identity"], 1.0)
+
+    def test_search_virulence_sequences_requires_proteins(self):
+        with self.assertRaises(ValueError):
+            self.vfdb.search_virulence_sequences({})
+
+    def test_get_sequences_and_export_hits(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            vfdb = self._write_vfdb_fasta(tmpdir)
+            vfdb.df_genes = pd.DataFrame({"Gene_Name": ["plc1", "plc2"], "VFID": ["VF0470", "VF0470"],
+                                          "Bacteria": ["A. baumannii", "A. baumannii"]})
+            sequences = vfdb.get_sequences(genes=["PLC2"])
+            self.assertEqual(sequences, {"VFG037177(gb|WP_000632986)":
+                                         "MITRRKFLNYSLNMGFGAAALAAFPSSIQKALAIPANNKTGTIQDVEHVIILMQENRSFD"})
+            self.assertEqual(len(vfdb.get_sequences(rows=[0], vfids=["VF0470"])), 2)
+
+            out_path = os.path.join(tmpdir, "hits.fas")
+            self.assertEqual(vfdb.export_hits_fasta(vfdb.df_genes.iloc[[1]], out_path), 1)
+            with open(out_path) as f:
+                self.assertTrue(f.readline().startswith(">VFG037177"))
+            vfdb.fasta_index.close()
+
+    def test_get_sequences_uses_row_lookup_and_checks_records(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            vfdb = self._write_vfdb_fasta(tmpdir)
+            vfdb.df_genes = pd.DataFrame({"Gene_Name": ["plc1", "PLC2"], "VFID": ["VF0470", "VF0471"]})
+            self.assertEqual(vfdb._rows_for("VFID", ["VF0471", "VF9999"]), [1])
+            self.assertEqual(vfdb._rows_for("Gene_Name", ["plc2", "PLC1"]), [0, 1])
+            lookups = vfdb._row_lookups
+            vfdb._rows_for("VFID", ["VF0470"])
+            self.assertIs(vfdb._row_lookups, lookups)
+
+            vfdb.df_genes = pd.DataFrame({"Gene_Name": ["plc1"], "VFID": ["VF0470"]})
+            self.assertEqual(vfdb._rows_for("VFID", ["VF0471"]), [])
+            with self.assertRaises(ValueError):
+                vfdb.get_sequences(vfids=["VF0470"])
+            vfdb.fasta_index.close()
+
+    def test_get_sequences_requires_gene_data(self):
+        with self.assertRaises(ValueError):
+            self.vfdb.get_sequences(genes=["plc1"])
+
+    def _genes_frame(self):
+        n = 200
+        return pd.DataFrame({
+            "Gene_Name": [f"gene{i}" for i in range(n)],
+            "Description": ["phospholipase C"] * n,
+            "Functional category": ["Exotoxin", "Adherence"] * (n // 2),
+            "Bacteria": ["Listeria monocytogenes EGD-e"] * n,
+            "VFID": ["VF0470"] * n,
+        })
+
+    def test_compact_genes_reduces_memory(self):
+        df = self._genes_frame()
+        compact = VFDBAnalysis.compact_genes(df)
+        self.assertIsInstance(compact["Bacteria"].dtype, pd.CategoricalDtype)
+        self.assertIsInstance(compact["Description"].dtype, pd.CategoricalDtype)
+        self.assertEqual(compact["Gene_Name"].dtype, object)
+        self.assertLess(self.vfdb.memory_usage(compact)["Total"], self.vfdb.memory_usage(df)["Total"])
+        pd.testing.assert_frame_equal(compact.astype(str), df.astype(str))
+
+    def test_compact_genes_keeps_search_working(self):
+        self.vfdb.df_genes = VFDBAnalysis.compact_genes(self._genes_frame())
+        result = self.vfdb.search_virulence_genes(["GENE1", "gene2"], "listeria")
+        self.assertEqual(result["Gene_Name"].tolist(), ["gene1", "gene2"])
+
+    def test_memory_usage_requires_gene_data(self):
+        with self.assertRaises(ValueError):
+            self.vfdb.memory_usage()
+
+    def test_search_virulence_genes_multi_species(self):
+        self.vfdb.df_genes = pd.DataFrame({
+            "Gene_Name": ["inlA", "plc1", "inlA", "hlyA"],
+            "Bacteria": ["Listeria monocytogenes EGD-e", "Acinetobacter baumannii ACICU",
+                         "Listeria innocua Clip11262", "Escherichia coli CFT073"],
+        })
+        result = self.vfdb.search_virulence_genes(["hlyA", "INLA"], ["Listeria monocytogenes", "Escherichia"])
+        self.assertEqual(result["Gene_Name"].tolist(), ["hlyA", "inlA"])
+        self.assertEqual(len(self.vfdb.search_virulence_genes(["inlA"], "Listeria")), 2)
+        self.assertTrue(self.vfdb.search_virulence_genes(["inlA"], "List").empty)
+
+    def test_category_enrichment(self):
+        self.vfdb.df_genes = pd.DataFrame({
+            "Gene_Name": [f"g{i}" for i in range(20)],
+            "Functional category": ["Exotoxin"] * 2 + ["Adherence"] * 18,
+            "Bacteria": ["Listeria monocytogenes EGD-e"] * 10 + ["Escherichia coli CFT073"] * 10,
+        })
+        samples = {"s1": self.vfdb.df_genes.iloc[[0, 1, 2]], "s2": self.vfdb.df_genes.iloc[[12, 13]]}
+        result = self.vfdb.category_enrichment(samples)
+        top = result[result["Sample"] == "s1"].iloc[0]
+        self.assertEqual((top["Category"], top["Observed"], top["Background size"]), ("Exotoxin", 2, 20))
+        self.assertLess(top["P-value"], 0.05)
+
+        restricted = self.vfdb.category_enrichment(samples, bacteria="Listeria")
+        self.assertEqual(restricted["Background size"].max(), 10)
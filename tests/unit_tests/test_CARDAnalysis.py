@@ -109,3 +109,58 @@ class TestCARDAnalysis(unittest.TestCase):
 
         with self.assertRaises(ValueError):
             obj.plot_antibiotic_frequencies(df_invalid)
+
+    def _curation_obj(self):
+        obj = CARDAnalysis.__new__(CARDAnalysis)
+        obj.ARGdf = pd.DataFrame([
+            {"Gene Name": "blaTEM", "Gene ID": "ARO:1", "Description": "desc", "Antibiotics": pd.NA},
+            {"Gene Name": "tetA", "Gene ID": "ARO:2", "Description": "desc", "Antibiotics": "tetracycline"},
+            {"Gene Name": "blaTEM-1", "Gene ID": "ARO:1", "Description": "desc", "Antibiotics": pd.NA},
+        ])
+        return obj
+
+    def test_apply_overrides_mapping(self):
+        obj = self._curation_obj()
+        unmatched = obj.apply_overrides({"ARO:1": "Penicillin", "ARO:9": "Unknown"})
+        self.assertEqual(unmatched, ["ARO:9"])
+        self.assertEqual(obj.ARGdf["Antibiotics"].tolist(), ["Penicillin", "tetracycline", "Penicillin"])
+
+    def test_apply_overrides_frame_keeps_missing_values(self):
+        obj = self._curation_obj()
+        overrides = pd.DataFrame({"Gene ID": ["ARO:2", "ARO:2"],
+                                  "Antibiotics": ["doxycycline", None],
+                                  "Curator": ["first", "second"]})
+        self.assertEqual(obj.apply_overrides(overrides), [])
+        self.assertEqual(obj.ARGdf.loc[1, "Antibiotics"], "tetracycline")
+        self.assertEqual(obj.ARGdf.loc[1, "Curator"], "second")
+        self.assertTrue(pd.isna(obj.ARGdf.loc[0, "Curator"]))
+
+    def test_apply_overrides_invalid(self):
+        obj = self._curation_obj()
+        with self.assertRaises(ValueError):
+            obj.apply_overrides(pd.DataFrame({"Antibiotics": ["x"]}))
+        with self.assertRaises(ValueError):
+            obj.apply_overrides(["ARO:1"])
+        with self.assertRaises(AttributeError):
+            CARDAnalysis.__new__(CARDAnalysis).apply_overrides({"ARO:1": "x"})
+
+    def test_save_and_apply_curation_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "curation.tsv")
+            CARDAnalysis.save_overrides({"ARO:1": "Penicillin", "ARO:2": "old"}, path)
+            CARDAnalysis.save_overrides({"ARO:2": "doxycycline"}, path)
+            self.assertEqual(len(CARDAnalysis.load_overrides(path)), 2)
+
+            obj = self._curation_obj()
+            self.assertEqual(obj.apply_overrides(path), [])
+            self.assertEqual(obj.ARGdf["Antibiotics"].tolist(), ["Penicillin", "doxycycline", "Penicillin"])
+
+    @patch.object(CARDAnalysis, 'finding_ARG',
+                  return_value=([{"Gene Name": "geneA", "Gene ID": "ARO:1", "Antibiotics": pd.NA}], ["geneB"]))
+    def test_init_applies_overrides_file(self, mock_find):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "curation.tsv")
+            CARDAnalysis.save_overrides({"ARO:1": "Penicillin", "ARO:5": "x"}, path)
+            obj = CARDAnalysis(self.mock_genes, has_CARDdata=True, overrides_file=path)
+        self.assertEqual(obj.ARGdf.loc[0, "Antibiotics"], "Penicillin")
+        self.assertEqual(obj.unmatched_overrides, ["ARO:5"])
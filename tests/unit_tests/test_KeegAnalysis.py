@@ -1,7 +1,12 @@
 import pytest
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import FrozenInstanceError
 from unittest.mock import patch, mock_open, MagicMock
 from src.ResPathExplorer.KeggAnalysis import KeggAnalysis
+from src.ResPathExplorer.gmt_index import BinaryGeneSets
+from src.ResPathExplorer.enrichment_cache import EnrichmentCache
 import pandas as pd
+from urllib.parse import urlsplit
 import matplotlib
 matplotlib.use('Agg')
 
@@ -22,6 +27,17 @@ class TestKeggAnalysis:
         assert ka.org == "hsa"
         assert ka.organism is not None
 
+    @patch("os.path.exists", return_value=True)
+    @patch("src.ResPathExplorer.KeggAnalysis.KeggAnalysis._load_gmt_file")
+    @patch("src.ResPathExplorer.KeggAnalysis.KeggAnalysis._get_organism_name", return_value="Homo sapiens")
+    def test_init_keeps_given_enrichment_cache(self, mock_name, mock_load_gmt, mock_exists, tmp_path):
+        cache = EnrichmentCache(cache_dir=str(tmp_path))
+        assert len(cache) == 0
+        ka = KeggAnalysis("hsa", "file.gmt", enrichment_cache=cache)
+        assert ka.enrichment_cache is cache
+        assert ka.enrichment_cache.disk is not None
+        assert KeggAnalysis("hsa", "file.gmt").enrichment_cache is not cache
+
     @patch("src.ResPathExplorer.KeggAnalysis.REST.kegg_list")
     def test_get_organism_prefix_valid(self, mock_kegg_list):
         mock_kegg_list.return_value.read.return_value = (
@@ -56,19 +72,48 @@ class TestKeggAnalysis:
         with pytest.raises(ValueError):
             ka._get_organism_name("xyz")
 
-    def test_load_gmt_file_loads_data_correctly(self):
+    def test_load_gmt_file_loads_data_correctly(self, tmp_path):
         fake_gmt_content = "pathway1\tDescription1\tgene1\tgene2\npathway2\tDescription2\tgene3"
+        gmt_path = tmp_path / "fake_path.gmt"
+        gmt_path.write_text(fake_gmt_content)
         ka = KeggAnalysis.__new__(KeggAnalysis)
         ka.gene_set = {}
 
-        with patch("builtins.open", mock_open(read_data=fake_gmt_content)):
-            ka._load_gmt_file("fake_path.gmt")
+        ka._load_gmt_file(str(gmt_path))
 
         assert ka.gene_set == {
             ("pathway1", "Description1"): ["gene1", "gene2"],
             ("pathway2", "Description2"): ["gene3"]
         }
 
+    def test_load_gmt_file_with_filter(self, tmp_path):
+        gmt_path = tmp_path / "filtered.gmt"
+        gmt_path.write_text("map00010\tGlycolysis\tg1\tg2\nmap02010\tABC transporters\tg3\n")
+        ka = KeggAnalysis.__new__(KeggAnalysis)
+        ka.gmt_filter = ["map00*"]
+
+        ka._load_gmt_file(str(gmt_path))
+
+        assert list(ka.gene_set) == [("map00010", "Glycolysis")]
+        assert ka.search_gene_path("g1", search_in_gene_set=True) == ["map00010"]
+        assert ka.search_gene_path("g3", search_in_gene_set=True) == []
+
+    def test_close_releases_the_gene_set_files(self, tmp_path):
+        gmt_path = tmp_path / "pathways.gmt"
+        gmt_path.write_text("map00010\tGlycolysis\tg1\tg2\nmap02010\tABC transporters\tg3\n")
+        ka = KeggAnalysis.__new__(KeggAnalysis)
+        ka.gene_set = {}
+
+        ka._load_gmt_file(str(gmt_path))
+        first = ka.gene_set
+        ka._load_gmt_file(str(gmt_path))
+        assert first._file.closed
+        assert not ka.gene_set._file.closed
+
+        ka.close()
+        assert ka.gene_set._file.closed
+        ka.close()
+
     def test_get_kgml_returns_valid_data(self):
         ka = KeggAnalysis.__new__(KeggAnalysis)
 
@@ -177,6 +222,21 @@ class TestKeggAnalysis:
         with pytest.raises(FileExistsError):
             ka.save_GeneSet_GMT(str(file_path), gene_set)
 
+    def test_save_GeneSet_GMT_writes_binary_companion(self, tmp_path):
+        ka = KeggAnalysis.__new__(KeggAnalysis)
+        gene_set = {
+            ("pathway1", "desc1"): ["geneA", "geneB"],
+            ("pathway2", "desc2"): ["geneC"]
+        }
+        file_path = tmp_path / "test.gmt"
+
+        ka.save_GeneSet_GMT(str(file_path), gene_set)
+        assert (tmp_path / "test.gmt.npz").exists()
+
+        ka._load_gmt_file(str(file_path))
+        assert isinstance(ka.gene_set, BinaryGeneSets)
+        assert ka.gene_set == gene_set
+
     def test_enrichment_analysis(self,monkeypatch, tmp_path):
 
         ka = KeggAnalysis.__new__(KeggAnalysis)
@@ -211,6 +271,168 @@ class TestKeggAnalysis:
         assert "path1" in ka.paths_genes_dict
         assert ka.paths_genes_dict["path1"] == ['gene1', 'gene2']
 
+    def test_enrichment_analysis_with_permutations(self, monkeypatch, tmp_path):
+        ka = KeggAnalysis.__new__(KeggAnalysis)
+        ka.file_name_gmt = "test_pathways"
+        ka.get_pathway_name = lambda term: f"{term} - Description"
+        ka.gene_set = {
+            ("path1", "Pathway 1"): ["gene1", "gene2", "gene3"],
+            ("path2", "Pathway 2"): ["gene4", "gene5", "gene6"],
+        }
+
+        mock_enrich = MagicMock()
+        mock_enrich.res2d = pd.DataFrame({
+            'Term': ['path1', 'path2'],
+            'Adjusted P-value': [0.01, 0.04],
+            'Genes': ['gene1;gene2', 'gene4']
+        })
+        monkeypatch.setattr("src.ResPathExplorer.KeggAnalysis.gp.enrich", lambda **kwargs: mock_enrich)
+        monkeypatch.setattr("src.ResPathExplorer.KeggAnalysis.rename_file", lambda a, b, c: None)
+
+        ka.enrichment_analysis(
+            gene_list=["gene1", "gene2", "gene3"],
+            cutoff=0.05,
+            name_outdir=str(tmp_path),
+            number_path=2,
+            name_results_file="results",
+            n_permutations=200
+        )
+
+        results = ka.enrichment_results.set_index("Term")
+        assert results.loc["path1", "Empirical P-value"] < results.loc["path2", "Empirical P-value"]
+        assert "Empirical FDR" in results.columns
+
+    def test_enrichment_analysis_reuses_cached_results(self, monkeypatch, tmp_path):
+        gmt_path = tmp_path / "pathways.gmt"
+        gmt_path.write_text("path1\tPathway 1\tgene1\tgene2\npath2\tPathway 2\tgene3\n")
+        ka = KeggAnalysis.__new__(KeggAnalysis)
+        ka.file_name_gmt = str(gmt_path)
+        ka.gmt_filter = None
+        ka.enrichment_cache = EnrichmentCache()
+        ka.get_pathway_name = lambda term: f"{term} - Description"
+
+        calls = []
+        mock_enrich = MagicMock()
+        mock_enrich.res2d = pd.DataFrame({
+            'Term': ['path1', 'path2'],
+            'Adjusted P-value': [0.01, 0.04],
+            'Genes': ['gene1;gene2', 'gene3']
+        })
+
+        def fake_enrich(**kwargs):
+            calls.append(kwargs)
+            return mock_enrich
+
+        renames = []
+        monkeypatch.setattr("src.ResPathExplorer.KeggAnalysis.gp.enrich", fake_enrich)
+        monkeypatch.setattr("src.ResPathExplorer.KeggAnalysis.rename_file", lambda *args: renames.append(args))
+
+        ka.enrichment_analysis(["gene2", "gene1"], 0.05, str(tmp_path), 2, "results")
+        ka.enrichment_analysis(["gene1", "gene2", "gene1"], 0.02, str(tmp_path), 1, "results")
+
+        assert len(calls) == 1
+        assert len(renames) == 1
+        assert list(ka.enrichment_results["Term"]) == ["path1"]
+        assert list(ka.paths_genes_dict) == ["path1"]
+        # The cache hit still writes the reports, from the unfiltered cached table
+        report = pd.read_csv(tmp_path / "results.txt", sep="\t")
+        assert list(report["Term"]) == ["path1", "path2"]
+        assert (tmp_path / "results.pdf").exists()
+
+        gmt_path.write_text("path1\tPathway 1\tgene1\n")
+        ka.enrichment_analysis(["gene1", "gene2"], 0.05, str(tmp_path), 2, "results")
+        assert len(calls) == 2
+
+    def test_enrich_is_stateless_and_thread_safe(self, monkeypatch, tmp_path):
+        gmt_path = tmp_path / "pathways.gmt"
+        gmt_path.write_text("".join(f"path{i}\tPathway {i}\tgene{i}\n" for i in range(8)))
+        ka = KeggAnalysis.__new__(KeggAnalysis)
+        ka.file_name_gmt = str(gmt_path)
+        ka.gmt_filter = None
+        ka.enrichment_cache = EnrichmentCache()
+        ka.enrichment_results = None
+        ka.get_pathway_name = lambda term: f"{term} - Description"
+
+        def fake_enrich(gene_list, outdir, **kwargs):
+            assert outdir is None
+            result = MagicMock()
+            result.res2d = pd.DataFrame({
+                'Term': [f"path{g[4:]}" for g in gene_list],
+                'Adjusted P-value': [0.01] * len(gene_list),
+                'Genes': list(gene_list)
+            })
+            return result
+
+        monkeypatch.setattr("src.ResPathExplorer.KeggAnalysis.gp.enrich", fake_enrich)
+        before = dict(vars(ka))
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda i: ka.enrich([f"gene{i}"], 0.05, 5), range(8)))
+
+        for i, result in enumerate(results):
+            assert list(result.results["Term"]) == [f"path{i}"]
+            assert dict(result.paths_genes) == {f"path{i}": (f"gene{i}",)}
+        assert vars(ka).keys() == before.keys()
+        assert ka.enrichment_results is None
+        assert list(tmp_path.iterdir()) == [gmt_path]
+
+        with pytest.raises(FrozenInstanceError):
+            results[0].from_cache = True
+        with pytest.raises(TypeError):
+            results[0].paths_genes["path0"] = ("other",)
+        assert ka.enrich(["gene3"], 0.05, 5).from_cache
+
+    def test_enrich_names_pathways_from_gene_sets(self, monkeypatch, tmp_path):
+        gmt_path = tmp_path / "pathways.gmt"
+        gmt_path.write_text("path1\tPathway 1\tgene1\tgene2\n")
+        ka = KeggAnalysis.__new__(KeggAnalysis)
+        ka.file_name_gmt = str(gmt_path)
+        ka.gmt_filter = None
+        ka.gene_set = {("path1", "Pathway 1"): ["gene1", "gene2"]}
+        ka.enrichment_cache = EnrichmentCache()
+
+        def fail(*args):
+            raise ConnectionError("KEGG is not reachable")
+
+        monkeypatch.setattr("src.ResPathExplorer.KeggAnalysis.REST.kegg_get", fail)
+        mock_enrich = MagicMock()
+        mock_enrich.res2d = pd.DataFrame({'Term': ['path1', 'path9'], 'Adjusted P-value': [0.01, 0.02],
+                                          'Genes': ['gene1;gene2', 'gene3']})
+        monkeypatch.setattr("src.ResPathExplorer.KeggAnalysis.gp.enrich", lambda **kwargs: mock_enrich)
+
+        with pytest.raises(ConnectionError):
+            ka.enrich(["gene1", "gene2", "gene3"], 0.05, 5)
+
+        monkeypatch.setattr("src.ResPathExplorer.KeggAnalysis._REST_PATHWAY_NAMES", {})
+        calls = []
+        ka.get_pathway_name = lambda term: calls.append(term) or f"Pathway {term[4:]} - Escherichia coli"
+        for _ in range(2):
+            result = ka.enrich(["gene1", "gene2", "gene3"], 0.05, 5)
+            assert result.results.set_index("Term")["Pathway name"].to_dict() == {"path1": "Pathway 1",
+                                                                                   "path9": "Pathway 9"}
+        assert calls == ["path9"]
+
+    def test_prerank_analysis(self):
+        ka = KeggAnalysis.__new__(KeggAnalysis)
+        genes = [f"gene{i}" for i in range(50)]
+        ka.gene_set = {
+            ("path1", "Pathway 1"): genes[:5],
+            ("path2", "Pathway 2"): genes[20:25],
+        }
+        ranking = pd.Series(range(50, 0, -1), index=genes, dtype=float)
+
+        results = ka.prerank_analysis(ranking, n_permutations=50, min_size=3, n_workers=1)
+
+        assert list(results["Term"])[0] == "path1"
+        assert results.set_index("Term").loc["path1", "Pathway name"] == "Pathway 1"
+        assert ka.prerank_results is results
+
+    def test_empirical_enrichment_requires_gene_sets(self):
+        ka = KeggAnalysis.__new__(KeggAnalysis)
+        ka.gene_set = {}
+        with pytest.raises(ValueError):
+            ka.empirical_enrichment(["gene1"])
+
     def test_get_pathway_name(self, monkeypatch):
         ka = KeggAnalysis.__new__(KeggAnalysis)
 
@@ -291,9 +513,13 @@ class TestKeggAnalysis:
         with pytest.raises(ValueError, match="Either 'data' must be provided or 'search_in_gene_set' must be True."):
             ka.search_gene_path("geneX")
 
-
-
-
-
-
-
+    def test_pathway_map_urls(self):
+        ka = KeggAnalysis.__new__(KeggAnalysis)
+        with pytest.raises(RuntimeError):
+            ka.pathway_map_urls()
+
+        ka.limited_enrichment_results = pd.DataFrame({"Term": ["hsa04110"], "Genes": ["TP53;BRCA1"]})
+        urls = ka.pathway_map_urls({"tp53": 1.0, "brca1": -1.0}, cmap="bwr", n_colors=3)
+        assert urls == {"hsa04110": "http://www.kegg.jp/kegg-bin/show_pathway?hsa04110/default%3dpink/"
+                                    "/TP53%09%23ff0000,black//BRCA1%09%230000ff,black/"}
+        assert urlsplit(urls["hsa04110"]).fragment == ""
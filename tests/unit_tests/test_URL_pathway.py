@@ -1,6 +1,13 @@
+import os
+import threading
+import time
 import unittest
-from unittest.mock import patch
-from src.ResPathExplorer.URL_pathway import get_url_pathway
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock, patch
+from urllib.parse import urlsplit
+from src.ResPathExplorer import URL_pathway
+from src.ResPathExplorer.URL_pathway import (_fetch_pathway_image, _validate_gene_color, build_pathway_url,
+                                             fetch_pathway_images, get_url_pathway, get_url_pathways)
 
 class TestGetUrlPathway(unittest.TestCase):
 
@@ -42,3 +49,88 @@ class TestGetUrlPathway(unittest.TestCase):
         with self.assertRaises(ValueError):
             get_url_pathway("hsa04110", {"TP53": "#GGGGGG,#000000"})  # invalid hex code
 
+    def test_build_pathway_url(self):
+        self.assertEqual(build_pathway_url("path:hsa04110"),
+                         "http://www.kegg.jp/kegg-bin/show_pathway?hsa04110/default%3dpink/")
+        self.assertEqual(build_pathway_url("hsa04110", {"TP53": "red,black", "BRCA1": "blue"}),
+                         "http://www.kegg.jp/kegg-bin/show_pathway?hsa04110/default%3dpink/"
+                         "/TP53%09red,black//BRCA1%09,blue/")
+        url = build_pathway_url("hsa04110", {"TP53": "#FF0000,#000000"})
+        self.assertTrue(url.endswith("/TP53%09%23FF0000,%23000000/"))
+        self.assertEqual(urlsplit(url).fragment, "")
+
+    def test_get_url_pathways_validates_each_color_once(self):
+        _validate_gene_color.cache_clear()
+        colors = {"TP53": "red,black", "BRCA1": "red,black"}
+        with patch("src.ResPathExplorer.URL_pathway.validate_color_code") as mock_validate, \
+                patch("src.ResPathExplorer.URL_pathway.KEGG") as mock_kegg:
+            urls = get_url_pathways({"hsa04110": colors, "hsa04115": colors, "hsa00010": None})
+            mock_kegg.assert_not_called()
+        self.assertEqual(mock_validate.call_count, 2)
+        self.assertEqual(list(urls), ["hsa04110", "hsa04115", "hsa00010"])
+        self.assertEqual(urls["hsa04115"], build_pathway_url("hsa04115", colors))
+        _validate_gene_color.cache_clear()
+
+    def test_get_url_pathways_with_client(self):
+        client = MagicMock()
+        client.show_pathway.return_value = "http://dummy-url/TP53%09#FF0000,black/"
+        self.assertEqual(get_url_pathways({"hsa04110": None}, client=client),
+                         {"hsa04110": "http://dummy-url/TP53%09%23FF0000,black/"})
+        client.show_pathway.assert_called_once_with("hsa04110", scale=None, keggid=None, show=False)
+
+    def test_get_url_pathways_invalid_input(self):
+        with self.assertRaises(ValueError):
+            get_url_pathways(["hsa04110"])
+        with self.assertRaises(ValueError):
+            get_url_pathways({"": None})
+        with self.assertRaises(ValueError):
+            get_url_pathways({"hsa04110": {"TP53": "#GGGGGG,#000000"}})
+
+    def test_fetch_pathway_image_is_cached(self):
+        page = MagicMock(text='<img src="/tmp/mark_pathway1/hsa04110.png" name="pathwayimage" usemap="#mapdata">')
+        image = MagicMock(content=b"PNG")
+        session = MagicMock()
+        session.get.side_effect = [page, image]
+        with TemporaryDirectory() as tmpdir:
+            out_file = os.path.join(tmpdir, "hsa04110.png")
+            self.assertEqual(_fetch_pathway_image(session, "http://map", out_file), out_file)
+            self.assertEqual(session.get.call_args[0][0], "http://www.kegg.jp/tmp/mark_pathway1/hsa04110.png")
+            with open(out_file, "rb") as f:
+                self.assertEqual(f.read(), b"PNG")
+            _fetch_pathway_image(session, "http://map", out_file)
+        self.assertEqual(session.get.call_count, 2)
+
+    def test_fetch_pathway_images_reports_failures(self):
+        def fake_fetch(session, url, out_file):
+            if "hsa04115" in url:
+                raise ValueError("No pathway image found")
+            return out_file
+
+        with TemporaryDirectory() as tmpdir, patch.object(URL_pathway, "_fetch_pathway_image", fake_fetch):
+            images = fetch_pathway_images(get_url_pathways({"hsa04110": None, "hsa04115": None}), tmpdir)
+        self.assertTrue(images["hsa04110"].endswith(".png"))
+        self.assertIsNone(images["hsa04115"])
+
+    def test_fetch_pathway_images_uses_one_session_per_thread(self):
+        sessions = []
+
+        class FakeSession:
+            def __init__(self):
+                self.threads = set()
+                self.close = MagicMock()
+                sessions.append(self)
+
+        def fake_fetch(session, url, out_file):
+            session.threads.add(threading.get_ident())
+            time.sleep(0.01)
+            return out_file
+
+        pathways = {f"hsa{i:05d}": None for i in range(12)}
+        with TemporaryDirectory() as tmpdir, patch.object(URL_pathway, "_fetch_pathway_image", fake_fetch), \
+                patch.object(URL_pathway.requests, "Session", FakeSession):
+            images = fetch_pathway_images(get_url_pathways(pathways), tmpdir, max_workers=4)
+        self.assertEqual(sorted(images), sorted(pathways))
+        self.assertTrue(1 <= len(sessions) <= 4)
+        for session in sessions:
+            self.assertEqual(len(session.threads), 1)
+            session.close.assert_called_once()
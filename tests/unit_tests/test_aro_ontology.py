@@ -0,0 +1,206 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src.ResPathExplorer.aro_ontology import AROOntology
+from src.ResPathExplorer.CARDAnalysis import CARDAnalysis
+
+OBO_CONTENT = """format-version: 1.2
+
+[Term]
+id: ARO:1234567
+name: beta-lactamase
+synonym: "blaTEM, blaSHV"
+def: "A beta-lactamase enzyme."
+relationship: confers_resistance_to_antibiotic ARO:3000001 ! Penicillin
+
+[Term]
+id: ARO:7654321
+name: tetA
+def: "Tetracycline efflux pump."
+relationship: confers_resistance_to_antibiotic ARO:3000002 ! tetracycline
+relationship: confers_resistance_to_antibiotic ARO:3000003 ! doxycycline
+
+[Term]
+id: ARO:1111111
+name: TETA
+def: "Duplicated name, the first term wins."
+
+[Term]
+"""
+
+HIERARCHY_OBO = """format-version: 1.2
+
+[Term]
+id: ARO:1000002
+name: mechanism of antibiotic resistance
+
+[Term]
+id: ARO:0001004
+name: antibiotic inactivation
+is_a: ARO:1000002 ! mechanism of antibiotic resistance
+
+[Term]
+id: ARO:3000367
+name: AMR Gene Family
+
+[Term]
+id: ARO:0000001
+name: beta-lactam antibiotic
+
+[Term]
+id: ARO:0000032
+name: cephalosporin
+is_a: ARO:0000001 ! beta-lactam antibiotic
+
+[Term]
+id: ARO:0000035
+name: ceftazidime
+is_a: ARO:0000032 ! cephalosporin
+
+[Term]
+id: ARO:3000014
+name: TEM beta-lactamase
+is_a: ARO:3000367 ! AMR Gene Family
+relationship: confers_resistance_to_drug_class ARO:0000032 ! cephalosporin
+relationship: participates_in ARO:0001004 ! antibiotic inactivation
+
+[Term]
+id: ARO:3000873
+name: TEM-1
+synonym: "blaTEM-1"
+is_a: ARO:3000014 ! TEM beta-lactamase
+relationship: confers_resistance_to_antibiotic ARO:0000035 ! ceftazidime
+
+[Term]
+id: ARO:3000999
+name: orphan gene
+
+[Typedef]
+id: confers_resistance_to_antibiotic
+name: confers_resistance_to_antibiotic
+"""
+
+
+class TestAROOntologyHierarchy(unittest.TestCase):
+
+    def setUp(self):
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".obo", delete=False, encoding="utf-8") as f:
+            f.write(HIERARCHY_OBO)
+            self.obo_file = f.name
+        self.ontology = AROOntology(self.obo_file)
+
+    def tearDown(self):
+        os.remove(self.obo_file)
+
+    def test_transitive_closure(self):
+        self.assertTrue(self.ontology.is_a("ARO:3000873", "ARO:3000367"))
+        self.assertTrue(self.ontology.is_a("ARO:0000035", "ARO:0000001"))
+        self.assertFalse(self.ontology.is_a("ARO:3000367", "ARO:3000873"))
+        self.assertFalse(self.ontology.is_a("ARO:3000873", "ARO:9999999"))
+        self.assertEqual(set(self.ontology.ancestors("ARO:3000873")), {"ARO:3000014", "ARO:3000367"})
+        with self.assertRaises(KeyError):
+            self.ontology.ancestors("ARO:9999999")
+
+    def test_rollups_are_inherited(self):
+        self.assertEqual(self.ontology.drug_classes("ARO:3000873"), {"cephalosporin"})
+        self.assertEqual(self.ontology.resistance_mechanisms("ARO:3000873"), {"antibiotic inactivation"})
+        self.assertEqual(self.ontology.gene_families("ARO:3000873"), {"TEM beta-lactamase"})
+        self.assertEqual(self.ontology.drug_classes("ARO:3000999"), frozenset())
+        with self.assertRaises(ValueError):
+            self.ontology.rollup("ARO:3000873", "antibiotic")
+
+    def test_card_analysis_rollup_columns_and_queries(self):
+        card = CARDAnalysis(["blaTEM-1", "TEM beta-lactamase"], ontology=self.ontology)
+
+        self.assertEqual(card.ARGdf["Drug Class"].tolist(), ["cephalosporin", "cephalosporin"])
+        self.assertEqual(card.ARGdf["Resistance Mechanism"].tolist(), ["antibiotic inactivation"] * 2)
+        self.assertEqual(card.ARGdf.loc[0, "AMR Gene Family"], "TEM beta-lactamase")
+
+        hits = card.genes_by_rollup("drug_class", "Cephalosporin")
+        self.assertEqual(hits["Gene ID"].tolist(), ["ARO:3000873", "ARO:3000014"])
+        self.assertTrue(card.genes_by_rollup("mechanism", "antibiotic efflux").empty)
+
+    def test_overridden_antibiotics_update_drug_class(self):
+        card = CARDAnalysis(["blaTEM-1", "TEM beta-lactamase"], ontology=self.ontology)
+        self.assertEqual(self.ontology.antibiotic_drug_classes(["Ceftazidime", "unknown"]), {"cephalosporin"})
+        # The name index is complete once loaded, so concurrent readers never see it half-built
+        self.assertEqual(self.ontology._term_ids_by_name["ceftazidime"], "ARO:0000035")
+
+        card.apply_overrides({"ARO:3000873": "ceftazidime, unknown", "ARO:3000014": "unknown"})
+        self.assertEqual(card.ARGdf.loc[0, "Drug Class"], "cephalosporin")
+        self.assertTrue(pd.isna(card.ARGdf.loc[1, "Drug Class"]))
+        self.assertEqual(card.ARGdf["Resistance Mechanism"].tolist(), ["antibiotic inactivation"] * 2)
+
+        # An explicit drug class curation wins over the recomputed one
+        card.apply_overrides(pd.DataFrame({"Gene ID": ["ARO:3000873"], "Antibiotics": ["ceftazidime"],
+                                           "Drug Class": ["curated class"]}))
+        self.assertEqual(card.ARGdf.loc[0, "Drug Class"], "curated class")
+        card.apply_overrides({"ARO:3000873": "ceftazidime"})
+        self.assertEqual(card.ARGdf.loc[0, "Drug Class"], "cephalosporin")
+
+    def test_drug_class_enrichment(self):
+        samples = {"s1": pd.DataFrame({"Gene ID": ["ARO:3000873"]}),
+                   "s2": pd.DataFrame({"Gene ID": ["ARO:3000999"]})}
+        result = CARDAnalysis.drug_class_enrichment(samples, self.ontology)
+        self.assertEqual(result["Sample"].tolist(), ["s1"])
+        self.assertEqual(result.loc[0, "Category"], "cephalosporin")
+        # The "TEM beta-lactamase" gene family is not counted as a gene of the background
+        self.assertEqual(result.loc[0, "Background size"], 1)
+        self.assertEqual(result.loc[0, "P-value"], 1.0)
+        self.assertTrue(self.ontology.is_gene_family("ARO:3000014"))
+        self.assertFalse(self.ontology.is_gene_family("ARO:3000873"))
+
+        # A sample ARG outside the background (here the family itself) joins it
+        samples["s2"] = pd.DataFrame({"Gene ID": ["ARO:3000014"]})
+        result = CARDAnalysis.drug_class_enrichment(samples, self.ontology)
+        self.assertEqual(result["Background size"].tolist(), [2, 2])
+        with self.assertRaises(ValueError):
+            CARDAnalysis.drug_class_enrichment(samples, self.ontology, kind="antibiotic")
+
+    def test_rollups_require_ontology(self):
+        card = CARDAnalysis.__new__(CARDAnalysis)
+        card.ARGdf = pd.DataFrame([{"Gene ID": "ARO:3000873"}])
+        with self.assertRaises(ValueError):
+            card.genes_by_rollup("drug_class", "cephalosporin")
+        card.add_ontology_rollups(self.ontology)
+        self.assertEqual(card.ARGdf.loc[0, "Drug Class"], "cephalosporin")
+
+
+class TestAROOntology(unittest.TestCase):
+
+    def setUp(self):
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".obo", delete=False, encoding="utf-8") as f:
+            f.write(OBO_CONTENT)
+            self.obo_file = f.name
+        self.ontology = AROOntology(self.obo_file)
+
+    def tearDown(self):
+        os.remove(self.obo_file)
+
+    def test_file_not_found(self):
+        with self.assertRaises(FileNotFoundError):
+            AROOntology("nonexistent.obo")
+
+    def test_lookup_matches_find_gene_ids(self):
+        card = CARDAnalysis.__new__(CARDAnalysis)
+        for gene in ["blaTEM", "BLASHV", "beta-lactamase", "tetA", "unknown"]:
+            self.assertEqual(self.ontology.lookup(gene), card.find_gene_ids(self.obo_file, gene), gene)
+
+    def test_first_term_wins_for_duplicated_names(self):
+        record = self.ontology.lookup("teta")
+        self.assertEqual(record["Gene ID"], "ARO:7654321")
+        self.assertEqual(record["Antibiotics"], "tetracycline, doxycycline")
+
+    def test_annotate_splits_found_and_not_found(self):
+        found, not_found = self.ontology.annotate(["blaTEM", "geneX", "tetA"])
+        self.assertEqual([r["Gene Name"] for r in found], ["beta-lactamase", "tetA"])
+        self.assertEqual(not_found, ["geneX"])
+
+    def test_card_analysis_uses_ontology(self):
+        card = CARDAnalysis(["blaSHV", "geneX"], ontology=self.ontology)
+        self.assertEqual(card.not_ARG_list, ["geneX"])
+        self.assertEqual(card.ARGdf.loc[0, "Matched Name"], "blaSHV")
+        self.assertTrue(pd.isna(self.ontology.lookup("tetA")["All Synonyms"]))
@@ -0,0 +1,117 @@
+import os
+import time
+import unittest
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+
+from src.ResPathExplorer.artifact_cache import ArtifactCache, file_checksum
+
+
+class TestArtifactCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.cache = ArtifactCache(os.path.join(self.tmpdir.name, "cache"))
+        self.df = pd.DataFrame({"Gene ID": ["ARO:1", "ARO:2"], "Antibiotics": ["Penicillin", None]})
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_invalid_arguments_raise(self):
+        with self.assertRaises(ValueError):
+            ArtifactCache("")
+        with self.assertRaises(ValueError):
+            ArtifactCache(self.tmpdir.name, max_size_bytes=0)
+
+    def test_make_key_is_deterministic(self):
+        key1 = ArtifactCache.make_key(genes=["a", "b"], cutoff=0.05, background={"x", "y"})
+        key2 = ArtifactCache.make_key(cutoff=0.05, background={"y", "x"}, genes=["a", "b"])
+        key3 = ArtifactCache.make_key(genes=["a", "b"], cutoff=0.01, background={"x", "y"})
+        self.assertEqual(key1, key2)
+        self.assertNotEqual(key1, key3)
+
+    def test_put_and_get_frame_and_json(self):
+        self.cache.put("card", "k1", self.df)
+        self.cache.put("paths", "k2", {"path1": ["gene1", "gene2"]})
+
+        loaded = self.cache.get("card", "k1")
+        self.assertEqual(loaded["Gene ID"].tolist(), ["ARO:1", "ARO:2"])
+        self.assertTrue(pd.isna(loaded.loc[1, "Antibiotics"]))
+        self.assertEqual(self.cache.get("paths", "k2"), {"path1": ["gene1", "gene2"]})
+        self.assertIsNone(self.cache.get("card", "missing"))
+
+    def test_cached_computes_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return self.df
+
+        inputs = {"genes": ["a"], "card": "checksum"}
+        self.cache.cached("card", inputs, compute)
+        self.cache.cached("card", inputs, compute)
+        self.cache.cached("card", {**inputs, "card": "new version"}, compute)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_cached_none_is_a_hit(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return None
+
+        inputs = {"genes": []}
+        self.assertIsNone(self.cache.cached("empty", inputs, compute))
+        self.assertIsNone(self.cache.cached("empty", inputs, compute))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_lru_eviction_by_total_size(self):
+        self.cache.put("stage", "old", {"data": "x" * 100})
+        self.cache.put("stage", "new", {"data": "y" * 100})
+        old_path = os.path.join(self.cache.cache_dir, "stage", "old.json")
+        past = time.time() - 100
+        os.utime(old_path, (past, past))
+
+        # Reading "old" makes it the most recently used artifact
+        self.cache.get("stage", "old")
+        self.cache.max_size_bytes = self.cache.total_size() - 1
+        removed = self.cache.evict()
+
+        self.assertEqual(removed, 1)
+        self.assertIsNotNone(self.cache.get("stage", "old"))
+        self.assertIsNone(self.cache.get("stage", "new"))
+
+    def test_put_walks_the_cache_only_when_the_limit_is_crossed(self):
+        walks = []
+        artifacts = self.cache._artifacts
+        self.cache._artifacts = lambda: walks.append(1) or artifacts()
+        self.cache.max_size_bytes = 300
+
+        self.cache.put("stage", "a", {"data": "x" * 100})
+        self.cache.put("stage", "b", {"data": "y" * 100})
+        self.cache.put("stage", "b", {"data": "z" * 100})
+        self.assertEqual(len(walks), 1)
+        self.assertEqual(self.cache._size_estimate, self.cache.total_size())
+
+        # The third artifact crosses the limit and evicts the least recently used one
+        self.cache.put("stage", "c", {"data": "w" * 100})
+        self.assertEqual(len(walks), 3)
+        self.assertLessEqual(self.cache.total_size(), 300)
+        self.assertEqual(self.cache._size_estimate, self.cache.total_size())
+
+    def test_file_checksum_changes_with_content(self):
+        path = os.path.join(self.tmpdir.name, "aro.obo")
+        with open(path, "w") as f:
+            f.write("version 1")
+        first = file_checksum(path)
+        with open(path, "w") as f:
+            f.write("version 2, longer")
+        self.assertNotEqual(first, file_checksum(path))
+
+        with self.assertRaises(FileNotFoundError):
+            file_checksum(os.path.join(self.tmpdir.name, "missing"))
@@ -0,0 +1,205 @@
+import asyncio
+import os
+import threading
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock, patch
+
+from src.ResPathExplorer.async_kegg import (AsyncKeggClient, build_gene_sets, create_gmt_file, gene_symbols,
+                                            organism_code, organism_name, pathway_names, search_gene_ids,
+                                            split_entries)
+
+KGML = """<?xml version="1.0"?>
+<pathway name="path:eco00010" org="eco" number="00010" title="Glycolysis / Gluconeogenesis">
+    <entry id="1" name="eco:b0002 eco:b0003" type="gene"/>
+    <entry id="2" name="cpd:C00031" type="compound"/>
+</pathway>
+"""
+
+RESPONSES = {
+    "list/organism": "T00007\teco\tEscherichia coli K-12 MG1655\tProkaryotes\n"
+                     "T00001\thsa\tHomo sapiens (human)\tEukaryotes\n",
+    "list/pathway/eco": "eco00010\tGlycolysis / Gluconeogenesis - Escherichia coli\n"
+                        "eco00020\tCitrate cycle (TCA cycle) - Escherichia coli\n",
+    "get/eco00010/kgml": KGML,
+    "get/eco00020/kgml": "",
+    "get/eco:b0002+eco:b0003+eco:b9999": "ENTRY       b0002             CDS       T00007\n"
+                                         "SYMBOL      thrA\n///\n"
+                                         "ENTRY       b0003             CDS       T00007\n///\n",
+    "get/path:eco00010": "ENTRY       eco00010                    Pathway\n"
+                         "NAME        Glycolysis / Gluconeogenesis - Escherichia coli\n///\n",
+    "find/genes/thrA": "eco:b0002\tthrA, Hs, thrA1; aspartate kinase\n",
+    "find/genes/none": "",
+    "link/pathway/eco:b0002": "eco:b0002\tpath:eco00260\neco:b0002\tpath:eco00300\n",
+}
+
+
+class FakeKeggClient(AsyncKeggClient):
+    """Serves canned responses and counts the downloads."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("cache", {})
+        super().__init__(**kwargs)
+        self.fetched = []
+
+    async def _fetch(self, path):
+        self.fetched.append(path)
+        await asyncio.sleep(0)
+        if path not in RESPONSES:
+            raise AssertionError(f"Unexpected request: {path}")
+        return RESPONSES[path]
+
+
+class TestAsyncKegg(unittest.TestCase):
+
+    def test_split_entries(self):
+        entries = split_entries(RESPONSES["get/eco:b0002+eco:b0003+eco:b9999"])
+        self.assertEqual(sorted(entries), ["b0002", "b0003"])
+        self.assertIn("SYMBOL      thrA", entries["b0002"])
+
+    def test_concurrent_requests_share_one_download(self):
+        async def run():
+            client = FakeKeggClient()
+            results = await asyncio.gather(*(client.list("organism") for _ in range(5)))
+            await client.list("organism")
+            return client, results
+
+        client, results = asyncio.run(run())
+        self.assertEqual(client.fetched, ["list/organism"])
+        self.assertEqual(results[0][0][:3], ["T00007", "eco", "Escherichia coli K-12 MG1655"])
+
+    def test_cache_keeps_the_most_recently_used_responses(self):
+        async def run():
+            client = FakeKeggClient(max_cached=2)
+            await client.request("list/organism")
+            await client.request("find/genes/thrA")
+            await client.request("list/organism")
+            await client.request("find/genes/none")
+            return client
+
+        client = asyncio.run(run())
+        self.assertEqual(list(client.cache), [f"{client.base_url}/list/organism",
+                                              f"{client.base_url}/find/genes/none"])
+        with self.assertRaises(ValueError):
+            FakeKeggClient(max_cached=0)
+
+    def test_shared_cache_separates_endpoints(self):
+        async def run():
+            cache = {}
+            kegg = FakeKeggClient(cache=cache)
+            mirror = FakeKeggClient(cache=cache, base_url="https://mirror.example/kegg/")
+            await kegg.request("list/organism")
+            await mirror.request("list/organism")
+            return kegg, mirror, cache
+
+        kegg, mirror, cache = asyncio.run(run())
+        self.assertEqual(kegg.fetched, ["list/organism"])
+        self.assertEqual(mirror.fetched, ["list/organism"])
+        self.assertEqual(sorted(cache), sorted([f"{kegg.base_url}/list/organism",
+                                                "https://mirror.example/kegg/list/organism"]))
+
+    def test_executor_threads_use_their_own_session(self):
+        sessions = []
+
+        class FakeSession:
+            def __init__(self):
+                self.threads = set()
+                self.close = MagicMock()
+                sessions.append(self)
+
+            def get(self, url, timeout):
+                self.threads.add(threading.get_ident())
+                return MagicMock(status_code=200, text=url)
+
+        async def run():
+            client = AsyncKeggClient(cache={}, max_concurrency=8)
+            texts = await asyncio.gather(*(client.request(f"get/eco:b{i:04d}") for i in range(20)))
+            await client.close()
+            return texts
+
+        with patch("src.ResPathExplorer.async_kegg.HAS_AIOHTTP", False), \
+                patch("src.ResPathExplorer.async_kegg.requests.Session", FakeSession):
+            texts = asyncio.run(run())
+        self.assertTrue(texts[0].endswith("/get/eco:b0000"))
+        self.assertTrue(sessions)
+        for session in sessions:
+            self.assertEqual(len(session.threads), 1)
+            session.close.assert_called_once()
+
+    def test_get_batches_and_skips_missing_ids(self):
+        async def run():
+            client = FakeKeggClient()
+            return client, await client.get(["eco:b0002", "eco:b0003", "eco:b9999"])
+
+        client, entries = asyncio.run(run())
+        self.assertEqual(sorted(entries), ["eco:b0002", "eco:b0003"])
+        self.assertEqual(client.fetched, ["get/eco:b0002+eco:b0003+eco:b9999"])
+
+    def test_get_splits_batches_of_ten(self):
+        class EmptyClient(FakeKeggClient):
+            async def _fetch(self, path):
+                self.fetched.append(path)
+                return ""
+
+        client = EmptyClient()
+        self.assertEqual(asyncio.run(client.get([f"eco:b{i:04d}" for i in range(23)])), {})
+        self.assertEqual([len(path.split("+")) for path in client.fetched], [10, 10, 3])
+
+    def test_link_and_kgml(self):
+        async def run():
+            client = FakeKeggClient()
+            links = await client.link("pathway", "eco:b0002")
+            with self.assertRaises(ValueError):
+                await client.kgml("eco00020")
+            return links
+
+        self.assertEqual(asyncio.run(run()), [("eco:b0002", "path:eco00260"), ("eco:b0002", "path:eco00300")])
+
+    def test_name_resolution_and_id_mapping(self):
+        async def run():
+            client = FakeKeggClient()
+            return await asyncio.gather(organism_code(client, "escherichia coli"), organism_name(client, "HSA"),
+                                        pathway_names(client, ["path:eco00010"]),
+                                        gene_symbols(client, ["eco:b0002", "eco:b0003", "eco:b9999"]),
+                                        search_gene_ids(client, ["thrA", "none"], "eco"))
+
+        code, name, names, symbols, ids = asyncio.run(run())
+        self.assertEqual(code, "eco")
+        self.assertEqual(name, "Homo sapiens (human)")
+        self.assertEqual(names, {"path:eco00010": "Glycolysis / Gluconeogenesis - Escherichia coli"})
+        self.assertEqual(symbols, {"eco:b0002": "thrA", "eco:b0003": None, "eco:b9999": None})
+        self.assertEqual(ids, {"thrA": "eco:b0002", "none": None})
+
+        with self.assertRaises(ValueError):
+            asyncio.run(organism_code(FakeKeggClient(), "unknown organism"))
+        with self.assertRaises(ValueError):
+            asyncio.run(gene_symbols(FakeKeggClient(), ["b0002"]))
+
+    def test_build_gene_sets_and_gmt(self):
+        gene_sets = asyncio.run(build_gene_sets(FakeKeggClient(), "eco"))
+        self.assertEqual(gene_sets, {("eco00010", "Glycolysis / Gluconeogenesis"): {"b0002", "b0003"}})
+
+        with TemporaryDirectory() as tmpdir:
+            gmt = os.path.join(tmpdir, "eco.gmt")
+            asyncio.run(create_gmt_file(FakeKeggClient(), "eco", gmt))
+            with open(gmt) as f:
+                fields = f.read().strip().split("\t")
+            self.assertEqual(fields[:2], ["eco00010", "Glycolysis / Gluconeogenesis"])
+            self.assertEqual(sorted(fields[2:]), ["b0002", "b0003"])
+
+    def test_gmt_is_written_off_the_event_loop(self):
+        threads = []
+
+        async def run():
+            threads.append(threading.get_ident())
+            await create_gmt_file(FakeKeggClient(), "eco", "eco.gmt")
+
+        with patch("src.ResPathExplorer.async_kegg.KeggAnalysis.save_GeneSet_GMT",
+                   side_effect=lambda *args: threads.append(threading.get_ident())) as save:
+            asyncio.run(run())
+        save.assert_called_once()
+        self.assertNotEqual(threads[0], threads[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
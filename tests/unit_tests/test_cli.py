@@ -0,0 +1,52 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import pandas as pd
+
+from src.ResPathExplorer.cli import build_parser, build_serve_parser, main
+
+
+class TestCli(unittest.TestCase):
+
+    def test_parser_defaults(self):
+        args = build_parser().parse_args(["manifest.tsv", "--card-obo", "aro.obo"])
+        self.assertEqual(args.outdir, "respath_results")
+        self.assertEqual(args.cutoff, 0.05)
+        self.assertIsNone(args.workers)
+        self.assertFalse(args.no_plots)
+
+    def test_main_missing_manifest_returns_error(self):
+        self.assertEqual(main(["nonexistent_manifest.tsv", "--card-obo", "aro.obo"]), 2)
+
+    @patch("src.ResPathExplorer.cli.run_pipeline")
+    @patch("src.ResPathExplorer.cli.read_manifest", return_value=[{"sample": "s1"}])
+    def test_main_builds_config(self, mock_manifest, mock_run):
+        mock_run.return_value = pd.DataFrame({"sample": ["s1"], "status": ["ok"]})
+        with TemporaryDirectory() as tmpdir:
+            outdir = os.path.join(tmpdir, "out")
+            status = main(["manifest.tsv", "-o", outdir, "--vfdb-dir", "db", "-j", "4", "--no-plots"])
+
+        self.assertEqual(status, 0)
+        config = mock_run.call_args[0][1]
+        self.assertEqual(config["vfdb_dir"], "db")
+        self.assertFalse(config["plots"])
+        self.assertEqual(mock_run.call_args[1]["n_workers"], 4)
+
+    def test_serve_parser(self):
+        args = build_serve_parser().parse_args(["--gmt", "lmo=lmo.gmt", "--port", "9000"])
+        self.assertEqual(args.gmt, ["lmo=lmo.gmt"])
+        self.assertEqual(args.port, 9000)
+        self.assertEqual(args.host, "127.0.0.1")
+
+    @patch("src.ResPathExplorer.server.serve")
+    @patch("src.ResPathExplorer.server.AnnotationService.from_config")
+    def test_main_dispatches_serve(self, mock_from_config, mock_serve):
+        status = main(["serve", "--vfdb-dir", "db", "--gmt", "lmo=lmo.gmt", "--port", "0", "-q"])
+
+        self.assertEqual(status, 0)
+        self.assertEqual(mock_from_config.call_args[1]["gmts"], {"lmo": "lmo.gmt"})
+        self.assertEqual(mock_serve.call_args[1]["port"], 0)
+        self.assertFalse(mock_serve.call_args[1]["verbose"])
+        self.assertEqual(main(["serve", "--gmt", "lmo.gmt"]), 2)
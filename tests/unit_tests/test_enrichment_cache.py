@@ -0,0 +1,70 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+
+from src.ResPathExplorer.enrichment_cache import EnrichmentCache
+
+
+class TestEnrichmentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.table = pd.DataFrame({"Term": ["path1", "path2"], "Adjusted P-value": [0.01, 0.2],
+                                   "Genes": ["gene1;gene2", "gene3"]})
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_key_ignores_order_and_duplicates(self):
+        key = EnrichmentCache.make_key(["b", "a", "a"], None, "gmt1")
+        self.assertEqual(key, EnrichmentCache.make_key(["a", "b"], None, "gmt1"))
+        self.assertNotEqual(key, EnrichmentCache.make_key(["a", "b"], [], "gmt1"))
+        self.assertNotEqual(key, EnrichmentCache.make_key(["a", "b"], None, "gmt2"))
+
+    def test_get_or_compute(self):
+        cache = EnrichmentCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return self.table
+
+        first, cached = cache.get_or_compute("key", compute)
+        self.assertFalse(cached)
+        second, cached = cache.get_or_compute("key", compute)
+        self.assertTrue(cached)
+        self.assertEqual(len(calls), 1)
+        pd.testing.assert_frame_equal(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # Callers get copies, so filtering a result cannot alter the cache
+        second.drop(index=0, inplace=True)
+        self.assertEqual(len(cache.get("key")), 2)
+
+    def test_least_recently_used_is_dropped(self):
+        cache = EnrichmentCache(max_entries=2)
+        cache.put("a", self.table)
+        cache.put("b", self.table)
+        cache.get("a")
+        cache.put("c", self.table)
+        self.assertEqual(cache.keys(), ["a", "c"])
+        self.assertIsNone(cache.get("b"))
+
+    def test_disk_persistence(self):
+        cache_dir = os.path.join(self.tmpdir.name, "cache")
+        EnrichmentCache(cache_dir=cache_dir).put("key", self.table)
+
+        restarted = EnrichmentCache(cache_dir=cache_dir)
+        self.assertEqual(len(restarted), 0)
+        pd.testing.assert_frame_equal(restarted.get("key"), self.table)
+        self.assertEqual(restarted.keys(), ["key"])
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            EnrichmentCache(max_entries=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
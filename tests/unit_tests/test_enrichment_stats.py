@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from src.ResPathExplorer.enrichment_stats import ENRICHMENT_COLUMNS, benjamini_hochberg, category_enrichment
+
+
+class TestBenjaminiHochberg(unittest.TestCase):
+
+    def test_matches_reference_values(self):
+        adjusted = benjamini_hochberg(np.array([0.01, 0.04, 0.03, 0.20]))
+        np.testing.assert_allclose(adjusted, [0.04, 0.04 * 4 / 3, 0.04 * 4 / 3, 0.20])
+
+    def test_rows_are_independent_families_and_nan_is_skipped(self):
+        adjusted = benjamini_hochberg(np.array([[0.01, 0.02, np.nan], [0.5, 0.9, 0.01]]))
+        np.testing.assert_allclose(adjusted[0, :2], [0.02, 0.02])
+        self.assertTrue(np.isnan(adjusted[0, 2]))
+        np.testing.assert_allclose(adjusted[1], [0.75, 0.9, 0.03])
+
+
+class TestCategoryEnrichment(unittest.TestCase):
+
+    def setUp(self):
+        # 100 background items: 10 "Toxin", 90 "Adherence"
+        self.background = pd.DataFrame({"Category": ["Toxin"] * 10 + ["Adherence"] * 90})
+        self.samples = pd.DataFrame({
+            "Sample": ["s1"] * 5 + ["s2"] * 5,
+            "Category": ["Toxin"] * 4 + ["Adherence"] + ["Adherence"] * 5,
+        })
+
+    def test_long_format_and_fisher_equivalence(self):
+        result = category_enrichment(self.samples, self.background, category_col="Category")
+        self.assertEqual(list(result.columns), ENRICHMENT_COLUMNS)
+        self.assertEqual(len(result), 3)
+
+        toxin = result[(result["Sample"] == "s1") & (result["Category"] == "Toxin")].iloc[0]
+        _, fisher_p = stats.fisher_exact([[4, 1], [6, 89]], alternative="greater")
+        self.assertAlmostEqual(toxin["P-value"], fisher_p)
+        self.assertEqual(toxin["Observed"], 4)
+        self.assertAlmostEqual(toxin["Expected"], 0.5)
+        self.assertAlmostEqual(toxin["Fold enrichment"], 8.0)
+        self.assertEqual(result.iloc[0]["Category"], "Toxin")
+
+    def test_items_with_several_categories_count_once_in_sizes(self):
+        background = pd.DataFrame({"Gene": ["a", "a", "b", "c"], "Category": ["X", "Y", "X", "Y"]})
+        samples = pd.DataFrame({"Sample": ["s", "s", "s"], "Gene": ["a", "a", "a"], "Category": ["X", "Y", "X"]})
+        result = category_enrichment(samples, background, category_col="Category", item_col="Gene")
+        self.assertEqual(result["Sample size"].tolist(), [1, 1])
+        self.assertEqual(result["Background size"].tolist(), [3, 3])
+        self.assertEqual(result["Observed"].tolist(), [1, 1])
+
+    def test_samples_outside_the_background_raise(self):
+        background = pd.DataFrame({"Gene": ["a", "b"], "Category": ["X", "Y"]})
+        with self.assertRaises(ValueError):
+            category_enrichment(pd.DataFrame({"Sample": ["s"], "Gene": ["c"], "Category": ["X"]}),
+                                background, category_col="Category", item_col="Gene")
+        with self.assertRaises(ValueError):
+            category_enrichment(pd.DataFrame({"Sample": ["s"], "Gene": ["a"], "Category": ["Y"]}),
+                                background, category_col="Category", item_col="Gene")
+        with self.assertRaises(ValueError):
+            category_enrichment(pd.DataFrame({"Sample": ["s"] * 11, "Category": ["Toxin"] * 11}),
+                                self.background, category_col="Category")
+
+    def test_min_count_and_empty_inputs(self):
+        result = category_enrichment(self.samples, self.background, category_col="Category", min_count=2)
+        self.assertEqual(result["Category"].tolist(), ["Toxin", "Adherence"])
+        empty = category_enrichment(self.samples.iloc[:0], self.background, category_col="Category")
+        self.assertTrue(empty.empty)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            category_enrichment(self.samples, self.background, category_col="Missing")
+        with self.assertRaises(ValueError):
+            category_enrichment(self.samples, self.background, category_col="Category", min_count=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from src.ResPathExplorer.fasta_index import FastaIndex, decompress_fasta
+
+FASTA = (
+    ">VFG001(gb|WP_1) (plc1) phospholipase C [Phospholipase C (VF0470) - Exotoxin (VFC0235)] [A. baumannii]\n"
+    "MNRREFLLNS\nTKTMFGTAAL\nASF\n"
+    ">VFG002(gb|WP_2) (hlyA) hemolysin\n"
+    "MKKIMLVFIT\nLILV\n"
+    ">VFG003(gb|WP_3) (empty)\n"
+    ">VFG004(gb|WP_4) (inlA) internalin\n"
+    "MRKKRYVWLK"
+)
+
+
+class TestFastaIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fasta_path = os.path.join(self.tmpdir.name, "proteins.fas")
+        with open(self.fasta_path, "w") as f:
+            f.write(FASTA)
+        self.index = FastaIndex(self.fasta_path)
+
+    def tearDown(self):
+        self.index.close()
+        self.tmpdir.cleanup()
+
+    def test_fai_layout(self):
+        with open(self.fasta_path + ".fai") as f:
+            first = f.readline().rstrip("\n").split("\t")
+        self.assertEqual(first[0], "VFG001(gb|WP_1)")
+        self.assertEqual(first[1:], ["23", str(FASTA.index("\n") + 1), "10", "11"])
+
+    def test_sequence_by_row_and_name(self):
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.sequence(0), "MNRREFLLNSTKTMFGTAALASF")
+        self.assertEqual(self.index.sequence("VFG002(gb|WP_2)"), "MKKIMLVFITLILV")
+        self.assertEqual(self.index.sequence(2), "")
+        self.assertEqual(self.index.sequence(3), "MRKKRYVWLK")
+        with self.assertRaises(KeyError):
+            self.index.sequence("missing")
+        with self.assertRaises(IndexError):
+            self.index.sequence(10)
+
+    def test_header(self):
+        self.assertEqual(self.index.header(1), "VFG002(gb|WP_2) (hlyA) hemolysin")
+        self.assertEqual(self.index.header(2), "VFG003(gb|WP_3) (empty)")
+        self.assertEqual(self.index.header_offsets.tolist(), [0, FASTA.index(">VFG002"),
+                                                              FASTA.index(">VFG003"), FASTA.index(">VFG004")])
+        with self.assertRaises(IndexError):
+            self.index.header(-1)
+
+    def test_write_fasta(self):
+        out_path = os.path.join(self.tmpdir.name, "subset.fas")
+        self.assertEqual(self.index.write_fasta([3, 0], out_path), 2)
+        with open(out_path) as f:
+            content = f.read()
+        self.assertTrue(content.startswith(">VFG004(gb|WP_4) (inlA) internalin\nMRKKRYVWLK\n>VFG001"))
+        self.assertIn("TKTMFGTAAL\nASF\n", content)
+
+    def test_write_fasta_has_no_blank_lines(self):
+        out_path = os.path.join(self.tmpdir.name, "subset.fas")
+        self.assertEqual(self.index.write_fasta(range(4), out_path), 4)
+        with open(out_path) as f:
+            self.assertEqual(f.read(), FASTA + "\n")
+
+        path = os.path.join(self.tmpdir.name, "full_lines.fas")
+        with open(path, "w") as f:
+            f.write(">a\nMKKIM\nMKKIM\n>b\nMKK\n")
+        with FastaIndex(path) as index:
+            index.write_fasta([0, 1], out_path)
+        with open(out_path) as f:
+            self.assertEqual(f.read(), ">a\nMKKIM\nMKKIM\n>b\nMKK\n")
+
+    def test_write_fasta_rejects_rows_out_of_range(self):
+        out_path = os.path.join(self.tmpdir.name, "subset.fas")
+        for rows in ([-1], [0, 4]):
+            with self.assertRaises(IndexError):
+                self.index.write_fasta(rows, out_path)
+
+    def test_reuses_existing_index(self):
+        mtimes = [os.path.getmtime(self.fasta_path + suffix) for suffix in (".fai", ".hdr")]
+        with FastaIndex(self.fasta_path) as index:
+            self.assertEqual(index.names[3], "VFG004(gb|WP_4)")
+        self.assertEqual([os.path.getmtime(self.fasta_path + suffix) for suffix in (".fai", ".hdr")], mtimes)
+
+    def test_rebuilds_missing_header_offsets(self):
+        os.remove(self.fasta_path + ".hdr")
+        with FastaIndex(self.fasta_path) as index:
+            self.assertEqual(index.header(3), "VFG004(gb|WP_4) (inlA) internalin")
+
+    def test_irregular_lines_raise(self):
+        path = os.path.join(self.tmpdir.name, "irregular.fas")
+        with open(path, "w") as f:
+            f.write(">a\nMKK\nMKKIM\n")
+        with self.assertRaises(ValueError):
+            FastaIndex(path)
+
+    def test_decompress_fasta(self):
+        gz_path = os.path.join(self.tmpdir.name, "db.fas.gz")
+        with gzip.open(gz_path, "wt") as f:
+            f.write(FASTA)
+        plain_path = decompress_fasta(gz_path)
+        self.assertEqual(plain_path, gz_path[:-3])
+        with open(plain_path) as f:
+            self.assertEqual(f.read(), FASTA)
+        with self.assertRaises(ValueError):
+            FastaIndex(gz_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+
+from src.ResPathExplorer.aro_ontology import AROOntology
+from src.ResPathExplorer.gene_annotation_index import GeneAnnotationIndex, normalize_genes
+
+OBO_CONTENT = """format-version: 1.2
+
+[Term]
+id: ARO:1234567
+name: blaTEM
+def: "A beta-lactamase enzyme."
+relationship: confers_resistance_to_antibiotic ARO:3000001 ! Penicillin
+
+[Term]
+id: ARO:7654321
+name: tetA
+relationship: confers_resistance_to_antibiotic ARO:3000002 ! tetracycline
+
+[Term]
+"""
+
+
+class TestGeneAnnotationIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        obo = os.path.join(self.tmpdir.name, "aro.obo")
+        with open(obo, "w") as f:
+            f.write(OBO_CONTENT)
+        self.ontology = AROOntology(obo)
+        self.vfdb_genes = pd.DataFrame({
+            "Gene_Name": ["tetA", "fimH", "FimH ", None],
+            "VFID": ["VF0001", "VF0002", "VF0002", "VF0003"],
+            "VF_Name": ["Tet", "Type 1 fimbriae", "Type 1 fimbriae", "Other"],
+            "Functional category": ["Efflux", "Adherence", "Adherence", "Other"],
+            "Bacteria": ["Escherichia coli", "Escherichia coli", "Salmonella enterica", "Escherichia coli"],
+        })
+        self.gene_sets = {("eco00010", "Glycolysis"): ["tetA", "pgk"],
+                          ("eco00020", "TCA cycle"): ["pgk", "gltA"]}
+        self.index = GeneAnnotationIndex.build(self.ontology, self.vfdb_genes, self.gene_sets)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_normalize_genes(self):
+        self.assertEqual(normalize_genes([" TetA", "fimH"]).tolist(), ["teta", "fimh"])
+
+    def test_build_joins_databases(self):
+        table = self.index.table
+        self.assertEqual(table.loc["teta", "Databases"], "ARG,VF,KEGG")
+        self.assertEqual(table.loc["teta", "ARO ID"], "ARO:7654321")
+        self.assertEqual(table.loc["fimh", "VFID"], "VF0002")
+        self.assertEqual(table.loc["fimh", "VF organisms"], 2)
+        self.assertEqual(table.loc["pgk", "KEGG pathways"], "eco00010;eco00020")
+        self.assertEqual(table.loc["pgk", "KEGG pathway count"], 2)
+        self.assertEqual(table.loc["blatem", "Databases"], "ARG")
+
+    def test_lookup_keeps_input_order(self):
+        result = self.index.lookup(["PGK", "unknown", "blaTEM"])
+        self.assertEqual(result["Gene"].tolist(), ["PGK", "unknown", "blaTEM"])
+        self.assertEqual(result["Databases"].tolist(), ["KEGG", "", "ARG"])
+        self.assertEqual(result.loc[1, "KEGG pathway count"], 0)
+        self.assertTrue(pd.isna(result.loc[1, "ARO ID"]))
+        self.assertEqual(self.index.lookup(["pgk", "unknown"], annotated_only=True)["Gene"].tolist(), ["pgk"])
+
+    def test_single_database(self):
+        index = GeneAnnotationIndex.build(gene_sets=self.gene_sets)
+        self.assertEqual(len(index), 3)
+        self.assertIn("GltA", index)
+        self.assertTrue(index.table["ARO ID"].isna().all())
+        with self.assertRaises(ValueError):
+            GeneAnnotationIndex.build()
+
+    def test_save_and_load(self):
+        path = os.path.join(self.tmpdir.name, "index", "genes.json")
+        self.index.save(path)
+        loaded = GeneAnnotationIndex.load(path)
+        pd.testing.assert_frame_equal(loaded.lookup(["tetA", "fimH"]), self.index.lookup(["tetA", "fimH"]),
+                                      check_dtype=False)
+        with self.assertRaises(FileNotFoundError):
+            GeneAnnotationIndex.load(os.path.join(self.tmpdir.name, "missing.json"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import os
+import tempfile
+import unittest
+import zipfile
+from unittest.mock import patch
+
+import numpy as np
+
+from src.ResPathExplorer.gmt_index import (BinaryGeneSets, GMTIndex, _GeneSetMapping, _memmap_npz,
+                                           binary_gene_sets_path, is_binary_fresh, open_gene_sets,
+                                           save_binary_gene_sets)
+
+GMT_CONTENT = (
+    "map00010\tGlycolysis / Gluconeogenesis\tgeneA\tgeneB\n"
+    "map02010\tABC transporters\tgeneC\n"
+    "lmo03010\tRibosome\tgeneD\tgeneE\tgeneF\r\n"
+    "map00020\tCitrate cycle\n"
+)
+
+
+class TestGMTIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.gmt_file = os.path.join(self.tmpdir.name, "pathways.gmt")
+        with open(self.gmt_file, "w", newline="") as f:
+            f.write(GMT_CONTENT)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_mapping_interface(self):
+        gene_sets = GMTIndex(self.gmt_file)
+        self.assertEqual(len(gene_sets), 4)
+        self.assertEqual(gene_sets[("map00010", "Glycolysis / Gluconeogenesis")], ["geneA", "geneB"])
+        self.assertEqual(gene_sets["lmo03010"], ["geneD", "geneE", "geneF"])
+        self.assertEqual(gene_sets["map00020"], [])
+        self.assertIn(("map02010", "ABC transporters"), gene_sets)
+        self.assertNotIn(("map02010", "Wrong name"), gene_sets)
+        with self.assertRaises(KeyError):
+            gene_sets["map99999"]
+        gene_sets.close()
+
+    def test_gene_lists_are_loaded_lazily(self):
+        gene_sets = GMTIndex(self.gmt_file)
+        self.assertEqual(gene_sets._genes, {})
+        gene_sets["map02010"]
+        self.assertEqual(list(gene_sets._genes), [1])
+        gene_sets.close()
+
+    def test_context_manager_closes_the_file(self):
+        with GMTIndex(self.gmt_file) as gene_sets:
+            self.assertEqual(gene_sets["map02010"], ["geneC"])
+        self.assertTrue(gene_sets._file.closed)
+        self.assertEqual(gene_sets["map02010"], ["geneC"])
+        with self.assertRaises(ValueError):
+            gene_sets["lmo03010"]
+        gene_sets.close()
+
+    def test_index_is_persisted_and_reused(self):
+        GMTIndex(self.gmt_file).close()
+        index_file = self.gmt_file + ".idx"
+        self.assertTrue(os.path.exists(index_file))
+
+        with patch.object(GMTIndex, "build_index") as mock_build:
+            gene_sets = GMTIndex(self.gmt_file)
+            mock_build.assert_not_called()
+        self.assertEqual(gene_sets["map00010"], ["geneA", "geneB"])
+        gene_sets.close()
+
+    def test_filter_by_id_or_name(self):
+        gene_sets = GMTIndex(self.gmt_file, include="map00*")
+        self.assertEqual([k[0] for k in gene_sets], ["map00010", "map00020"])
+        gene_sets.close()
+
+        gene_sets = GMTIndex(self.gmt_file, include=["*ribosome*", "map02010"])
+        self.assertEqual(gene_sets.to_dict(), {"map02010": ["geneC"], "lmo03010": ["geneD", "geneE", "geneF"]})
+        gene_sets.close()
+
+        with self.assertRaises(ValueError):
+            GMTIndex(self.gmt_file, include=[])
+
+    def test_equals_dictionary(self):
+        gene_sets = GMTIndex(self.gmt_file, include="map02010")
+        self.assertEqual(gene_sets, {("map02010", "ABC transporters"): ["geneC"]})
+        gene_sets.close()
+
+    def test_missing_file_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            GMTIndex(os.path.join(self.tmpdir.name, "missing.gmt"))
+
+
+class TestBinaryGeneSets(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.gmt_file = os.path.join(self.tmpdir.name, "pathways.gmt")
+        with open(self.gmt_file, "w", newline="") as f:
+            f.write(GMT_CONTENT)
+        self.binary_file = binary_gene_sets_path(self.gmt_file)
+        text = GMTIndex(self.gmt_file)
+        self.expected = dict(text.items())
+        save_binary_gene_sets(text, self.binary_file, gmt_file=self.gmt_file)
+        text.close()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip(self):
+        gene_sets = BinaryGeneSets(self.binary_file)
+        self.assertEqual(self.binary_file, self.gmt_file + ".npz")
+        self.assertEqual(dict(gene_sets.items()), self.expected)
+        self.assertEqual(gene_sets["map00020"], [])
+        with self.assertRaises(KeyError):
+            gene_sets[("map02010", "Wrong name")]
+
+    def test_arrays_are_memory_mapped(self):
+        gene_sets = BinaryGeneSets(self.binary_file)
+        self.assertIsInstance(gene_sets._indices, np.memmap)
+        self.assertIsInstance(gene_sets._vocabulary, np.memmap)
+        with np.load(self.binary_file, allow_pickle=False) as data:
+            self.assertEqual(list(data["vocabulary"]), sorted({g for genes in self.expected.values() for g in genes}))
+
+    def test_filter(self):
+        gene_sets = BinaryGeneSets(self.binary_file, include=["*ribosome*", "map02010"])
+        self.assertEqual(gene_sets.to_dict(), {"map02010": ["geneC"], "lmo03010": ["geneD", "geneE", "geneF"]})
+
+    def test_open_prefers_fresh_binary(self):
+        self.assertTrue(is_binary_fresh(self.gmt_file))
+        self.assertIsInstance(open_gene_sets(self.gmt_file), BinaryGeneSets)
+
+    def test_open_falls_back_to_text_when_stale_or_missing(self):
+        with open(self.gmt_file, "a") as f:
+            f.write("map00030\tPentose phosphate pathway\tgeneG\n")
+        self.assertFalse(is_binary_fresh(self.gmt_file))
+        gene_sets = open_gene_sets(self.gmt_file)
+        self.assertIsInstance(gene_sets, GMTIndex)
+        self.assertEqual(gene_sets["map00030"], ["geneG"])
+        gene_sets.close()
+
+        os.remove(self.binary_file)
+        gene_sets = open_gene_sets(self.gmt_file)
+        self.assertIsInstance(gene_sets, GMTIndex)
+        gene_sets.close()
+
+    def test_empty_collection(self):
+        empty_file = os.path.join(self.tmpdir.name, "empty.npz")
+        save_binary_gene_sets({}, empty_file)
+        self.assertEqual(len(BinaryGeneSets(empty_file)), 0)
+
+    def test_rejects_unsupported_npy_versions(self):
+        npz_file = os.path.join(self.tmpdir.name, "v3.npz")
+        with zipfile.ZipFile(npz_file, "w", zipfile.ZIP_STORED) as archive, archive.open("ids.npy", "w") as f:
+            np.lib.format.write_array(f, np.array(["map00010"]), version=(3, 0))
+        with self.assertRaisesRegex(ValueError, "version"):
+            _memmap_npz(npz_file)
+
+    def test_gene_set_mapping_is_abstract(self):
+        with self.assertRaises(TypeError):
+            _GeneSetMapping()
+
+
+if __name__ == "__main__":
+    unittest.main()
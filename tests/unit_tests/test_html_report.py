@@ -0,0 +1,79 @@
+import json
+import os
+import re
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pandas as pd
+
+from src.ResPathExplorer.html_report import write_html_report
+
+
+class TestWriteHtmlReport(unittest.TestCase):
+
+    def setUp(self):
+        self.arg_df = pd.DataFrame({
+            "Gene Name": ["blaTEM", "tetA", "mecA"],
+            "Antibiotics": ["Penicillin", pd.NA, "Methicillin"]
+        })
+        self.vf_df = pd.DataFrame({"Gene_Name": ["plc1"], "VFID": ["VF0470"]})
+
+    def _read(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def test_static_table_written_in_chunks(self):
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "report.html")
+            write_html_report(self.arg_df, path, title="ARGs", chunk_size=2)
+            content = self._read(path)
+
+            self.assertIn("<title>ARGs</title>", content)
+            self.assertEqual(content.count("<tr><td>"), 3)
+            self.assertIn("<td>mecA</td>", content)
+            self.assertIn("<td></td>", content)
+
+    def test_multiple_tables_in_one_report(self):
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "report.html")
+            write_html_report({"ARGs": self.arg_df, "Virulence factors": self.vf_df}, path, title="Sample 1")
+            content = self._read(path)
+
+            self.assertIn("<h2>ARGs</h2>", content)
+            self.assertIn("<h2>Virulence factors</h2>", content)
+            self.assertIn("<td>VF0470</td>", content)
+
+    def test_paginated_report_embeds_compact_json(self):
+        df = pd.DataFrame({"Term": ["path</script>", "path2", "path3"], "Score": [1.5, None, 3]})
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "report.html")
+            write_html_report({"Enrichment": df}, path, paginate=True, page_size=2, chunk_size=2)
+            content = self._read(path)
+
+            match = re.search(r'<script type="application/json" id="table-0-data">(.*?)</script>', content)
+            self.assertIsNotNone(match)
+            payload = json.loads(match.group(1))
+            self.assertEqual(payload["columns"], ["Term", "Score"])
+            self.assertEqual(payload["rows"], [["path</script>", 1.5], ["path2", None], ["path3", 3.0]])
+            self.assertIn('data-page-size="2"', content)
+
+    def test_paginated_json_has_no_non_finite_numbers(self):
+        df = pd.DataFrame({"Term": ["a", "b", "c"], "Fold": [np.inf, -np.inf, 2.0],
+                           "Mixed": [float("nan"), float("inf"), "x"], "Count": [1, 2, 3]})
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "report.html")
+            write_html_report({"Enrichment": df}, path, paginate=True)
+            content = self._read(path)
+
+        data = re.search(r'<script type="application/json" id="table-0-data">(.*?)</script>', content).group(1)
+        payload = json.loads(data, parse_constant=lambda name: self.fail(f"Invalid JSON constant {name}"))
+        self.assertEqual(payload["rows"], [["a", None, None, 1], ["b", None, None, 2], ["c", 2.0, "x", 3]])
+
+    def test_invalid_arguments_raise(self):
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "report.html")
+            with self.assertRaises(ValueError):
+                write_html_report(["not", "a", "frame"], path)
+            with self.assertRaises(ValueError):
+                write_html_report(self.arg_df, path, chunk_size=0)
@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+
+from src.ResPathExplorer.lazy_import import lazy_import, LazyImport
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+HEAVY_MODULES = ["gseapy", "bioservices", "Bio.KEGG.REST", "seaborn", "matplotlib.pyplot"]
+
+IMPORT_BENCHMARK = """
+import json, sys, time
+start = time.perf_counter()
+import src.ResPathExplorer.CARDAnalysis
+import src.ResPathExplorer.VFDBAnalysis
+import src.ResPathExplorer.KeggAnalysis
+import src.ResPathExplorer.URL_pathway
+import src.ResPathExplorer.mapper_KeggFunctions
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+# Generous budget: pandas/numpy/requests are still imported eagerly
+IMPORT_TIME_BUDGET_SECONDS = 3.0
+
+
+class TestLazyImport(unittest.TestCase):
+
+    def test_module_not_imported_until_used(self):
+        proxy = lazy_import("json")
+        self.assertIsInstance(proxy, LazyImport)
+        self.assertEqual(proxy.dumps({"a": 1}), '{"a": 1}')
+
+    def test_attribute_proxy_is_callable(self):
+        OrderedDict = lazy_import("collections", "OrderedDict")
+        d = OrderedDict(a=1)
+        self.assertEqual(list(d.keys()), ["a"])
+
+    def test_patch_through_proxy(self):
+        proxy = lazy_import("os.path")
+        with patch.object(proxy, "exists", return_value="patched"):
+            self.assertEqual(os.path.exists("anything"), "patched")
+        self.assertIsNot(os.path.exists, "patched")
+        self.assertFalse(proxy.exists("/nonexistent/path/for/test"))
+
+    def test_invalid_module_name_raises(self):
+        with self.assertRaises(ValueError):
+            lazy_import("")
+
+    def test_package_import_does_not_load_heavy_dependencies(self):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_BENCHMARK],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        )
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+
+        self.assertEqual(report["loaded"], [], f"Heavy modules imported eagerly: {report['loaded']}")
+        self.assertLess(report["elapsed"], IMPORT_TIME_BUDGET_SECONDS,
+                        f"Package import took {report['elapsed']:.2f}s")
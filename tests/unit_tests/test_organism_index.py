@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.ResPathExplorer.organism_index import OrganismIndex, parse_organism
+
+BACTERIA = [
+    "Listeria monocytogenes EGD-e",
+    "Escherichia coli O157:H7 str. EDL933",
+    "Listeria  monocytogenes EGD-e",
+    "Listeria innocua Clip11262",
+    None,
+    "Escherichia coli CFT073",
+    "Listeriaceae bacterium",
+    "E.coli (strain)",
+]
+
+
+class TestOrganismIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = OrganismIndex(BACTERIA)
+
+    def test_parse_organism(self):
+        self.assertEqual(parse_organism("Escherichia coli O157:H7 str. EDL933"),
+                         ("escherichia", "escherichia coli", "o157:h7 str. edl933"))
+        self.assertEqual(parse_organism("Listeria"), ("listeria", "listeria", ""))
+
+    def test_names_are_normalized(self):
+        self.assertEqual(len(self.index), 6)
+        np.testing.assert_array_equal(self.index.lookup("listeria MONOCYTOGENES egd-e", "exact"), [0, 2])
+
+    def test_taxon_lookup_matches_whole_words(self):
+        np.testing.assert_array_equal(self.index.lookup("Listeria"), [0, 2, 3])
+        np.testing.assert_array_equal(self.index.lookup("Listeria monocytogenes"), [0, 2])
+        np.testing.assert_array_equal(self.index.lookup("Escherichia coli CFT073"), [5])
+
+    def test_prefix_species_and_genus_lookups(self):
+        np.testing.assert_array_equal(self.index.lookup("Lister", "prefix"), [0, 2, 3, 6])
+        np.testing.assert_array_equal(self.index.lookup("Escherichia coli K-12", "species"), [1, 5])
+        np.testing.assert_array_equal(self.index.lookup("Listeria whatever", "genus"), [0, 2, 3])
+
+    def test_regex_characters_are_literal(self):
+        np.testing.assert_array_equal(self.index.lookup("E.coli (strain)", "exact"), [7])
+        self.assertEqual(len(self.index.lookup("E.coli", "prefix")), 1)
+        self.assertEqual(len(self.index.lookup(".*")), 0)
+
+    def test_multi_species_lookup(self):
+        rows = self.index.lookup(["Listeria innocua", "Escherichia coli", "Listeria innocua"])
+        np.testing.assert_array_equal(rows, [1, 3, 5])
+
+    def test_invalid_queries(self):
+        with self.assertRaises(ValueError):
+            self.index.lookup("Listeria", "fuzzy")
+        with self.assertRaises(ValueError):
+            self.index.lookup(" ")
+
+    def test_categorical_column(self):
+        index = OrganismIndex(pd.Series(BACTERIA, dtype="category"))
+        np.testing.assert_array_equal(index.lookup("Listeria monocytogenes"), [0, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
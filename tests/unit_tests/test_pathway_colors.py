@@ -0,0 +1,64 @@
+import unittest
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+from src.ResPathExplorer.pathway_colors import colormap_lut, pathway_color_urls, pathway_gene_colors
+from src.ResPathExplorer.URL_pathway import build_pathway_url
+
+
+class TestPathwayColors(unittest.TestCase):
+
+    def setUp(self):
+        self.results = pd.DataFrame({
+            "Term": ["lmo02010", "lmo03070"],
+            "Adjusted P-value": [0.001, 0.01],
+            "Genes": ["LMO0001;LMO0002", "LMO0003"],
+        })
+        self.scores = pd.Series({"lmo0001": 2.0, "lmo0002": -4.0, "other": 1.0})
+
+    def test_colormap_lut(self):
+        lut = colormap_lut("gray", 3)
+        self.assertEqual(lut.tolist(), ["#000000", "#808080", "#ffffff"])
+        with self.assertRaises(ValueError):
+            colormap_lut("not_a_colormap")
+        with self.assertRaises(ValueError):
+            colormap_lut("Greys", 1)
+
+    def test_without_scores(self):
+        colors = pathway_gene_colors(self.results)
+        self.assertEqual(colors, {"lmo02010": {"LMO0001": "red,black", "LMO0002": "red,black"},
+                                  "lmo03070": {"LMO0003": "red,black"}})
+
+    def test_scores_through_colormap(self):
+        lut = colormap_lut("coolwarm", 5)
+        colors = pathway_gene_colors(self.results, self.scores, n_colors=5)
+        # Scores are centered on 0 within [-4, 4]: 2 -> 3rd quarter, -4 -> first color
+        self.assertEqual(colors["lmo02010"]["LMO0001"], f"{lut[3]},black")
+        self.assertEqual(colors["lmo02010"]["LMO0002"], f"{lut[0]},black")
+        self.assertEqual(colors["lmo03070"]["LMO0003"], "lightgray,black")
+
+    def test_explicit_limits_clip(self):
+        lut = colormap_lut("Greys", 256)
+        colors = pathway_gene_colors(self.results, {"LMO0001": 10.0, "LMO0002": 0.0}, cmap="Greys",
+                                     vmin=0.0, vmax=1.0, border="white")
+        self.assertEqual(colors["lmo02010"], {"LMO0001": f"{lut[-1]},white", "LMO0002": f"{lut[0]},white"})
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            pathway_gene_colors(self.results.drop(columns="Genes"))
+        with self.assertRaises(ValueError):
+            pathway_gene_colors(self.results, border="not a color")
+
+    def test_urls(self):
+        urls = pathway_color_urls(self.results, self.scores)
+        colors = pathway_gene_colors(self.results, self.scores)
+        self.assertEqual(urls, {term: build_pathway_url(term, colors[term]) for term in colors})
+        # Hex colors must reach KEGG instead of starting a URL fragment
+        parts = urlsplit(urls["lmo02010"])
+        self.assertEqual(parts.fragment, "")
+        self.assertIn(f"/LMO0001%09{colors['lmo02010']['LMO0001'].replace('#', '%23')}/", parts.query)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+
+from src.ResPathExplorer.permutation_enrichment import (PERMUTATION_COLUMNS, gene_set_incidence,
+                                                        permutation_enrichment)
+
+
+class TestPermutationEnrichment(unittest.TestCase):
+
+    def setUp(self):
+        self.genes = [f"gene{i}" for i in range(200)]
+        self.gene_sets = {
+            ("path1", "Enriched pathway"): self.genes[:20],
+            ("path2", "Other pathway"): self.genes[100:140],
+            ("path3", "Small pathway"): self.genes[190:195],
+        }
+        self.gene_list = self.genes[:15] + self.genes[150:155]
+
+    def test_incidence_matrix(self):
+        terms, universe, incidence = gene_set_incidence({"a": ["x", "y"], "b": ["y", "z", "y"]})
+        self.assertEqual(terms, ["a", "b"])
+        self.assertEqual(universe, ["x", "y", "z"])
+        np.testing.assert_array_equal(incidence.toarray(), [[1, 0], [1, 1], [0, 1]])
+
+        _, universe, incidence = gene_set_incidence({"a": ["x", "y"]}, universe=["y", "w"])
+        self.assertEqual(universe, ["y", "w"])
+        np.testing.assert_array_equal(incidence.toarray(), [[1], [0]])
+
+    def test_enriched_pathway_has_smallest_pvalue(self):
+        result = permutation_enrichment(self.gene_list, self.gene_sets, background=self.genes,
+                                        n_permutations=2000, n_workers=1)
+        self.assertEqual(list(result.columns), PERMUTATION_COLUMNS)
+        top = result.iloc[0]
+        self.assertEqual(top["Term"], "path1")
+        self.assertEqual(top["Overlap"], 15)
+        self.assertEqual(top["Gene set size"], 20)
+        self.assertAlmostEqual(top["Empirical P-value"], 1 / 2001)
+        self.assertAlmostEqual(top["Expected overlap"], 20 * 20 / 200, delta=0.2)
+
+        unrelated = result.set_index("Term").loc["path2"]
+        self.assertEqual(unrelated["Overlap"], 0)
+        self.assertEqual(unrelated["Empirical P-value"], 1.0)
+
+    def test_reproducible_across_blocks_and_workers(self):
+        kwargs = dict(background=self.genes, n_permutations=500, seed=7, block_size=128)
+        serial = permutation_enrichment(self.gene_list, self.gene_sets, n_workers=1, **kwargs)
+        parallel = permutation_enrichment(self.gene_list, self.gene_sets, n_workers=2, **kwargs)
+        self.assertTrue(serial.equals(parallel))
+
+    def test_no_overlap_returns_empty(self):
+        result = permutation_enrichment(["unknown"], self.gene_sets, n_permutations=10, n_workers=1)
+        self.assertTrue(result.empty)
+        self.assertEqual(list(result.columns), PERMUTATION_COLUMNS)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            permutation_enrichment(self.gene_list, self.gene_sets, n_permutations=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import io
+import os
+import tarfile
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from src.ResPathExplorer import pipeline
+from src.ResPathExplorer.pipeline import read_gene_list, read_manifest, run_pipeline, process_sample
+
+OBO_CONTENT = """[Term]
+id: ARO:1234567
+name: beta-lactamase
+synonym: "blaTEM, blaSHV"
+def: "A beta-lactamase enzyme."
+relationship: confers_resistance_to_antibiotic ARO:3000001 ! Penicillin
+
+[Term]
+id: ARO:7654321
+name: tetA
+def: "Tetracycline efflux pump."
+relationship: confers_resistance_to_antibiotic ARO:3000002 ! tetracycline
+
+[Term]
+"""
+
+
+class FakeVFDB:
+    def search_virulence_genes(self, genes, bacteria):
+        return pd.DataFrame({"Gene_Name": ["plc1"], "Bacteria": [bacteria],
+                             "Functional category": ["Exotoxin"]})
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.dir = self.tmpdir.name
+        self.obo_file = os.path.join(self.dir, "aro.obo")
+        with open(self.obo_file, "w", encoding="utf-8") as f:
+            f.write(OBO_CONTENT)
+
+        with open(os.path.join(self.dir, "s1.txt"), "w") as f:
+            f.write("# sample 1\nblaTEM\ntetA\n\ngeneX\n")
+        with open(os.path.join(self.dir, "s2.txt"), "w") as f:
+            f.write("tetA\n")
+
+        self.manifest = os.path.join(self.dir, "manifest.tsv")
+        with open(self.manifest, "w") as f:
+            f.write("sample\tgenes\tbacteria\n")
+            f.write("s1\ts1.txt\tListeria monocytogenes\n")
+            f.write("s2\ts2.txt\t\n")
+            f.write("s3\tmissing.txt\t\n")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_read_gene_list_skips_comments_and_blanks(self):
+        self.assertEqual(read_gene_list(os.path.join(self.dir, "s1.txt")), ["blaTEM", "tetA", "geneX"])
+
+    def test_read_manifest_resolves_paths(self):
+        samples = read_manifest(self.manifest)
+        self.assertEqual([s["sample"] for s in samples], ["s1", "s2", "s3"])
+        self.assertEqual(samples[0]["genes"], os.path.join(self.dir, "s1.txt"))
+        self.assertEqual(samples[0]["bacteria"], "Listeria monocytogenes")
+        self.assertIsNone(samples[1]["bacteria"])
+
+    def test_read_manifest_missing_columns(self):
+        bad = os.path.join(self.dir, "bad.csv")
+        with open(bad, "w") as f:
+            f.write("name,genes\ns1,s1.txt\n")
+        with self.assertRaises(ValueError):
+            read_manifest(bad)
+
+    def test_read_manifest_rejects_unsafe_or_repeated_names(self):
+        bad = os.path.join(self.dir, "bad.csv")
+        for names in (["../x"], ["/tmp/x"], ["a\\b"], [".."], ["."], [" "], ["s1", " s1 "]):
+            with open(bad, "w") as f:
+                f.write("sample,genes\n" + "".join(f"{name},s1.txt\n" for name in names))
+            with self.assertRaises(ValueError, msg=names):
+                read_manifest(bad)
+
+    def test_run_pipeline_requires_a_stage(self):
+        with self.assertRaises(ValueError):
+            run_pipeline(read_manifest(self.manifest), {"outdir": self.dir})
+
+    def test_run_pipeline_parallel_card_stage(self):
+        outdir = os.path.join(self.dir, "results")
+        config = {"outdir": outdir, "card_obo": self.obo_file, "plots": False}
+
+        summary = run_pipeline(read_manifest(self.manifest), config, n_workers=2)
+
+        self.assertEqual(summary["sample"].tolist(), ["s1", "s2", "s3"])
+        self.assertEqual(summary["status"].tolist()[:2], ["ok", "ok"])
+        self.assertTrue(summary["status"].iloc[2].startswith("failed"))
+        self.assertEqual(summary["ARGs"].tolist()[:2], [2, 1])
+        self.assertTrue(os.path.exists(os.path.join(outdir, "summary.tsv")))
+        self.assertTrue(os.path.exists(os.path.join(outdir, "s1", "report.html")))
+        arg_df = pd.read_csv(os.path.join(outdir, "s1", "ARG.tsv"), sep="\t")
+        self.assertEqual(arg_df["Gene ID"].tolist(), ["ARO:1234567", "ARO:7654321"])
+
+    def test_process_sample_with_vfdb_stage_and_plots(self):
+        outdir = os.path.join(self.dir, "results")
+        pipeline.init_worker({**pipeline.DEFAULT_CONFIG, "outdir": outdir, "card_obo": self.obo_file})
+        pipeline._WORKER_STATE["vfdb"] = FakeVFDB()
+        pipeline._WORKER_STATE["vfdb_version"] = ["fasta checksum", "xls checksum"]
+        try:
+            summary = process_sample(read_manifest(self.manifest)[0])
+        finally:
+            pipeline._WORKER_STATE.clear()
+
+        self.assertEqual(summary["VFs"], 1)
+        for file_name in ["ARG.tsv", "VF.tsv", "report.html",
+                          "antibiotic_frequencies.png", "virulence_factors.png"]:
+            self.assertTrue(os.path.exists(os.path.join(outdir, "s1", file_name)), file_name)
+
+    def test_rerun_with_cache_skips_card_stage(self):
+        cache_dir = os.path.join(self.dir, "cache")
+        samples = read_manifest(self.manifest)[:2]
+        config = {"outdir": os.path.join(self.dir, "results"), "card_obo": self.obo_file,
+                  "plots": False, "cache_dir": cache_dir}
+
+        run_pipeline(samples, config, n_workers=1)
+        self.assertEqual(pipeline._WORKER_STATE["cache"].misses, 2)
+
+        run_pipeline(samples, config, n_workers=1)
+        cache = pipeline._WORKER_STATE["cache"]
+        pipeline._WORKER_STATE.clear()
+        self.assertEqual((cache.hits, cache.misses), (2, 0))
+
+    def test_prepare_databases_downloads_card_to_card_obo(self):
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w:bz2") as tar:
+            info = tarfile.TarInfo("./aro.obo")
+            info.size = len(OBO_CONTENT.encode())
+            tar.addfile(info, io.BytesIO(OBO_CONTENT.encode()))
+        response = MagicMock(status_code=200)
+        response.iter_content.return_value = [archive.getvalue()]
+
+        with TemporaryDirectory() as tmpdir:
+            card_obo = os.path.join(tmpdir, "databases", "card.obo")
+            with patch("src.ResPathExplorer.CARDAnalysis.requests.get", return_value=response):
+                pipeline.prepare_databases({"card_obo": card_obo})
+            with open(card_obo) as f:
+                self.assertEqual(f.read(), OBO_CONTENT)
+            self.assertEqual(os.listdir(os.path.dirname(card_obo)), ["card.obo"])
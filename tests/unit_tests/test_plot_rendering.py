@@ -0,0 +1,89 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import pandas as pd
+from matplotlib.figure import Figure
+
+from src.ResPathExplorer.CARDAnalysis import CARDAnalysis
+from src.ResPathExplorer.VFDBAnalysis import VFDBAnalysis
+from src.ResPathExplorer.KeggAnalysis import KeggAnalysis
+from src.ResPathExplorer.plot_rendering import new_figure, render_plot_job, render_plots_batch
+
+
+class TestPlotRendering(unittest.TestCase):
+
+    def setUp(self):
+        self.arg_df = pd.DataFrame({
+            "Gene Name": ["geneA", "geneB", "geneC"],
+            "Antibiotics": ["Penicillin", "Penicillin, Tetracycline", "Tetracycline"]
+        })
+        self.vf_df = pd.DataFrame({
+            "Functional category": ["Adherence", "Adherence", "Invasion", "Biofilm"]
+        })
+        self.enrichment_df = pd.DataFrame({
+            "Pathway name": ["Pathway A", "Pathway B"],
+            "Adjusted P-value": [0.01, 0.05],
+            "Overlap": [10, 5]
+        })
+
+    def test_new_figure_headless_uses_agg_canvas(self):
+        fig, ax = new_figure((4, 3), headless=True)
+        self.assertIsInstance(fig, Figure)
+        self.assertEqual(type(fig.canvas).__name__, "FigureCanvasAgg")
+        self.assertIs(ax.figure, fig)
+
+    @patch("matplotlib.pyplot.show")
+    def test_headless_plots_return_figures_without_show(self, mock_show):
+        figures = [
+            CARDAnalysis.plot_antibiotic_frequencies(self.arg_df, headless=True),
+            VFDBAnalysis.plot_virulence_factors_percentage(self.vf_df, "E.coli", headless=True),
+            KeggAnalysis.plot_enrichment_results(self.enrichment_df, "Test", "dotplot", headless=True),
+        ]
+        for fig in figures:
+            self.assertIsInstance(fig, Figure)
+        mock_show.assert_not_called()
+
+    def test_headless_plot_saves_file(self):
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "abx.png")
+            CARDAnalysis.plot_antibiotic_frequencies(self.arg_df, headless=True, save_path=path)
+            self.assertTrue(os.path.exists(path))
+
+    def test_render_plot_job_invalid_kind(self):
+        with self.assertRaises(ValueError):
+            render_plot_job({"kind": "pie", "data": self.arg_df, "output_file": "x.png"})
+
+    def test_render_plots_batch_in_process_pool(self):
+        with TemporaryDirectory() as tmpdir:
+            jobs = []
+            for i in range(3):
+                jobs.append({"kind": "antibiotic_frequencies", "data": self.arg_df,
+                             "output_file": os.path.join(tmpdir, f"sample{i}", "abx.png")})
+            jobs.append({"kind": "virulence_factors", "data": self.vf_df,
+                         "output_file": os.path.join(tmpdir, "vf.png"),
+                         "options": {"bacteria_name": "E.coli"}})
+            jobs.append({"kind": "enrichment", "data": self.enrichment_df,
+                         "output_file": os.path.join(tmpdir, "enrichment.png"),
+                         "options": {"plot_title": "Test", "plot_type": "barplot"}})
+
+            written = render_plots_batch(jobs, n_workers=2)
+
+            self.assertEqual(written, [job["output_file"] for job in jobs])
+            for path in written:
+                self.assertTrue(os.path.exists(path))
+
+    def test_render_plots_batch_reports_failed_jobs(self):
+        with TemporaryDirectory() as tmpdir:
+            jobs = [
+                {"kind": "antibiotic_frequencies", "data": self.arg_df,
+                 "output_file": os.path.join(tmpdir, "ok.png")},
+                {"kind": "antibiotic_frequencies", "data": pd.DataFrame({"x": [1]}),
+                 "output_file": os.path.join(tmpdir, "bad.png")},
+            ]
+            results = render_plots_batch(jobs, n_workers=1)
+            self.assertEqual(len(results), 2)
+            self.assertEqual(results[0], os.path.join(tmpdir, "ok.png"))
+            self.assertIsInstance(results[1], Exception)
+            self.assertFalse(os.path.exists(os.path.join(tmpdir, "bad.png")))
@@ -0,0 +1,88 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.ResPathExplorer.prerank_gsea import (PRERANK_COLUMNS, prepare_ranking, prerank_gsea,
+                                              running_sum_extremes)
+
+
+def brute_force_es(ranking, members, weight=1.0):
+    """Reference enrichment score from the full running sum."""
+    hits = np.isin(ranking.index, members)
+    weights = np.abs(ranking.to_numpy()) ** weight
+    running = np.cumsum(hits * weights) / np.sum(hits * weights) - np.cumsum(~hits) / np.sum(~hits)
+    return running.max() if running.max() >= -running.min() else running.min()
+
+
+class TestPrerankGSEA(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        genes = [f"gene{i}" for i in range(300)]
+        self.ranking = pd.Series(np.linspace(3, -3, 300), index=genes)
+        self.gene_sets = {
+            ("up", "Up-regulated"): genes[:20],
+            ("down", "Down-regulated"): genes[-20:],
+            ("random", "Random"): list(rng.choice(genes, 25, replace=False)),
+        }
+
+    def test_prepare_ranking(self):
+        ranked = prepare_ranking({"a": 1.0, "b": 3.0, "c": np.nan, "d": -2.0})
+        self.assertEqual(list(ranked.index), ["b", "a", "d"])
+
+        duplicated = pd.Series([1.0, 5.0], index=["a", "a"])
+        self.assertEqual(prepare_ranking(duplicated).to_dict(), {"a": 5.0})
+
+    def test_scores_match_running_sum(self):
+        ranked = prepare_ranking(self.ranking)
+        for weight in (0.0, 1.0):
+            result = prerank_gsea(self.ranking, self.gene_sets, weight=weight, min_size=5,
+                                  n_permutations=10, n_workers=1).set_index("Term")
+            for (term, _), members in self.gene_sets.items():
+                self.assertAlmostEqual(result.loc[term, "ES"], brute_force_es(ranked, members, weight))
+
+    def test_vectorized_extremes_for_several_rows(self):
+        weights = np.ones(10)
+        positions = np.array([[0, 1, 7, 9], [8, 9, 0, 5]])
+        scores, _, _ = running_sum_extremes(positions, np.array([0, 2]), weights)
+        ranking = pd.Series(np.ones(10), index=[str(i) for i in range(10)])
+        for row in range(2):
+            for segment, members in enumerate((positions[row, :2], positions[row, 2:])):
+                expected = brute_force_es(ranking, [str(i) for i in members], weight=0)
+                self.assertAlmostEqual(scores[row, segment], expected)
+
+    def test_significance_and_leading_edge(self):
+        result = prerank_gsea(self.ranking, self.gene_sets, min_size=5, n_permutations=200,
+                              n_workers=1).set_index("Term")
+        self.assertEqual(list(result.reset_index().columns), PRERANK_COLUMNS)
+
+        self.assertGreater(result.loc["up", "NES"], 0)
+        self.assertLess(result.loc["down", "NES"], 0)
+        self.assertEqual(result.loc["up", "NOM p-val"], 0.0)
+        self.assertEqual(result.loc["down", "NOM p-val"], 0.0)
+        self.assertLess(result.loc["up", "FDR q-val"], 0.05)
+        self.assertGreater(result.loc["random", "NOM p-val"], 0.05)
+
+        self.assertEqual(result.loc["up", "Lead_genes"].split(";"), [f"gene{i}" for i in range(20)])
+        self.assertEqual(result.loc["up", "Tag %"], 1.0)
+        self.assertAlmostEqual(result.loc["down", "Gene %"], 20 / 300)
+
+    def test_reproducible_across_workers(self):
+        kwargs = dict(min_size=5, n_permutations=120, seed=3, block_size=50)
+        serial = prerank_gsea(self.ranking, self.gene_sets, n_workers=1, **kwargs)
+        parallel = prerank_gsea(self.ranking, self.gene_sets, n_workers=2, **kwargs)
+        pd.testing.assert_frame_equal(serial, parallel)
+
+    def test_size_filter_and_invalid_arguments(self):
+        result = prerank_gsea(self.ranking, self.gene_sets, min_size=21, n_permutations=10, n_workers=1)
+        self.assertEqual(list(result["Term"]), ["random"])
+        self.assertTrue(prerank_gsea(self.ranking, self.gene_sets, min_size=100, n_permutations=10).empty)
+        with self.assertRaises(ValueError):
+            prerank_gsea(self.ranking, self.gene_sets, n_permutations=0)
+        with self.assertRaises(ValueError):
+            prerank_gsea(self.ranking, self.gene_sets, min_size=10, max_size=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
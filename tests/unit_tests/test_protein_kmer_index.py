@@ -0,0 +1,95 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.ResPathExplorer.protein_kmer_index import ProteinKmerIndex, _check_key_bits, iter_fasta
+
+TARGETS = [
+    ("VFG001(gb|WP_1) (plc1) phospholipase C", "MNRREFLLNSTKTMFGTAALASFPLSIQKALAIDAKVESGTIQDVKHIVILTQENRSFDN"),
+    ("VFG002(gb|WP_2) (hlyA) hemolysin", "MKKIMLVFITLILVSLPIAQQTEAKDASAFNKENSISSMAPPASPPASPKTPIEKKHADEI"),
+    ("VFG003(gb|WP_3) (inlA) internalin", "MRKKRYVWLKSILVAILVFGSGVWINTSNGTNAQAETITVPTPIKQIFPDDAFAETIKDN"),
+]
+
+
+class TestProteinKmerIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = ProteinKmerIndex.build(TARGETS, k=4)
+
+    def test_build(self):
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.ids.tolist(), ["VFG001(gb|WP_1)", "VFG002(gb|WP_2)", "VFG003(gb|WP_3)"])
+        self.assertTrue(np.all(np.diff(self.index.kmers.astype(np.int64)) > 0))
+        self.assertEqual(self.index.offsets[-1], len(self.index.postings))
+        self.assertEqual(self.index.sequence(1), TARGETS[1][1])
+
+    def test_invalid_k_raises(self):
+        with self.assertRaises(ValueError):
+            ProteinKmerIndex.build(TARGETS, k=2)
+        with self.assertRaises(ValueError):
+            ProteinKmerIndex.build([], k=5)
+
+    def test_kmer_keys_must_fit_in_64_bits(self):
+        _check_key_bits(8, 2 ** 24)
+        with self.assertRaises(ValueError):
+            _check_key_bits(8, 2 ** 24 + 1)
+        with self.assertRaises(ValueError):
+            ProteinKmerIndex(13, self.index.ids, self.index.kmers, self.index.offsets, self.index.postings,
+                             self.index.residues, self.index.sequence_offsets)
+
+    def test_repeated_query_names_raise(self):
+        queries = [("q", TARGETS[0][1][:30]), ("q", TARGETS[1][1][:30])]
+        with self.assertRaises(ValueError):
+            self.index.search(queries)
+        hits = self.index.search(queries[:1], top_n=1)
+        with self.assertRaises(ValueError):
+            self.index.align_hits(hits, queries)
+
+    def test_search_ranks_the_source_protein_first(self):
+        queries = {
+            "q_hly": TARGETS[1][1][5:50],
+            "q_inl": "xx" + TARGETS[2][1][10:40].lower(),
+            "q_none": "WWWWWWWWWWWW",
+        }
+        hits = self.index.search(queries, top_n=1)
+        self.assertEqual(hits["Query"].tolist(), ["q_hly", "q_inl"])
+        self.assertEqual(hits["Row"].tolist(), [1, 2])
+        self.assertEqual(hits.loc[0, "Coverage"], 1.0)
+
+    def test_ambiguous_residues_break_kmers(self):
+        hits = self.index.search({"q": "MNRXEFL"}, min_shared=1)
+        self.assertTrue(hits.empty)
+
+    def test_search_without_queries(self):
+        self.assertTrue(self.index.search({}).empty)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "index.npz")
+            self.index.save(path)
+            loaded = ProteinKmerIndex.load(path)
+        self.assertEqual(loaded.k, 4)
+        np.testing.assert_array_equal(loaded.kmers, self.index.kmers)
+        self.assertEqual(loaded.sequence(2), TARGETS[2][1])
+
+    def test_align_hits(self):
+        queries = {"q": TARGETS[0][1][:30]}
+        hits = self.index.align_hits(self.index.search(queries, top_n=1), queries)
+        self.assertEqual(hits.loc[0, "Identity"], 1.0)
+        self.assertGreater(hits.loc[0, "Alignment score"], 0)
+
+    def test_iter_fasta_gzip(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "proteins.fas.gz")
+            with gzip.open(path, "wt") as f:
+                for header, sequence in TARGETS:
+                    f.write(f">{header}\n{sequence[:30]}\n{sequence[30:]}\n")
+            records = list(iter_fasta(path))
+        self.assertEqual(records, TARGETS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.ResPathExplorer.resistance_matrix import ResistanceCohort, encode_antibiotics
+
+
+def arg_frame(rows):
+    return pd.DataFrame(rows, columns=["Gene ID", "Gene Name", "Antibiotics"])
+
+
+class TestResistanceCohort(unittest.TestCase):
+
+    def setUp(self):
+        self.cohort = ResistanceCohort.from_samples({
+            "s1": arg_frame([
+                ["ARO:1", "blaTEM", "Penicillin, Ampicillin"],
+                ["ARO:2", "tetA", "tetracycline"],
+            ]),
+            "s2": arg_frame([
+                ["ARO:1", "blaTEM", "Penicillin, Ampicillin"],
+                ["ARO:3", "blaOXA", "Penicillin"],
+            ]),
+            "s3": arg_frame([
+                ["ARO:4", "sul1", None],
+            ]),
+        })
+
+    def test_encode_antibiotics(self):
+        pairs, vocabulary = encode_antibiotics(arg_frame([
+            ["ARO:1", "a", "X, Y"],
+            ["ARO:2", "b", None],
+            ["ARO:3", "c", "Y"],
+        ]))
+        self.assertEqual(vocabulary, ["X", "Y"])
+        np.testing.assert_array_equal(pairs, [[0, 0], [0, 1], [2, 1]])
+
+    def test_encode_antibiotics_missing_column(self):
+        with self.assertRaises(ValueError):
+            encode_antibiotics(pd.DataFrame({"Gene ID": ["ARO:1"]}))
+
+    def test_vocabularies_are_shared(self):
+        self.assertEqual(self.cohort.samples, ["s1", "s2", "s3"])
+        self.assertEqual(self.cohort.antibiotics, ["Penicillin", "Ampicillin", "tetracycline"])
+        self.assertEqual(self.cohort.args, ["ARO:1", "ARO:2", "ARO:3", "ARO:4"])
+
+    def test_sample_antibiotic_matrix(self):
+        counts = self.cohort.sample_antibiotic_matrix().toarray()
+        np.testing.assert_array_equal(counts, [[1, 1, 1], [2, 1, 0], [0, 0, 0]])
+        binary = self.cohort.sample_antibiotic_matrix(binary=True).toarray()
+        np.testing.assert_array_equal(binary, [[1, 1, 1], [1, 1, 0], [0, 0, 0]])
+
+    def test_sample_arg_matrix(self):
+        matrix = self.cohort.sample_arg_matrix().toarray()
+        np.testing.assert_array_equal(matrix, [[1, 1, 0, 0], [1, 0, 1, 0], [0, 0, 0, 1]])
+
+    def test_arg_antibiotic_matrix(self):
+        matrix = self.cohort.arg_antibiotic_matrix().toarray()
+        np.testing.assert_array_equal(matrix, [[1, 1, 0], [0, 0, 1], [1, 0, 0], [0, 0, 0]])
+
+    def test_antibiotic_frequencies(self):
+        frequencies = self.cohort.antibiotic_frequencies()
+        self.assertEqual(frequencies.loc["s1", "Penicillin"], 50.0)
+        self.assertEqual(frequencies.loc["s2", "Penicillin"], 100.0)
+        self.assertEqual(frequencies.loc["s3"].sum(), 0.0)
+        pd.testing.assert_frame_equal(self.cohort.antibiotic_frequencies("s2"), frequencies.loc[["s2"]])
+        with self.assertRaises(KeyError):
+            self.cohort.antibiotic_frequencies("missing")
+
+    def test_prevalence(self):
+        prevalence = self.cohort.prevalence()
+        self.assertEqual(prevalence.index[-1], "tetracycline")
+        self.assertAlmostEqual(prevalence["Penicillin"], 2 / 3)
+        self.assertAlmostEqual(self.cohort.arg_prevalence()["ARO:1"], 2 / 3)
+
+    def test_cooccurrence(self):
+        cooccurrence = self.cohort.cooccurrence()
+        self.assertEqual(cooccurrence.loc["Penicillin", "Penicillin"], 2)
+        self.assertEqual(cooccurrence.loc["Penicillin", "tetracycline"], 1)
+        self.assertEqual(cooccurrence.loc["Ampicillin", "Penicillin"], 2)
+
+    def test_add_sample_errors(self):
+        with self.assertRaises(ValueError):
+            self.cohort.add_sample("s1", arg_frame([]))
+        with self.assertRaises(ValueError):
+            ResistanceCohort().sample_arg_matrix()
+
+    def test_sample_rows_follow_samples(self):
+        self.assertEqual(self.cohort._sample_rows, {"s1": 0, "s2": 1, "s3": 2})
+        with self.assertRaises(ValueError):
+            self.cohort.add_sample("s2", arg_frame([]))
+        self.assertEqual(self.cohort.samples, ["s1", "s2", "s3"])
+
+    def test_empty_sample(self):
+        self.cohort.add_sample("s4", pd.DataFrame())
+        self.assertEqual(self.cohort.sample_antibiotic_matrix().shape, (4, 3))
+        self.assertEqual(self.cohort.antibiotic_frequencies().loc["s4"].sum(), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+import http.client
+import json
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from src.ResPathExplorer.aro_ontology import AROOntology
+from src.ResPathExplorer.KeggAnalysis import EnrichmentResult, KeggAnalysis
+from src.ResPathExplorer.server import HAS_ARROW, AnnotationService, make_server
+from src.ResPathExplorer.VFDBAnalysis import VFDBAnalysis
+
+OBO_CONTENT = """format-version: 1.2
+
+[Term]
+id: ARO:1234567
+name: beta-lactamase
+synonym: "blaTEM, blaSHV"
+def: "A beta-lactamase enzyme."
+relationship: confers_resistance_to_antibiotic ARO:3000001 ! Penicillin
+
+[Term]
+"""
+
+
+class TestAnnotationServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        obo_file = os.path.join(cls.tmpdir.name, "aro.obo")
+        with open(obo_file, "w") as f:
+            f.write(OBO_CONTENT)
+
+        vfdb = VFDBAnalysis(db_dir=os.path.join(cls.tmpdir.name, "db"))
+        vfdb.df_genes = pd.DataFrame({
+            "Gene_Name": ["hly", "prfA", "hly"],
+            "Bacteria": ["Listeria monocytogenes EGD-e", "Listeria monocytogenes EGD-e", "Escherichia coli"],
+            "VFID": ["VF1", "VF2", "VF3"],
+        })
+
+        kegg = KeggAnalysis.__new__(KeggAnalysis)
+        kegg.gene_set = {("lmo00010", "Glycolysis"): ["geneA", "geneB"]}
+        kegg.enrich = MagicMock(return_value=EnrichmentResult(
+            results=pd.DataFrame({"Term": ["lmo00010"], "Adjusted P-value": [0.01]}),
+            top_pathways=pd.DataFrame({"Term": ["lmo00010"]}),
+            paths_genes={"lmo00010": ("geneA",)},
+        ))
+        cls.kegg = kegg
+
+        cls.service = AnnotationService(ontology=AROOntology(obo_file), vfdb=vfdb, kegg={"lmo": kegg})
+        cls.server = make_server(cls.service, port=0)
+        cls.url = "http://%s:%d" % cls.server.server_address
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.tmpdir.cleanup()
+
+    def post(self, endpoint, payload, headers=None):
+        request = urllib.request.Request(self.url + endpoint, data=json.dumps(payload).encode(),
+                                         headers={"Content-Type": "application/json", **(headers or {})})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_health(self):
+        with urllib.request.urlopen(self.url + "/health") as response:
+            body = json.loads(response.read())
+        self.assertEqual(body["status"], "ok")
+        self.assertEqual(body["databases"]["vfdb"], 3)
+        self.assertEqual(body["databases"]["kegg"], {"lmo": 1})
+
+    def test_annotate(self):
+        status, body = self.post("/annotate", {"genes": ["blaTEM", "unknown"]})
+        self.assertEqual(status, 200)
+        self.assertEqual([row["Gene ID"] for row in body["rows"]], ["ARO:1234567"])
+        self.assertIn("elapsed_ms", body)
+
+    def test_search(self):
+        status, body = self.post("/search", {"genes": ["HLY", "prfA"], "bacteria": "Listeria"})
+        self.assertEqual(status, 200)
+        self.assertEqual([row["VFID"] for row in body["rows"]], ["VF1", "VF2"])
+
+    def test_enrich(self):
+        status, body = self.post("/enrich", {"genes": ["geneA"], "cutoff": 0.1, "top": 5})
+        self.assertEqual(status, 200)
+        self.assertEqual(body["rows"][0]["Term"], "lmo00010")
+        self.assertEqual(body["paths_genes"], {"lmo00010": ["geneA"]})
+        self.kegg.enrich.assert_called_with(["geneA"], 0.1, 5, genes_background=None)
+
+    def test_errors(self):
+        self.assertEqual(self.post("/annotate", {"genes": "blaTEM"})[0], 400)
+        self.assertEqual(self.post("/search", {"genes": ["hly"]})[0], 400)
+        self.assertEqual(self.post("/enrich", {"genes": ["geneA"], "organism": "eco"})[0], 400)
+        self.assertEqual(self.post("/unknown", {})[0], 404)
+
+    def test_malformed_parameters_are_bad_requests(self):
+        for payload in ({"cutoff": [0.1]}, {"cutoff": None}, {"top": "five"}, {"top": True},
+                        {"organism": ["lmo"]}):
+            status, body = self.post("/enrich", {"genes": ["geneA"], **payload})
+            self.assertEqual(status, 400, payload)
+        self.assertEqual(self.post("/search", {"genes": ["hly"], "bacteria": "Listeria", "level": 3})[0], 400)
+
+    def test_overrides_are_read_once(self):
+        overrides_file = os.path.join(self.tmpdir.name, "overrides.tsv")
+        pd.DataFrame({"Gene ID": ["ARO:1234567"], "Antibiotics": ["ampicillin"]}).to_csv(
+            overrides_file, sep="\t", index=False)
+        service = AnnotationService(ontology=self.service.ontology, overrides_file=overrides_file)
+        with patch("src.ResPathExplorer.CARDAnalysis.pd.read_csv") as mock_read:
+            for _ in range(2):
+                table = service.annotate(["blaTEM"])
+                self.assertEqual(table["Antibiotics"].tolist(), ["ampicillin"])
+        mock_read.assert_not_called()
+
+    def test_enrich_does_not_query_kegg(self):
+        gmt_file = os.path.join(self.tmpdir.name, "lmo.gmt")
+        genes = [f"gene{i}" for i in range(40)]
+        with open(gmt_file, "w") as f:
+            f.write("lmo00010\tGlycolysis\t" + "\t".join(genes[:10]) + "\n")
+            f.write("lmo00020\tCitrate cycle\t" + "\t".join(genes[10:40]) + "\n")
+        kegg = KeggAnalysis.__new__(KeggAnalysis)
+        kegg.file_name_gmt = gmt_file
+        kegg.gmt_filter = None
+        kegg._load_gmt_file(gmt_file)
+        kegg.enrichment_cache = None
+        service = AnnotationService(kegg={"lmo": kegg})
+
+        with patch("src.ResPathExplorer.KeggAnalysis.REST.kegg_get", side_effect=ConnectionError("offline")):
+            table, extra = service.handle("enrich", {"genes": genes[:8], "cutoff": 1.0, "background": genes})
+        self.assertEqual(table.set_index("Term").loc["lmo00010", "Pathway name"], "Glycolysis")
+        self.assertEqual(extra["top_pathways"][0], "lmo00010")
+
+    def test_invalid_content_length_is_a_bad_request(self):
+        for length in ("abc", "-5"):
+            connection = http.client.HTTPConnection(*self.server.server_address, timeout=5)
+            connection.putrequest("POST", "/annotate")
+            connection.putheader("Content-Length", length)
+            connection.endheaders()
+            response = connection.getresponse()
+            self.assertEqual(response.status, 400, length)
+            self.assertIn("Content-Length", json.loads(response.read())["error"])
+            connection.close()
+
+    def test_arrow_response_keeps_extra_fields(self):
+        request = urllib.request.Request(
+            self.url + "/enrich", data=json.dumps({"genes": ["geneA"]}).encode(),
+            headers={"Content-Type": "application/json", "Accept": "application/vnd.apache.arrow.stream"})
+        if not HAS_ARROW:
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(request)
+            return
+        import pyarrow
+        with urllib.request.urlopen(request) as response:
+            table = pyarrow.ipc.open_stream(response.read()).read_all()
+        extra = json.loads(table.schema.metadata[b"respath"])
+        self.assertEqual(extra["paths_genes"], {"lmo00010": ["geneA"]})
+        self.assertIn("elapsed_ms", extra)
+
+    def test_arrow_needs_pyarrow(self):
+        with patch("src.ResPathExplorer.server.HAS_ARROW", False):
+            status, body = self.post("/annotate", {"genes": ["blaTEM"]},
+                                     headers={"Accept": "application/vnd.apache.arrow.stream"})
+        self.assertEqual(status, 406)
+
+    def test_service_needs_a_database(self):
+        with self.assertRaises(ValueError):
+            AnnotationService.from_config()
+        with self.assertRaises(ValueError):
+            AnnotationService().annotate(["blaTEM"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import gzip
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import pandas as pd
+
+from src.ResPathExplorer.artifact_cache import HAS_PARQUET
+from src.ResPathExplorer.gene_annotation_index import GeneAnnotationIndex
+from src.ResPathExplorer.stream_annotation import annotate_stream, detect_format, iter_gene_chunks
+
+PROKKA_TSV = "locus_tag\tftype\tlength_bp\tgene\tEC_number\tCOG\tproduct\n" \
+             "AB_00001\tCDS\t900\ttetA\t\t\tTetracycline efflux\n" \
+             "AB_00002\tCDS\t300\t\t\t\thypothetical protein\n" \
+             "AB_00003\tCDS\t600\tfimH\t\t\tFimbrial adhesin\n"
+
+BAKTA_TSV = "# Annotated with Bakta\n" \
+            "#Sequence Id\tType\tStart\tStop\tStrand\tLocus Tag\tGene\tProduct\tDbXrefs\n" \
+            "contig_1\tcds\t1\t900\t+\tXY_0001\ttetA\tTetracycline efflux\t\n" \
+            "contig_1\tcds\t1000\t1300\t-\tXY_0002\tpgk\tPhosphoglycerate kinase\t\n"
+
+GFF = "##gff-version 3\n" \
+      "contig_1\tProdigal\tCDS\t1\t900\t.\t+\t0\tID=AB_00001;Name=tetA;gene=tetA;product=efflux\n" \
+      "contig_1\tProdigal\tCDS\t1000\t1300\t.\t-\t0\tID=AB_00002;product=hypothetical protein\n" \
+      "contig_1\tProdigal\tCDS\t1400\t1700\t.\t+\t0\tID=AB_00003;gene=fim%20H\n" \
+      "##FASTA\n>contig_1\nACGT\n"
+
+
+class TestStreamAnnotation(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        vfdb_genes = pd.DataFrame({
+            "Gene_Name": ["tetA", "fimH"],
+            "VFID": ["VF0001", "VF0002"],
+            "VF_Name": ["Tet", "Type 1 fimbriae"],
+            "Functional category": ["Efflux", "Adherence"],
+            "Bacteria": ["Escherichia coli", "Escherichia coli"],
+        })
+        gene_sets = {("eco00010", "Glycolysis"): ["pgk", "gapA"]}
+        self.index = GeneAnnotationIndex.build(vfdb_genes=vfdb_genes, gene_sets=gene_sets)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_detect_format(self):
+        self.assertEqual(detect_format("sample.gff3"), "gff")
+        self.assertEqual(detect_format("sample.TSV"), "tsv")
+        self.assertEqual(detect_format("genes.txt"), "text")
+        self.assertEqual(detect_format("sample.gff.gz"), "gff")
+
+    def test_read_formats(self):
+        prokka = self._write("prokka.tsv", PROKKA_TSV)
+        self.assertEqual(list(iter_gene_chunks(prokka)), [["tetA", "fimH"]])
+        self.assertEqual(list(iter_gene_chunks(prokka, field="locus_tag", chunk_size=2)),
+                         [["AB_00001", "AB_00002"], ["AB_00003"]])
+        bakta = self._write("bakta.tsv", BAKTA_TSV)
+        self.assertEqual(list(iter_gene_chunks(bakta)), [["tetA", "pgk"]])
+        gff = self._write("prokka.gff", GFF)
+        self.assertEqual(list(iter_gene_chunks(gff)), [["tetA", "fim H"]])
+        text = self._write("genes.txt", "# genes\ntetA\n\n pgk \n")
+        self.assertEqual(list(iter_gene_chunks(text)), [["tetA", "pgk"]])
+        compressed = os.path.join(self.tmpdir.name, "prokka.tsv.gz")
+        with gzip.open(compressed, "wt") as f:
+            f.write(PROKKA_TSV)
+        self.assertEqual(list(iter_gene_chunks(compressed)), [["tetA", "fimH"]])
+
+    def test_read_errors(self):
+        prokka = self._write("prokka.tsv", PROKKA_TSV)
+        with self.assertRaises(ValueError):
+            list(iter_gene_chunks(prokka, field="missing"))
+        with self.assertRaises(ValueError):
+            list(iter_gene_chunks(prokka, fmt="fasta"))
+        with self.assertRaises(FileNotFoundError):
+            list(iter_gene_chunks(os.path.join(self.tmpdir.name, "missing.txt")))
+
+    def test_annotate_stream_deduplicates_across_chunks(self):
+        text = self._write("genes.txt", "tetA\nunknown\nTETA\npgk\nfimH\npgk\n")
+        out = os.path.join(self.tmpdir.name, "out", "annotations.csv")
+        summary = annotate_stream(text, self.index, out, chunk_size=2)
+        self.assertEqual(summary, {"genes": 6, "unique": 4, "written": 3})
+        result = pd.read_csv(out)
+        self.assertEqual(result["Gene"].tolist(), ["tetA", "pgk", "fimH"])
+        self.assertEqual(result["Databases"].tolist(), ["VF", "KEGG", "VF"])
+        self.assertFalse(os.path.exists(out + ".tmp"))
+
+    def test_annotate_stream_remembers_only_written_genes(self):
+        text = self._write("genes.txt", "unknown\ntetA\nunknown\nTETA\nother\n")
+        out = os.path.join(self.tmpdir.name, "annotations.csv")
+        seen_sets = []
+        original_update = set.update
+
+        class RecordingSet(set):
+            def update(self, values):
+                original_update(self, values)
+                seen_sets.append(set(self))
+
+        with patch("src.ResPathExplorer.stream_annotation.set", RecordingSet, create=True):
+            summary = annotate_stream(text, self.index, out, chunk_size=2)
+        self.assertEqual(summary["written"], 1)
+        self.assertEqual(seen_sets[-1], {"teta"})
+        self.assertEqual(pd.read_csv(out)["Gene"].tolist(), ["tetA"])
+
+    def test_annotate_stream_all_genes_and_empty_output(self):
+        text = self._write("genes.txt", "unknown\nother\n")
+        out = os.path.join(self.tmpdir.name, "annotations.csv")
+        self.assertEqual(annotate_stream(text, self.index, out)["written"], 0)
+        self.assertTrue(pd.read_csv(out).empty)
+        annotate_stream(text, self.index, out, annotated_only=False)
+        self.assertEqual(pd.read_csv(out)["Gene"].tolist(), ["unknown", "other"])
+
+    def test_parquet_output(self):
+        text = self._write("genes.txt", "tetA\npgk\n")
+        out = os.path.join(self.tmpdir.name, "annotations.parquet")
+        if not HAS_PARQUET:
+            with self.assertRaises(ValueError):
+                annotate_stream(text, self.index, out)
+            return
+        annotate_stream(text, self.index, out, chunk_size=1)
+        self.assertEqual(pd.read_parquet(out)["Gene"].tolist(), ["tetA", "pgk"])
+
+
+if __name__ == '__main__':
+    unittest.main()